@@ -5,12 +5,19 @@ AI Image Analyzer
 Simple OpenAI image analysis tool.
 """
 
+import asyncio
 import base64
 import json
 import os
+import re
+import threading
+import time
+import weakref
 from datetime import datetime
-from openai import OpenAI
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
+from history_store import get_history_store, text_record
 
 # Load environment
 load_dotenv()
@@ -20,80 +27,520 @@ SYSTEM_PROMPT = "You are an expert image analyst. Provide detailed, accurate ana
 
 USER_PROMPT = "Analyze this image in detail. Describe what you see, including any text, objects, patterns, or notable features."
 
-def analyze_image(image_path):
+# Client settings (overridable per ImageAnalyzer)
+DEFAULT_MODEL = 'gpt-4o'
+DEFAULT_TIMEOUT = 60.0          # seconds for the whole request
+DEFAULT_CONNECT_TIMEOUT = 5.0   # seconds to open a connection
+DEFAULT_MAX_RETRIES = 2         # retried with exponential backoff by the OpenAI client
+DEFAULT_MAX_CONNECTIONS = 10
+DEFAULT_KEEPALIVE_EXPIRY = 120.0  # keep idle connections across the 60s refresh loop
+DEFAULT_MAX_CONCURRENCY = 3     # concurrent requests in analyze_variants_async
+
+# What the model is shown: the chart image, the bar_context text summary, or both
+CONTEXT_MODES = ('image', 'text', 'hybrid')
+DEFAULT_CONTEXT_MODE = 'image'
+
+# USD per million tokens, for cost estimates (gpt-4o list price; adjust for other models)
+INPUT_COST_PER_MTOKEN = 2.50
+OUTPUT_COST_PER_MTOKEN = 10.00
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]+")
+
+def build_image_messages(image_data, image_format, system_prompt=SYSTEM_PROMPT, user_prompt=USER_PROMPT):
+    """
+    Build the chat messages for an image analysis request.
+
+    Args:
+        image_data (bytes): Encoded image
+        image_format (str): Image format ('png', 'webp', 'jpeg')
+        system_prompt (str): System instructions
+        user_prompt (str): Analysis request
+
+    Returns:
+        list: Chat completion messages
+    """
+    encoded_image = base64.b64encode(image_data).decode('utf-8')
+    image_format = image_format.lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+
+    return [
+        {'role': 'system', 'content': system_prompt},
+        {
+            'role': 'user',
+            'content': [
+                {'type': 'text', 'text': user_prompt},
+                {'type': 'image_url', 'image_url': {'url': f'data:image/{image_format};base64,{encoded_image}'}}
+            ]
+        }
+    ]
+
+def build_analysis_messages(mode=DEFAULT_CONTEXT_MODE, image_data=None, image_format=None, context_text=None,
+                            system_prompt=SYSTEM_PROMPT, user_prompt=USER_PROMPT):
+    """
+    Build the chat messages for one of the CONTEXT_MODES.
+
+    Args:
+        mode (str): 'image' (chart only), 'text' (bar summary only) or 'hybrid' (both)
+        image_data (bytes, optional): Encoded chart, needed for 'image' and 'hybrid'
+        image_format (str, optional): Image format ('png', 'webp', 'jpeg')
+        context_text (str, optional): bar_context.build_bar_context() output,
+                                      needed for 'text' and 'hybrid'
+        system_prompt (str): System instructions
+        user_prompt (str): Analysis request
+
+    Returns:
+        list: Chat completion messages
+    """
+    if mode not in CONTEXT_MODES:
+        raise ValueError(f"Unknown context mode {mode!r}, expected one of {', '.join(CONTEXT_MODES)}")
+    if mode in ('image', 'hybrid') and image_data is None:
+        raise ValueError(f"Context mode {mode!r} needs image_data")
+    if mode in ('text', 'hybrid') and not context_text:
+        raise ValueError(f"Context mode {mode!r} needs context_text")
+
+    if mode == 'text':
+        return [
+            {'role': 'system', 'content': system_prompt},
+            {'role': 'user', 'content': f"{user_prompt}\n\n{context_text}"}
+        ]
+
+    messages = build_image_messages(image_data, image_format, system_prompt, user_prompt)
+    if mode == 'hybrid':
+        messages[1]['content'].insert(1, {'type': 'text', 'text': context_text})
+    return messages
+
+def estimate_text_tokens(text):
+    """
+    Approximate token count for prompt text.
+
+    Counts words, runs of up to three digits and punctuation runs, which is
+    how GPT tokenizers split text before merging (so '58.42,' is 4 tokens).
+    """
+    return max(1, len(_TOKEN_PATTERN.findall(text)))
+
+def estimate_image_tokens(width, height):
+    """
+    Input tokens for a high-detail image under the gpt-4o tiling rules.
+
+    The image is scaled to fit 2048x2048, then its short side to 768,
+    and costs 85 tokens plus 170 per 512px tile.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = -(-int(width) // 512) * -(-int(height) // 512)
+    return 85 + 170 * tiles
+
+def estimate_request(messages, image_size=None):
+    """
+    Size and estimated prompt tokens of a request.
+
+    Args:
+        messages (list): Chat messages
+        image_size (tuple, optional): (width, height) of the attached image
+
+    Returns:
+        dict: {'request_bytes', 'est_prompt_tokens'}
+    """
+    text_parts = []
+    for message in messages:
+        content = message['content']
+        if isinstance(content, str):
+            text_parts.append(content)
+        else:
+            text_parts.extend(part['text'] for part in content if part['type'] == 'text')
+    tokens = estimate_text_tokens("\n".join(text_parts))
+    if image_size:
+        tokens += estimate_image_tokens(*image_size)
+    return {'request_bytes': len(json.dumps(messages).encode('utf-8')), 'est_prompt_tokens': tokens}
+
+def save_analysis(analysis, image_path=None, symbol=None, history=None):
+    """
+    Append an analysis result to the history store (data/history.sqlite).
+
+    Args:
+        analysis (str): Model response
+        image_path (str, optional): Chart that was analyzed
+        symbol (str, optional): Symbol of the chart
+        history (HistoryStore, optional): Defaults to the shared store
+
+    Returns:
+        int: History row id
+    """
+    record = text_record(analysis, requested_at=datetime.now(), symbol=symbol, event='result',
+                         chart_path=image_path)
+    return (history or get_history_store()).append(record, source='analyze_image')
+
+class _PooledAnalyzer:
+    """
+    Client setup and request building shared by ImageAnalyzer and AsyncImageAnalyzer.
+
+    Subclasses name the httpx and OpenAI client classes to build; the
+    request methods themselves are either all sync or all coroutines.
+    """
+
+    http_client_class = None
+    client_class = None
+
+    def __init__(self, api_key=None, base_url=None, model=DEFAULT_MODEL,
+                 timeout=DEFAULT_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 max_retries=DEFAULT_MAX_RETRIES, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY):
+        """
+        Args:
+            api_key (str, optional): OpenAI key, defaults to $OPENAIKEY
+            base_url (str, optional): API base URL, defaults to $OPENAI_BASE_URL or the real API
+            model (str): Model name
+            timeout (float): Request timeout in seconds
+            connect_timeout (float): Connection timeout in seconds
+            max_retries (int): Retries on connection errors, 429 and 5xx
+            max_connections (int): Connection pool size
+            keepalive_expiry (float): Seconds an idle connection is kept open
+        """
+        self.model = model
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http_client = self.http_client_class(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections,
+                                keepalive_expiry=keepalive_expiry),
+        )
+        self.client = self.client_class(
+            api_key=api_key or os.getenv('OPENAIKEY'),
+            base_url=base_url or os.getenv('OPENAI_BASE_URL'),
+            timeout=self.timeout,
+            max_retries=max_retries,
+            http_client=self.http_client,
+        )
+
+    def _completion_args(self, messages, max_tokens, temperature, response_format):
+        """Keyword arguments for chat.completions.create."""
+        extra = {'response_format': response_format} if response_format else {}
+        return dict(model=self.model, messages=messages, max_tokens=max_tokens,
+                    temperature=temperature, **extra)
+
+    @staticmethod
+    def _response_text(response):
+        return response.choices[0].message.content.strip()
+
+class ImageAnalyzer(_PooledAnalyzer):
+    """
+    OpenAI image analyzer holding one long-lived client.
+
+    The client keeps a pool of keep-alive HTTP connections, so repeated
+    calls skip TCP/TLS setup. Timeouts and retry counts are configurable;
+    retries use the OpenAI client's exponential backoff.
+    """
+
+    http_client_class = DefaultHttpxClient
+    client_class = OpenAI
+
+    def request(self, messages, max_tokens=500, temperature=0.3, response_format=None):
+        """
+        Run one chat completion and return the full response (including usage).
+
+        Args:
+            messages (list): Chat messages
+            max_tokens (int): Response token limit
+            temperature (float): Sampling temperature
+            response_format (dict, optional): Structured output format,
+                e.g. analysis_parser.RESPONSE_FORMAT
+
+        Returns:
+            ChatCompletion: API response
+        """
+        return self.client.chat.completions.create(
+            **self._completion_args(messages, max_tokens, temperature, response_format))
+
+    def complete(self, messages, max_tokens=500, temperature=0.3, response_format=None):
+        """
+        Run one chat completion.
+
+        Returns:
+            str: Response text
+        """
+        return self._response_text(self.request(messages, max_tokens, temperature, response_format))
+
+    def analyze(self, image_data, image_format, system_prompt=SYSTEM_PROMPT, user_prompt=USER_PROMPT,
+                response_format=None, context_text=None, mode=DEFAULT_CONTEXT_MODE):
+        """
+        Analyze an encoded chart image, its bar_context text, or both.
+
+        Args:
+            mode (str): One of CONTEXT_MODES; image_data may be None for 'text'
+
+        Returns:
+            str: Analysis text
+        """
+        messages = build_analysis_messages(mode, image_data, image_format, context_text,
+                                           system_prompt, user_prompt)
+        return self.complete(messages, response_format=response_format)
+
+    def close(self):
+        """Close the pooled connections."""
+        self.client.close()
+
+class AsyncImageAnalyzer(_PooledAnalyzer):
+    """
+    asyncio version of ImageAnalyzer on an AsyncOpenAI client.
+
+    Same methods and arguments as ImageAnalyzer, all coroutines. A client
+    must only be used from the event loop it was first used on;
+    get_async_analyzer() keeps one per loop.
+    """
+
+    http_client_class = DefaultAsyncHttpxClient
+    client_class = AsyncOpenAI
+
+    async def request(self, messages, max_tokens=500, temperature=0.3, response_format=None):
+        return await self.client.chat.completions.create(
+            **self._completion_args(messages, max_tokens, temperature, response_format))
+
+    async def complete(self, messages, max_tokens=500, temperature=0.3, response_format=None):
+        return self._response_text(await self.request(messages, max_tokens, temperature, response_format))
+
+    async def analyze(self, image_data, image_format, system_prompt=SYSTEM_PROMPT, user_prompt=USER_PROMPT,
+                      response_format=None, context_text=None, mode=DEFAULT_CONTEXT_MODE):
+        messages = build_analysis_messages(mode, image_data, image_format, context_text,
+                                           system_prompt, user_prompt)
+        return await self.complete(messages, response_format=response_format)
+
+    async def close(self):
+        await self.client.close()
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+_async_analyzers = weakref.WeakKeyDictionary()
+_analysis_loop = None
+
+def get_analyzer():
+    """Get the shared ImageAnalyzer used by every call site."""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = ImageAnalyzer()
+        return _analyzer
+
+def get_async_analyzer():
+    """Get the AsyncImageAnalyzer for the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _async_analyzers:
+        _async_analyzers[loop] = AsyncImageAnalyzer()
+    return _async_analyzers[loop]
+
+async def analyze_image_async(image_data, image_format, system_prompt=SYSTEM_PROMPT,
+                              user_prompt=USER_PROMPT, deadline=None, analyzer=None,
+                              response_format=None, context_text=None, mode=DEFAULT_CONTEXT_MODE):
+    """
+    Analyze an encoded image without blocking the event loop.
+
+    Args:
+        image_data (bytes): Encoded image (may be None in 'text' mode)
+        image_format (str): Image format ('png', 'webp', 'jpeg')
+        system_prompt (str): System instructions
+        user_prompt (str): Analysis request
+        deadline (float, optional): Seconds before the request is abandoned
+        analyzer (AsyncImageAnalyzer, optional): Defaults to the loop's shared analyzer
+        response_format (dict, optional): Structured output format
+        context_text (str, optional): bar_context text for 'text' and 'hybrid' modes
+        mode (str): One of CONTEXT_MODES
+
+    Returns:
+        str: Analysis text
+
+    Raises:
+        TimeoutError: The deadline passed
+        asyncio.CancelledError: The request was cancelled
+    """
+    analyzer = analyzer or get_async_analyzer()
+    request = analyzer.analyze(image_data, image_format, system_prompt, user_prompt, response_format,
+                               context_text, mode)
+    if deadline is None:
+        return await request
+    return await asyncio.wait_for(request, timeout=deadline)
+
+async def analyze_variants_async(variants, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                                 deadline=None, analyzer=None, response_format=None,
+                                 mode=DEFAULT_CONTEXT_MODE):
+    """
+    Run several analyses (prompt variants, timeframes) concurrently.
+
+    At most max_concurrency requests are in flight. One failing or slow
+    variant does not affect the others.
+
+    Args:
+        variants (list): Dicts with 'name', 'image_data', 'image_format' and
+                         optional 'system_prompt'/'user_prompt'/'context_text'/
+                         'mode'/'response_format' (the last two override the arguments)
+        max_concurrency (int): Concurrent request limit
+        deadline (float, optional): Per-request deadline in seconds
+        analyzer (AsyncImageAnalyzer, optional): Defaults to the loop's shared analyzer
+        response_format (dict, optional): Structured output format
+        mode (str): One of CONTEXT_MODES
+
+    Returns:
+        list: One dict per variant, in order, with 'name' and either
+              'analysis' or 'error'
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(variant):
+        async with semaphore:
+            try:
+                analysis = await analyze_image_async(
+                    variant.get('image_data'), variant.get('image_format'),
+                    variant.get('system_prompt', SYSTEM_PROMPT),
+                    variant.get('user_prompt', USER_PROMPT),
+                    deadline=deadline, analyzer=analyzer,
+                    response_format=variant.get('response_format', response_format),
+                    context_text=variant.get('context_text'), mode=variant.get('mode', mode))
+                return {'name': variant.get('name'), 'analysis': analysis}
+            except asyncio.TimeoutError:
+                return {'name': variant.get('name'), 'error': f'deadline of {deadline}s exceeded'}
+            except Exception as e:
+                return {'name': variant.get('name'), 'error': str(e)}
+
+    return await asyncio.gather(*(run(variant) for variant in variants))
+
+def _get_analysis_loop():
+    """Background event loop that runs submitted analyses."""
+    global _analysis_loop
+    with _analyzer_lock:
+        if _analysis_loop is None:
+            _analysis_loop = asyncio.new_event_loop()
+            threading.Thread(target=_analysis_loop.run_forever, name='analysis-loop', daemon=True).start()
+        return _analysis_loop
+
+def submit_analysis(coroutine):
+    """
+    Run an analysis coroutine on the background analysis loop.
+
+    Args:
+        coroutine: e.g. analyze_image_async(...) or analyze_variants_async(...)
+
+    Returns:
+        concurrent.futures.Future: Call .cancel() to abort the request
+                                   (e.g. when the user presses STOP)
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, _get_analysis_loop())
+
+def analyze_image_sync(image_data, image_format, system_prompt=SYSTEM_PROMPT,
+                       user_prompt=USER_PROMPT, deadline=None, response_format=None,
+                       context_text=None, mode=DEFAULT_CONTEXT_MODE):
+    """
+    Blocking wrapper around analyze_image_async with the same arguments.
+
+    Returns:
+        str: Analysis text
+
+    Raises:
+        TimeoutError: The deadline passed
+    """
+    return submit_analysis(analyze_image_async(image_data, image_format, system_prompt, user_prompt,
+                                               deadline=deadline, response_format=response_format,
+                                               context_text=context_text, mode=mode)).result()
+
+def compare_context_modes(chart_info, modes=CONTEXT_MODES, repeats=3, system_prompt=SYSTEM_PROMPT,
+                          user_prompt=USER_PROMPT, analyzer=None, response_format=None):
+    """
+    Send the same chart in each context mode and compare size, latency and cost.
+
+    Args:
+        chart_info (dict): make_chart render() metadata (uses images['model'] and 'context')
+        modes (iterable): CONTEXT_MODES to compare
+        repeats (int): Requests per mode; latency is the median
+        system_prompt (str): System instructions
+        user_prompt (str): Analysis request
+        analyzer (ImageAnalyzer, optional): Defaults to the shared analyzer
+        response_format (dict, optional): Structured output format
+
+    Returns:
+        list: One dict per mode with request_bytes, est_prompt_tokens,
+              prompt_tokens/completion_tokens (as reported by the API, 0 if not),
+              latency_ms, est_cost_usd and the last analysis text
+    """
+    analyzer = analyzer or get_analyzer()
+    image = chart_info['images']['model']
+    results = []
+    for mode in modes:
+        messages = build_analysis_messages(mode, image['data'], image['format'], chart_info.get('context'),
+                                           system_prompt, user_prompt)
+        row = {'mode': mode}
+        row.update(estimate_request(messages, (image['width'], image['height']) if mode != 'text' else None))
+
+        latencies = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            response = analyzer.request(messages, response_format=response_format)
+            latencies.append(time.perf_counter() - start)
+        usage = getattr(response, 'usage', None)
+        row['prompt_tokens'] = getattr(usage, 'prompt_tokens', 0) or 0
+        row['completion_tokens'] = getattr(usage, 'completion_tokens', 0) or 0
+        row['latency_ms'] = sorted(latencies)[len(latencies) // 2] * 1000
+
+        prompt_tokens = row['prompt_tokens'] or row['est_prompt_tokens']
+        row['est_cost_usd'] = (prompt_tokens * INPUT_COST_PER_MTOKEN
+                               + row['completion_tokens'] * OUTPUT_COST_PER_MTOKEN) / 1e6
+        row['analysis'] = response.choices[0].message.content.strip()
+        results.append(row)
+    return results
+
+def analyze_image(image_path=None, image_data=None, image_format=None, analyzer=None):
     """
     Analyze an image using OpenAI and save results.
-    
+
+    Pass either a file path or the encoded image bytes already in memory
+    (e.g. chart_info['images']['model']['data'] from make_chart).
+
     Args:
-        image_path (str): Path to the image file
+        image_path (str, optional): Path to the image file
+        image_data (bytes, optional): Encoded image, used instead of reading image_path
+        image_format (str, optional): Format of image_data ('png', 'webp', 'jpeg')
+        analyzer (ImageAnalyzer, optional): Analyzer to use, defaults to the shared one
+
+    Returns:
+        str: Analysis text, or None on error
     """
-    print(f"🔍 Analyzing image: {image_path}")
-    
+    if image_path is None and image_data is None:
+        print("❌ Error: No image given (pass image_path or image_data)")
+        return None
+    if image_data is not None and image_path is None and image_format is None:
+        print("❌ Error: image_format is required with in-memory image_data")
+        return None
+
+    print(f"🔍 Analyzing image: {image_path or f'<{len(image_data):,} bytes in memory>'}")
+
     # Check if image exists
-    if not os.path.exists(image_path):
+    if image_data is None and not os.path.exists(image_path):
         print(f"❌ Error: Image not found at {image_path}")
-        return
-    
-    # Create data folder if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-    
+        return None
+
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=os.getenv('OPENAIKEY'))
-        
-        # Encode image to base64
-        with open(image_path, 'rb') as image_file:
-            encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-        
-        # Get image format
-        image_format = image_path.split('.')[-1].lower()
-        if image_format == 'jpg':
-            image_format = 'jpeg'
-        
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model='gpt-4o',
-            messages=[
-                {'role': 'system', 'content': SYSTEM_PROMPT},
-                {
-                    'role': 'user', 
-                    'content': [
-                        {'type': 'text', 'text': USER_PROMPT},
-                        {'type': 'image_url', 'image_url': {'url': f'data:image/{image_format};base64,{encoded_image}'}}
-                    ]
-                }
-            ],
-            max_tokens=500,
-            temperature=0.3
-        )
-        
-        # Get analysis result
-        analysis = response.choices[0].message.content.strip()
-        
+        # Encode image
+        if image_data is None:
+            with open(image_path, 'rb') as image_file:
+                image_data = image_file.read()
+        image_format = image_format or image_path.split('.')[-1]
+
+        # Call OpenAI API on the shared, pooled client
+        analysis = (analyzer or get_analyzer()).analyze(image_data, image_format)
+
         # Print to screen
         print("📝 Analysis Results:")
         print("-" * 50)
         print(analysis)
         print("-" * 50)
-        
-        # Save to file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"analysis_{timestamp}.json"
-        filepath = os.path.join('data', filename)
-        
-        result_data = {
-            'image_path': image_path,
-            'timestamp': timestamp,
-            'analysis': analysis
-        }
-        
-        with open(filepath, 'w') as f:
-            json.dump(result_data, f, indent=2)
-        
-        print(f"✅ Results saved to: {filepath}")
-        
+
+        # Append to the analysis history
+        row_id = save_analysis(analysis, image_path)
+        print(f"✅ Result stored in analysis history (row {row_id})")
+        return analysis
+
     except Exception as e:
         print(f"❌ Error during analysis: {str(e)}")
+        return None
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Analysis Cache
+==============
+Content-addressed cache of AI analysis results.
+Keyed on a hash of the bar data behind the chart plus the system and user
+prompts. Perceptual matching on a chart image hash is optional and off by
+default: when enabled, near-identical charts (quiet pre/post-market
+minutes) reuse the previous result, but only if the last bar's OHLC is
+unchanged, since a small move in the newest candle barely changes the
+hash yet invalidates the trade levels.
+
+Results are copied in and out, so callers may annotate what they get
+without changing the cached value.
+"""
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_MAX_IMAGE_DISTANCE = None  # differing bits out of 64 for a perceptual match (None: off)
+
+
+def bars_fingerprint(stock_data, columns=('Open', 'High', 'Low', 'Close', 'Volume')):
+    """
+    Hash the bar data behind a chart.
+
+    Args:
+        stock_data (DataFrame): Bars indexed by time
+        columns (tuple): Columns that affect the analysis
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(stock_data.index.asi8).tobytes())
+    for column in columns:
+        digest.update(column.encode('utf-8'))
+        digest.update(np.ascontiguousarray(stock_data[column].to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+def last_bar_key(stock_data):
+    """OHLC of the newest bar; a perceptual cache hit requires it to be unchanged."""
+    return tuple(float(value) for value in stock_data[['Open', 'High', 'Low', 'Close']].iloc[-1])
+
+
+def prompt_fingerprint(system_prompt, user_prompt, context_mode=None):
+    """Hash the prompt pair sent with the chart (and the context mode, if not the default image-only)."""
+    digest = hashlib.sha256()
+    digest.update(system_prompt.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(user_prompt.encode('utf-8'))
+    if context_mode and context_mode != 'image':
+        digest.update(b'\0')
+        digest.update(context_mode.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def image_dhash(image, hash_size=8):
+    """
+    Perceptual difference hash of a PIL image.
+
+    Args:
+        image (PIL.Image): Chart image
+        hash_size (int): Hash is hash_size * hash_size bits
+
+    Returns:
+        int: Hash bits
+    """
+    from PIL import Image
+    gray = image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(''.join('1' if bit else '0' for bit in bits), 2)
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class AnalysisCache:
+    """Thread-safe LRU cache of analysis results with a time-to-live."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_image_distance=DEFAULT_MAX_IMAGE_DISTANCE):
+        """
+        Args:
+            max_entries (int): Least recently used entries beyond this are evicted
+            ttl_seconds (float): Entries older than this are not returned
+            max_image_distance (int): Largest dHash distance counted as the same chart,
+                                      None (the default) disables perceptual matching
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_image_distance = max_image_distance
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'image_hits': 0, 'misses': 0, 'expired': 0,
+                         'evictions': 0, 'saved_seconds': 0.0}
+
+    def get(self, data_hash, prompt_hash, image_hash=None, last_bar=None):
+        """
+        Look up a previous result.
+
+        An exact bar-data match is tried first; failing that (and only with
+        perceptual matching enabled), an entry with the same prompts, the
+        same last bar and a close enough image hash counts as a hit.
+
+        Args:
+            data_hash (str): bars_fingerprint of the chart data
+            prompt_hash (str): prompt_fingerprint of the prompts
+            image_hash (int, optional): image_dhash of the chart
+            last_bar (tuple, optional): last_bar_key of the chart data
+
+        Returns:
+            A copy of the cached result, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._drop_expired(now)
+            entry = self._entries.get((data_hash, prompt_hash))
+            if (entry is None and image_hash is not None and last_bar is not None
+                    and self.max_image_distance is not None):
+                for key, candidate in reversed(self._entries.items()):
+                    if (key[1] == prompt_hash and candidate['image_hash'] is not None
+                            and candidate['last_bar'] == last_bar
+                            and hamming_distance(candidate['image_hash'], image_hash) <= self.max_image_distance):
+                        entry = candidate
+                        self.counters['image_hits'] += 1
+                        break
+
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+
+            self._entries.move_to_end(entry['key'])
+            self.counters['hits'] += 1
+            self.counters['saved_seconds'] += entry['latency']
+            return copy.deepcopy(entry['result'])
+
+    def put(self, data_hash, prompt_hash, result, latency=0.0, image_hash=None, last_bar=None):
+        """
+        Store a result.
+
+        Args:
+            data_hash (str): bars_fingerprint of the chart data
+            prompt_hash (str): prompt_fingerprint of the prompts
+            result: Analysis result to return on later hits (a copy is stored)
+            latency (float): Seconds the analysis took (counted as saved on hits)
+            image_hash (int, optional): image_dhash of the chart
+            last_bar (tuple, optional): last_bar_key of the chart data
+        """
+        key = (data_hash, prompt_hash)
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = {'key': key, 'result': result, 'latency': latency,
+                                  'image_hash': image_hash, 'last_bar': last_bar, 'created': time.monotonic()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def _drop_expired(self, now):
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry['created'] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        self.counters['expired'] += len(expired)
+
+    def stats(self):
+        """
+        Get hit/miss counters.
+
+        Returns:
+            dict: Counters plus 'entries' and 'hit_rate'
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = None
+
+
+def get_analysis_cache():
+    """Get the shared analysis cache."""
+    global _cache
+    if _cache is None:
+        _cache = AnalysisCache()
+    return _cache
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Analysis Parser
+===============
+JSON schema for the structured trading analysis and a pure function that
+turns a model response into a validated result. Accepts the schema'd JSON
+reply and, as a fallback, the "KEY: value" text layout the system prompt
+describes.
+"""
+
+import json
+import math
+import re
+
+RECOMMENDATIONS = ('BUY', 'WAIT')
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+
+# Response schema sent with the request (strict structured output)
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'RECOMMENDATION': {'type': 'string', 'enum': list(RECOMMENDATIONS)},
+        'RISK_LEVEL': {'type': 'string', 'enum': list(RISK_LEVELS)},
+        'ENTRY_PRICE': {'type': ['number', 'null']},
+        'STOP_LOSS': {'type': ['number', 'null']},
+        'TAKE_PROFIT': {'type': ['number', 'null']},
+        'CONFIDENCE': {'type': 'integer', 'minimum': 1, 'maximum': 10},
+        'REASONING': {'type': 'string'},
+    },
+    'required': ['RECOMMENDATION', 'RISK_LEVEL', 'ENTRY_PRICE', 'STOP_LOSS',
+                 'TAKE_PROFIT', 'CONFIDENCE', 'REASONING'],
+    'additionalProperties': False,
+}
+
+RESPONSE_FORMAT = {
+    'type': 'json_schema',
+    'json_schema': {'name': 'trade_analysis', 'strict': True, 'schema': ANALYSIS_SCHEMA},
+}
+
+_FIELDS = {
+    'RECOMMENDATION': 'recommendation',
+    'RISK_LEVEL': 'risk_level',
+    'ENTRY_PRICE': 'entry_price',
+    'STOP_LOSS': 'stop_loss',
+    'TAKE_PROFIT': 'take_profit',
+    'CONFIDENCE': 'confidence',
+    'REASONING': 'reasoning',
+}
+
+_LINE_PATTERN = re.compile(r'^\W*(?:\d+[.)]\s*)?\**\s*([A-Za-z_ ]+?)\s*\**\s*[:=]\s*(.*)$')
+_NUMBER_PATTERN = re.compile(r'-?\d+(?:,\d{3})*(?:\.\d+)?|-?\.\d+')
+
+
+class AnalysisParseError(ValueError):
+    """Model response could not be turned into a valid analysis."""
+
+
+def _extract_json(text):
+    """Find the first JSON object in text (bare, fenced or surrounded by prose)."""
+    start = text.find('{')
+    while start != -1:
+        try:
+            value, _ = json.JSONDecoder().raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except ValueError:
+            pass
+        start = text.find('{', start + 1)
+    return None
+
+
+def _extract_lines(text):
+    """Read 'KEY: value' lines, with optional numbering and markdown bold."""
+    fields = {}
+    for line in text.splitlines():
+        match = _LINE_PATTERN.match(line.strip())
+        if not match:
+            continue
+        key = match.group(1).strip().upper().replace(' ', '_')
+        if key in _FIELDS and key not in fields:
+            fields[key] = match.group(2).strip().strip('*').strip()
+    return fields
+
+
+def _parse_price(value, field):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise AnalysisParseError(f"{field} must be a number, got {value!r}")
+    if isinstance(value, (int, float)):
+        price = float(value)
+    else:
+        text = str(value).strip()
+        if text.upper() in ('', 'N/A', 'NA', 'NONE', 'NULL', '--', '-'):
+            return None
+        match = _NUMBER_PATTERN.search(text)
+        if not match:
+            raise AnalysisParseError(f"{field} is not a price: {value!r}")
+        price = float(match.group(0).replace(',', ''))
+    if not math.isfinite(price) or price <= 0:
+        raise AnalysisParseError(f"{field} must be a positive price, got {value!r}")
+    return round(price, 4)
+
+
+def _parse_choice(value, field, choices):
+    if value is None:
+        raise AnalysisParseError(f"{field} is missing")
+    text = re.sub(r'[^A-Z ]', '', str(value).upper()).strip()
+    if text == 'STRONG BUY':
+        text = 'BUY'
+    for choice in choices:
+        if text == choice or text.startswith(choice + ' '):
+            return choice
+    raise AnalysisParseError(f"{field} must be one of {', '.join(choices)}, got {value!r}")
+
+
+def _parse_confidence(value):
+    if value is None or isinstance(value, bool):
+        raise AnalysisParseError(f"CONFIDENCE must be 1-10, got {value!r}")
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        match = _NUMBER_PATTERN.search(str(value))
+        if not match:
+            raise AnalysisParseError(f"CONFIDENCE must be 1-10, got {value!r}")
+        number = float(match.group(0).replace(',', ''))
+    if not math.isfinite(number) or not 1 <= number <= 10:
+        raise AnalysisParseError(f"CONFIDENCE must be 1-10, got {value!r}")
+    return int(round(number))
+
+
+def parse_analysis(text):
+    """
+    Parse and validate a structured trading analysis.
+
+    Args:
+        text (str): Model response (JSON per ANALYSIS_SCHEMA, or KEY: value lines)
+
+    Returns:
+        dict: recommendation, risk_level, entry_price, stop_loss, take_profit,
+              confidence and reasoning (prices are floats or None)
+
+    Raises:
+        AnalysisParseError: The response is missing fields or has invalid values
+    """
+    if not isinstance(text, str) or not text.strip():
+        raise AnalysisParseError("Empty model response")
+
+    raw = _extract_json(text)
+    if raw is not None:
+        raw = {str(key).strip().upper().replace(' ', '_'): value for key, value in raw.items()}
+    else:
+        raw = _extract_lines(text)
+    if 'RECOMMENDATION' not in raw:
+        raise AnalysisParseError("No RECOMMENDATION in model response")
+
+    result = {
+        'recommendation': _parse_choice(raw.get('RECOMMENDATION'), 'RECOMMENDATION', RECOMMENDATIONS),
+        'risk_level': _parse_choice(raw.get('RISK_LEVEL'), 'RISK_LEVEL', RISK_LEVELS),
+        'entry_price': _parse_price(raw.get('ENTRY_PRICE'), 'ENTRY_PRICE'),
+        'stop_loss': _parse_price(raw.get('STOP_LOSS'), 'STOP_LOSS'),
+        'take_profit': _parse_price(raw.get('TAKE_PROFIT'), 'TAKE_PROFIT'),
+        'confidence': _parse_confidence(raw.get('CONFIDENCE')),
+        'reasoning': str(raw.get('REASONING') or '').strip(),
+    }
+
+    if result['recommendation'] == 'BUY':
+        if result['entry_price'] is None:
+            raise AnalysisParseError("BUY recommendation without ENTRY_PRICE")
+        entry = result['entry_price']
+        if result['stop_loss'] is not None and result['stop_loss'] >= entry:
+            raise AnalysisParseError("STOP_LOSS must be below ENTRY_PRICE for a BUY")
+        if result['take_profit'] is not None and result['take_profit'] <= entry:
+            raise AnalysisParseError("TAKE_PROFIT must be above ENTRY_PRICE for a BUY")
+
+    return result
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Strategy Backtest
+=================
+Vectorized backtest of the strategies the analysis prompt describes:
+EMA5/SMA8 crossovers and daily pivot reclaims, exited by a fixed-dollar
+take profit or stop loss (the $0.10-$0.50 scalps), a holding limit or
+the session end.
+
+Indicators come from the same EMA/SMA classes as fetch_bitx_data.
+Entries, exits and fills are computed with NumPy over all bars at once;
+the only Python loop walks the accepted trades to keep one position at
+a time. sweep() fans a parameter grid out over a process pool.
+
+The CLI reads the bars the app and engine.py have stored in
+data/bars.sqlite (5m by default). That history only reaches as far back
+as the provider serves: about 60 days of 5m bars and 7 days of 1m bars
+from Yahoo Finance, so longer tests need bars from another source.
+
+Usage:
+    python backtest.py --symbol BITX
+    python backtest.py --symbol BITX --interval 1m --sweep
+"""
+
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indicators import EMA, SMA
+from make_chart import day_runs
+
+STRATEGIES = ('crossover', 'pivot')
+
+DEFAULT_PARAMS = {
+    'strategy': 'crossover',
+    'fast': 5,               # EMA span
+    'slow': 8,               # SMA window
+    'take_profit': 0.25,     # dollars above entry
+    'stop_loss': 0.10,       # dollars below entry
+    'max_hold': 60,          # bars before a timed exit
+    'pivot_filter': False,   # crossover: only enter above the day's pivot
+    'cost': 0.0,             # round-trip cost per share (commission + slippage)
+}
+
+DEFAULT_GRID = {
+    'fast': (3, 5, 8),
+    'slow': (8, 13, 21),
+    'take_profit': (0.10, 0.25, 0.50),
+    'stop_loss': (0.05, 0.10, 0.20),
+}
+
+EXIT_REASONS = ('target', 'stop', 'timeout')
+
+
+def session_layout(bars):
+    """
+    Session boundaries per bar.
+
+    Returns:
+        tuple: (session number per bar, last row of each bar's session, session first rows)
+    """
+    dates = bars['Date'].to_numpy() if 'Date' in bars else bars.index.date
+    _, starts, ends = day_runs(dates)
+    lengths = ends - starts + 1
+    session = np.repeat(np.arange(len(starts)), lengths)
+    return session, np.repeat(ends, lengths), starts
+
+
+def daily_pivots(high, low, close, session, starts):
+    """
+    Classic floor pivots from the previous session, per bar.
+
+    Returns:
+        dict: 'P', 'R1', 'S1' arrays aligned with the bars (NaN on the first session)
+    """
+    ends = np.append(starts[1:], len(close)) - 1
+    day_high = np.maximum.reduceat(high, starts)
+    day_low = np.minimum.reduceat(low, starts)
+    day_close = close[ends]
+    pivot = (day_high + day_low + day_close) / 3.0
+
+    # Session k uses session k-1's levels
+    previous = np.concatenate([[np.nan], pivot[:-1]])
+    prev_high = np.concatenate([[np.nan], day_high[:-1]])
+    prev_low = np.concatenate([[np.nan], day_low[:-1]])
+    return {
+        'P': previous[session],
+        'R1': (2 * previous - prev_low)[session],
+        'S1': (2 * previous - prev_high)[session],
+    }
+
+
+def _indicators(bars, fast, slow):
+    """EMA(fast) and SMA(slow) via the indicator engine's batch mode (as in a backfill)."""
+    return EMA(fast).batch(bars).to_numpy(dtype=float), SMA(slow).batch(bars).to_numpy(dtype=float)
+
+
+def entry_signals(close, fast_line, slow_line, pivots, session, strategy='crossover', pivot_filter=False):
+    """
+    Bars whose close triggers an entry at the next bar's open.
+
+    Returns:
+        numpy.ndarray: Signal bar positions, ascending
+    """
+    same_session = np.zeros(len(close), dtype=bool)
+    same_session[1:] = session[1:] == session[:-1]
+
+    if strategy == 'crossover':
+        above = fast_line > slow_line        # False where either is NaN
+        signal = same_session & above
+        signal[1:] &= ~above[:-1]
+        if pivot_filter:
+            signal &= close > pivots['P']
+    elif strategy == 'pivot':
+        level = pivots['P']
+        signal = same_session & (close > level)
+        signal[1:] &= close[:-1] <= level[1:]
+    else:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    return np.flatnonzero(signal)
+
+
+def simulate_exits(open_, high, low, close, entry_idx, last_idx, take_profit, stop_loss, max_hold):
+    """
+    Exit of every candidate entry, for all entries at once.
+
+    A window of max_hold bars from the entry bar is laid out per entry;
+    the first bar touching the stop or target ends the trade (the stop
+    wins when a bar touches both). Gaps through a level fill at the open.
+
+    Args:
+        entry_idx (ndarray): Entry bar positions (filled at that bar's open)
+        last_idx (ndarray): Last bar each entry may be held to (session end)
+
+    Returns:
+        tuple: (exit bar positions, exit prices, reason codes into EXIT_REASONS)
+    """
+    entry_price = open_[entry_idx]
+    target = entry_price + take_profit
+    stop = entry_price - stop_loss
+    limit = np.minimum(entry_idx + max_hold - 1, last_idx)
+
+    offsets = entry_idx[:, None] + np.arange(max_hold)[None, :]
+    valid = offsets <= limit[:, None]
+    offsets = np.minimum(offsets, len(open_) - 1)
+    hit_stop = (low[offsets] <= stop[:, None]) & valid
+    hit_target = (high[offsets] >= target[:, None]) & valid
+    hit = hit_stop | hit_target
+
+    any_hit = hit.any(axis=1)
+    first = np.where(any_hit, hit.argmax(axis=1), limit - entry_idx)
+    exit_idx = entry_idx + first
+    rows = np.arange(len(entry_idx))
+    stopped = any_hit & hit_stop[rows, first]
+    targeted = any_hit & ~stopped
+
+    exit_open = open_[exit_idx]
+    exit_price = np.where(stopped, np.minimum(stop, exit_open),
+                          np.where(targeted, np.maximum(target, exit_open), close[exit_idx]))
+    reason = np.where(stopped, 1, np.where(targeted, 0, 2))
+    return exit_idx, exit_price, reason
+
+
+def _one_position(entry_idx, exit_idx):
+    """Keep entries that start after the previous accepted trade has exited."""
+    following = np.searchsorted(entry_idx, exit_idx, side='right')
+    accepted = []
+    i = 0
+    while i < len(entry_idx):
+        accepted.append(i)
+        i = following[i]
+    return np.asarray(accepted, dtype=int)
+
+
+def trade_stats(pnl, hold, reason):
+    """Summary statistics of a trade list (pnl per share)."""
+    if len(pnl) == 0:
+        return {'trades': 0, 'win_rate': None, 'total_pnl': 0.0, 'avg_pnl': None, 'profit_factor': None,
+                'max_drawdown': 0.0, 'avg_hold': None, **{f"exits_{name}": 0 for name in EXIT_REASONS}}
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity
+    gains, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+    stats = {
+        'trades': int(len(pnl)),
+        'win_rate': float((pnl > 0).mean()),
+        'total_pnl': float(equity[-1]),
+        'avg_pnl': float(pnl.mean()),
+        'profit_factor': float(gains / losses) if losses else None,
+        'max_drawdown': float(drawdown.max()),
+        'avg_hold': float(hold.mean()),
+    }
+    counts = np.bincount(reason, minlength=len(EXIT_REASONS))
+    stats.update({f"exits_{name}": int(count) for name, count in zip(EXIT_REASONS, counts)})
+    return stats
+
+
+def run_backtest(bars, return_trades=True, **params):
+    """
+    Backtest one parameter set.
+
+    Args:
+        bars (DataFrame): OHLCV bars indexed by time (a Date column is used if present)
+        return_trades (bool): Include the trade list
+        **params: Overrides for DEFAULT_PARAMS
+
+    Returns:
+        dict: {'params', 'stats', 'trades' (DataFrame: entry/exit time and price, pnl, bars held, exit)}
+    """
+    params = {**DEFAULT_PARAMS, **params}
+    open_ = bars['Open'].to_numpy(dtype=float)
+    high = bars['High'].to_numpy(dtype=float)
+    low = bars['Low'].to_numpy(dtype=float)
+    close = bars['Close'].to_numpy(dtype=float)
+    session, last_idx, starts = session_layout(bars)
+    pivots = daily_pivots(high, low, close, session, starts)
+    fast_line, slow_line = _indicators(bars, params['fast'], params['slow'])
+
+    signals = entry_signals(close, fast_line, slow_line, pivots, session,
+                            params['strategy'], params['pivot_filter'])
+    # Enter at the next bar's open, in the same session
+    signals = signals[signals < last_idx[signals]]
+    entry_idx = signals + 1
+
+    exit_idx, exit_price, reason = simulate_exits(open_, high, low, close, entry_idx, last_idx[entry_idx],
+                                                  params['take_profit'], params['stop_loss'], params['max_hold'])
+    keep = _one_position(entry_idx, exit_idx)
+    entry_idx, exit_idx, exit_price, reason = entry_idx[keep], exit_idx[keep], exit_price[keep], reason[keep]
+
+    entry_price = open_[entry_idx]
+    pnl = exit_price - entry_price - params['cost']
+    hold = exit_idx - entry_idx + 1
+    result = {'params': params, 'stats': trade_stats(pnl, hold, reason)}
+    if return_trades:
+        result['trades'] = pd.DataFrame({
+            'entry_time': bars.index[entry_idx], 'entry_price': entry_price,
+            'exit_time': bars.index[exit_idx], 'exit_price': exit_price,
+            'pnl': pnl, 'bars_held': hold, 'exit': np.asarray(EXIT_REASONS)[reason],
+        })
+    return result
+
+
+_sweep_bars = None
+
+
+def _init_sweep(bars):
+    global _sweep_bars
+    _sweep_bars = bars
+
+
+def _sweep_task(params):
+    if params['fast'] >= params['slow'] and params.get('strategy', 'crossover') == 'crossover':
+        return None
+    return {**params, **run_backtest(_sweep_bars, return_trades=False, **params)['stats']}
+
+
+def sweep(bars, grid=None, processes=None, base=None):
+    """
+    Backtest every combination of a parameter grid on a process pool.
+
+    The bars are sent to each worker once (pool initializer), not per task.
+
+    Args:
+        bars (DataFrame): OHLCV bars
+        grid (dict, optional): Parameter -> values, defaults to DEFAULT_GRID
+        processes (int, optional): Worker count (default: CPU count; 1 runs in-process)
+        base (dict, optional): Fixed parameters applied to every combination
+
+    Returns:
+        pandas.DataFrame: One row per combination, best total_pnl first
+    """
+    grid = grid or DEFAULT_GRID
+    keys = list(grid)
+    combos = [{**(base or {}), **dict(zip(keys, values))} for values in itertools.product(*grid.values())]
+    processes = processes or os.cpu_count() or 1
+
+    if processes == 1:
+        _init_sweep(bars)
+        rows = [_sweep_task(params) for params in combos]
+    else:
+        chunk = max(1, len(combos) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_sweep, initargs=(bars,)) as pool:
+            rows = list(pool.map(_sweep_task, combos, chunksize=chunk))
+    rows = [row for row in rows if row is not None]
+    return pd.DataFrame(rows).sort_values('total_pnl', ascending=False).reset_index(drop=True)
+
+
+def main(argv=None):
+    """Backtest stored bars from data/bars.sqlite."""
+    from bar_store import get_default_store
+
+    parser = argparse.ArgumentParser(description="Backtest the EMA/SMA crossover and pivot strategies")
+    parser.add_argument('--symbol', default='BITX')
+    parser.add_argument('--interval', default='5m', help="Stored bar interval (default 5m, as the app stores)")
+    parser.add_argument('--strategy', choices=STRATEGIES, default=DEFAULT_PARAMS['strategy'])
+    parser.add_argument('--take-profit', type=float, default=DEFAULT_PARAMS['take_profit'])
+    parser.add_argument('--stop-loss', type=float, default=DEFAULT_PARAMS['stop_loss'])
+    parser.add_argument('--max-hold', type=int, default=DEFAULT_PARAMS['max_hold'])
+    parser.add_argument('--pivot-filter', action='store_true')
+    parser.add_argument('--sweep', action='store_true', help="Run DEFAULT_GRID on a process pool")
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    bars = get_default_store().load(args.symbol, args.interval)
+    if bars.empty:
+        print(f"❌ No stored {args.interval} bars for {args.symbol} (run the app or engine.py first)")
+        return 1
+    print(f"📊 {len(bars):,} bars of {args.symbol} from {bars.index[0]} to {bars.index[-1]}")
+
+    params = {'strategy': args.strategy, 'take_profit': args.take_profit, 'stop_loss': args.stop_loss,
+              'max_hold': args.max_hold, 'pivot_filter': args.pivot_filter}
+    if args.sweep:
+        results = sweep(bars, processes=args.processes, base=params)
+        print(results.head(10).to_string(index=False))
+    else:
+        result = run_backtest(bars, **params)
+        for key, value in result['stats'].items():
+            print(f"   {key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
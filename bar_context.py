@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bar Context
+===========
+Compact text summary of the bars behind a chart, for sending to the model
+alongside (or instead of) the chart image. Carries the exact OHLCV,
+EMA5/SMA8 and per-session levels the image only shows approximately.
+
+Formatted for few tokens: GPT tokenizers split every digit group and
+punctuation mark, so rows use HHMM times, volume in thousands, and the
+indicators are given once rather than per row.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CONTEXT_BARS = 32       # most recent bars listed row by row
+DEFAULT_DECIMALS = 2
+
+_BAR_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+
+def _bar_interval(index):
+    """Describe the bar spacing, e.g. '5m' or '1h'."""
+    if len(index) < 2:
+        return 'bar'
+    step = pd.Series(index[1:] - index[:-1]).median()
+    minutes = int(step.total_seconds() // 60)
+    if minutes and minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m" if minutes else f"{int(step.total_seconds())}s"
+
+
+def build_bar_context(stock_data, sessions=None, symbol=None, bars=DEFAULT_CONTEXT_BARS,
+                      decimals=DEFAULT_DECIMALS):
+    """
+    Summarize bars as a few short CSV-style sections.
+
+    Args:
+        stock_data (DataFrame): Stock data from fetch_bitx_data
+        sessions (DataFrame, optional): make_chart.get_session_table() result
+        symbol (str, optional): Symbol for the header line
+        bars (int): Number of most recent bars to list
+        decimals (int): Decimal places for prices
+
+    Returns:
+        str: Context text
+    """
+    if sessions is None:
+        from make_chart import get_session_table
+        sessions = get_session_table(stock_data)
+
+    price = f"{{:.{decimals}f}}"
+    last = stock_data.iloc[-1]
+    timezone = getattr(stock_data.index.tz, 'zone', None) or str(stock_data.index.tz or 'UTC')
+
+    lines = [f"{symbol or 'SYMBOL'} {_bar_interval(stock_data.index)} bars, {timezone}, "
+             f"last bar {stock_data.index[-1]:%Y-%m-%d %H:%M}"]
+
+    latest = [f"close={price.format(last['Close'])}"]
+    for column in ('EMA5', 'SMA8'):
+        if column in stock_data and pd.notna(last[column]):
+            latest.append(f"{column}={price.format(last[column])}")
+    if 'EMA5' in stock_data and 'SMA8' in stock_data and pd.notna(last['EMA5']) and pd.notna(last['SMA8']):
+        above = (stock_data['EMA5'] > stock_data['SMA8']).to_numpy()
+        flips = np.flatnonzero(above[1:] != above[:-1])
+        since = f" for {len(above) - 1 - flips[-1]} bars" if len(flips) else ""
+        latest.append(f"EMA5 {'above' if above[-1] else 'below'} SMA8{since}")
+    lines.append("LATEST " + " ".join(latest))
+    lines.append(f"RANGE high={price.format(stock_data['High'].max())} low={price.format(stock_data['Low'].min())}")
+
+    # One row per session (the boxes drawn on the chart)
+    lines.append("SESSIONS date,open,high,low,close,vol_k")
+    session_rows = sessions[['open', 'high', 'low', 'close']].copy()
+    session_rows['vol_k'] = (sessions['volume'] / 1000).round().astype('int64')
+    session_rows.index = [str(date) for date in session_rows.index]
+    lines.append(session_rows.to_csv(header=False, float_format=f"%.{decimals}f", lineterminator='\n').rstrip('\n'))
+
+    # Most recent bars, oldest first
+    recent = stock_data[[column for column in _BAR_COLUMNS if column in stock_data]].tail(bars).copy()
+    recent['vol_k'] = (stock_data['Volume'].tail(bars) / 1000).round().astype('int64')
+    time_format = '%H%M' if len(set(recent.index.date)) == 1 else '%m%d %H%M'
+    recent.index = recent.index.strftime(time_format)
+    lines.append(f"BARS last {len(recent)}, oldest first: {'hhmm' if time_format == '%H%M' else 'mmdd hhmm'},"
+                 f"{','.join(column.lower() for column in recent.columns)}")
+    lines.append(recent.to_csv(header=False, float_format=f"%.{decimals}f", lineterminator='\n').rstrip('\n'))
+
+    return "\n".join(lines)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Local Bar Store
+===============
+Persistent SQLite cache of OHLCV candles keyed by symbol and interval.
+Only bars newer than the last stored timestamp are requested from the
+data provider, so a refresh costs a small delta download. A window that
+reaches further back than the series has been fetched is backfilled once.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+
+DEFAULT_DB_PATH = os.path.join('data', 'bars.sqlite')
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class YFinanceProvider:
+    """Bar provider backed by Yahoo Finance."""
+
+    def history(self, symbol, start, end, interval, prepost=True):
+        """
+        Download bars between start and end.
+
+        Args:
+            symbol (str): Stock symbol
+            start (datetime): First bar time (inclusive)
+            end (datetime): Last bar time (exclusive)
+            interval (str): Bar interval, e.g. '1m' or '5m'
+            prepost (bool): Include pre/after-market bars
+
+        Returns:
+            pandas.DataFrame: OHLCV bars indexed by Datetime
+        """
+        import yfinance as yf
+        return yf.Ticker(symbol).history(start=start, end=end,
+                                         interval=interval, prepost=prepost)
+
+
+class LocalProvider:
+    """
+    Offline stand-in for YFinanceProvider.
+
+    Serves slices of a prepared OHLCV frame and records every request, so
+    callers can check that only the delta after the last stored bar was asked for.
+    """
+
+    def __init__(self, bars):
+        """
+        Args:
+            bars (DataFrame): OHLCV bars with a tz-aware DatetimeIndex
+        """
+        self.bars = bars
+        self.calls = []
+
+    def history(self, symbol, start, end, interval, prepost=True):
+        self.calls.append({'symbol': symbol, 'start': start, 'end': end, 'interval': interval})
+        index = self.bars.index
+        mask = (index >= _as_timestamp(start, index.tz)) & (index < _as_timestamp(end, index.tz))
+        return self.bars[mask].copy()
+
+
+def _as_timestamp(value, tz):
+    """Convert a datetime to a Timestamp comparable with an index in tz."""
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(tz) if tz is not None else ts
+    elif tz is not None:
+        ts = ts.tz_convert(tz)
+    return ts
+
+
+def _to_epoch_seconds(index):
+    """Convert a DatetimeIndex to integer UTC epoch seconds."""
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return ((index - pd.Timestamp('1970-01-01', tz='UTC')) // pd.Timedelta('1s')).astype('int64')
+
+
+class BarStore:
+    """SQLite-backed OHLCV store with delta synchronisation."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                    PRIMARY KEY (symbol, interval, ts)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS series (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    tz TEXT,
+                    PRIMARY KEY (symbol, interval)
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    start INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )""")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path)
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Get the time of the newest stored bar.
+
+        Returns:
+            pandas.Timestamp or None: Newest bar time in UTC, None if empty
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(ts) FROM bars WHERE symbol=? AND interval=?",
+                               (symbol, interval)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit='s', tz='UTC')
+
+    def first_covered(self, symbol, interval):
+        """
+        Get the earliest time the provider has been asked for.
+
+        Falls back to the oldest stored bar for stores written before
+        coverage was recorded.
+
+        Returns:
+            pandas.Timestamp or None: Start of the fetched range in UTC, None if empty
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT start FROM coverage WHERE symbol=? AND interval=?",
+                               (symbol, interval)).fetchone()
+            if row is None:
+                row = conn.execute("SELECT MIN(ts) FROM bars WHERE symbol=? AND interval=?",
+                                   (symbol, interval)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit='s', tz='UTC')
+
+    def _set_coverage(self, symbol, interval, start):
+        epoch = int(_to_epoch_seconds(pd.DatetimeIndex([_as_timestamp(start, 'UTC')]))[0])
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?)", (symbol, interval, epoch))
+
+    def upsert(self, symbol, interval, bars):
+        """
+        Insert bars, replacing any stored bar with the same timestamp.
+
+        Args:
+            symbol (str): Stock symbol
+            interval (str): Bar interval
+            bars (DataFrame): OHLCV bars indexed by Datetime
+
+        Returns:
+            int: Number of rows written
+        """
+        if bars is None or bars.empty:
+            return 0
+        epochs = _to_epoch_seconds(bars.index)
+        rows = list(zip(
+            [symbol] * len(bars), [interval] * len(bars), epochs.tolist(),
+            bars['Open'].astype(float).tolist(), bars['High'].astype(float).tolist(),
+            bars['Low'].astype(float).tolist(), bars['Close'].astype(float).tolist(),
+            bars['Volume'].fillna(0).astype('int64').tolist()
+        ))
+        tz = str(bars.index.tz) if bars.index.tz is not None else None
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO series VALUES (?, ?, ?)", (symbol, interval, tz))
+        return len(rows)
+
+    def load(self, symbol, interval, start=None):
+        """
+        Load stored bars for a series.
+
+        Args:
+            symbol (str): Stock symbol
+            interval (str): Bar interval
+            start (datetime, optional): Only return bars at or after this time
+
+        Returns:
+            pandas.DataFrame: OHLCV bars indexed by Datetime in the series timezone
+        """
+        query = "SELECT ts, open, high, low, close, volume FROM bars WHERE symbol=? AND interval=?"
+        params = [symbol, interval]
+        if start is not None:
+            query += " AND ts >= ?"
+            params.append(int(_to_epoch_seconds(pd.DatetimeIndex([_as_timestamp(start, 'UTC')]))[0]))
+        query += " ORDER BY ts"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+            tz_row = conn.execute("SELECT tz FROM series WHERE symbol=? AND interval=?",
+                                  (symbol, interval)).fetchone()
+
+        frame = pd.DataFrame(rows, columns=['ts'] + BAR_COLUMNS)
+        index = pd.to_datetime(frame.pop('ts'), unit='s', utc=True)
+        if tz_row and tz_row[0]:
+            index = index.dt.tz_convert(tz_row[0])
+        frame.index = pd.DatetimeIndex(index, name='Datetime')
+        return frame
+
+    def sync(self, symbol, interval, days, provider, prepost=True):
+        """
+        Bring a series up to date and return the requested window.
+
+        The newest stored bar is requested again because it may still have
+        been forming when it was saved. If the window starts before the
+        range fetched so far (the store was filled with fewer days), the
+        missing head is fetched as well.
+
+        Args:
+            symbol (str): Stock symbol
+            interval (str): Bar interval
+            days (int): Size of the returned window in days
+            provider: Object with a history(symbol, start, end, interval, prepost) method
+            prepost (bool): Include pre/after-market bars
+
+        Returns:
+            tuple: (window DataFrame, number of bars received from the provider)
+        """
+        end = datetime.now(timezone.utc)
+        window_start = end - timedelta(days=days)
+
+        last = self.last_timestamp(symbol, interval)
+        received = 0
+        if last is None or last < window_start:
+            fetch_start = window_start
+        else:
+            fetch_start = last.to_pydatetime()
+            covered = self.first_covered(symbol, interval)
+            if covered > window_start:
+                backfill = provider.history(symbol, start=window_start, end=covered.to_pydatetime(),
+                                            interval=interval, prepost=prepost)
+                received += self.upsert(symbol, interval, backfill)
+
+        new_bars = provider.history(symbol, start=fetch_start, end=end,
+                                    interval=interval, prepost=prepost)
+        received += self.upsert(symbol, interval, new_bars)
+        covered = self.first_covered(symbol, interval)
+        if fetch_start == window_start or covered is None or covered > window_start:
+            self._set_coverage(symbol, interval, window_start)
+        return self.load(symbol, interval, start=window_start), received
+
+
+_default_store = None
+
+
+def get_default_store():
+    """Get the shared bar store under data/."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Watchlist Charts
+================
+Charts for a list of symbols in one go. Bars are fetched on a thread
+pool (network and SQLite wait, not CPU); rendering is CPU-bound and
+holds the GIL, so charts are drawn on a process pool sized to the cores.
+
+Each worker process warms matplotlib once and keeps its per-symbol
+CandlestickChart between batches. A symbol that fails to fetch or
+render is reported and the rest still finish.
+
+Usage:
+    python batch_charts.py JOBY PLTR PYPL --days 5
+    python batch_charts.py BITX JOBY PLTR PYPL --interval 1m --days 2 --processes 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from make_chart import fetch_bitx_data, get_chart, summarize_chart_info, CandlestickChart, DEFAULT_PROFILES
+
+DEFAULT_WATCHLIST = ('BITX', 'JOBY', 'PLTR', 'PYPL')
+DEFAULT_OUTPUT_DIR = 'charts'
+DEFAULT_FETCH_THREADS = 8
+
+
+def fetch_watchlist(symbols, days=5, interval='5m', store=None, provider=None, threads=DEFAULT_FETCH_THREADS):
+    """
+    Fetch bars with indicators for several symbols concurrently.
+
+    Args:
+        symbols (iterable): Stock symbols
+        days (int): Days of bars per symbol
+        interval (str): Bar interval passed to the provider
+        store (BarStore, optional): Bar cache, defaults to data/bars.sqlite
+        provider (optional): Bar provider, defaults to Yahoo Finance
+        threads (int): Concurrent fetches
+
+    Returns:
+        tuple: ({symbol: DataFrame}, {symbol: error message}) in watchlist order
+    """
+    symbols = list(dict.fromkeys(symbols))
+    frames, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(symbols))), thread_name_prefix='fetch') as pool:
+        futures = {symbol: pool.submit(fetch_bitx_data, symbol, days, interval, store, provider)
+                   for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                frames[symbol] = future.result()
+            except Exception as e:
+                errors[symbol] = f"{type(e).__name__}: {e}"
+    return frames, errors
+
+
+def _init_worker():
+    """Pay matplotlib's font and Agg setup once per worker process, not per chart."""
+    chart = CandlestickChart('WARMUP')
+    chart.figure.canvas.draw()
+
+
+def _render_symbol(symbol, stock_data, output_dir, profiles, persist):
+    """Worker task: render one symbol on this process's long-lived chart."""
+    start = time.perf_counter()
+    chart_info = get_chart(symbol).render(stock_data, output_dir, profiles, persist)
+    summary = summarize_chart_info(chart_info)
+    summary['render_seconds'] = time.perf_counter() - start
+    summary['pid'] = os.getpid()
+    return summary
+
+
+class ChartPool:
+    """
+    Process pool that renders watchlist charts.
+
+    Keep one around to reuse the warmed worker processes across batches.
+    A worker that dies (and breaks the pool) only fails the symbols still
+    in that batch; the next batch gets a fresh pool.
+    """
+
+    def __init__(self, processes=None):
+        """
+        Args:
+            processes (int, optional): Worker processes, defaults to the CPU count
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker)
+        return self._executor
+
+    def render(self, frames, output_dir=DEFAULT_OUTPUT_DIR, profiles=DEFAULT_PROFILES, persist=True):
+        """
+        Render one chart per symbol, each into output_dir/<symbol>/.
+
+        Args:
+            frames (dict): Symbol -> bars with indicators (fetch_watchlist output)
+            output_dir (str): Parent directory of the per-symbol chart directories
+            profiles (iterable): Render profiles, see make_chart.RENDER_PROFILES
+            persist (bool): Write chart images to disk
+
+        Returns:
+            dict: Symbol -> {'ok': True, 'chart': summary} or {'ok': False, 'error': message}
+        """
+        profiles = tuple(profiles)
+        pool = self._pool()
+        futures = {symbol: pool.submit(_render_symbol, symbol, stock_data, os.path.join(output_dir, symbol),
+                                       profiles, persist)
+                   for symbol, stock_data in frames.items()}
+        results = {}
+        broken = False
+        for symbol, future in futures.items():
+            try:
+                results[symbol] = {'ok': True, 'chart': future.result()}
+            except BrokenProcessPool as e:
+                results[symbol] = {'ok': False, 'error': f"worker process died: {e}"}
+                broken = True
+            except Exception as e:
+                results[symbol] = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        if broken:
+            pool.shutdown(wait=False)
+            self._executor = None
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_charts(symbols=DEFAULT_WATCHLIST, days=5, interval='5m', output_dir=DEFAULT_OUTPUT_DIR,
+                    profiles=DEFAULT_PROFILES, persist=True, processes=None, store=None, provider=None,
+                    pool=None):
+    """
+    Fetch and chart a watchlist.
+
+    Args:
+        symbols (iterable): Stock symbols
+        days (int): Days of bars per chart
+        interval (str): Bar interval
+        output_dir (str): Parent directory of the per-symbol chart directories
+        profiles (iterable): Render profiles
+        persist (bool): Write chart images to disk
+        processes (int, optional): Render processes (ignored when pool is given)
+        store (BarStore, optional): Bar cache
+        provider (optional): Bar provider
+        pool (ChartPool, optional): Existing pool to reuse
+
+    Returns:
+        dict: Symbol -> result (see ChartPool.render), in watchlist order
+    """
+    frames, errors = fetch_watchlist(symbols, days, interval, store, provider)
+
+    owned = pool is None
+    pool = pool or ChartPool(min(processes or os.cpu_count() or 1, max(1, len(frames))))
+    try:
+        rendered = pool.render(frames, output_dir, profiles, persist) if frames else {}
+    finally:
+        if owned:
+            pool.close()
+
+    results = {}
+    for symbol in dict.fromkeys(symbols):
+        results[symbol] = rendered.get(symbol) or {'ok': False, 'error': errors.get(symbol, 'not fetched')}
+    return results
+
+
+def main(argv=None):
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Fetch and chart a watchlist in parallel")
+    parser.add_argument('symbols', nargs='*', default=list(DEFAULT_WATCHLIST),
+                        help=f"Symbols to chart (default {' '.join(DEFAULT_WATCHLIST)})")
+    parser.add_argument('--days', type=int, default=5, help="Days of bars per chart (default 5)")
+    parser.add_argument('--interval', default='5m', help="Bar interval (default 5m)")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                        help=f"Charts go to <output-dir>/<SYMBOL>/ (default {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument('--processes', type=int, help="Render processes (default: one per core)")
+    parser.add_argument('--profiles', nargs='+', default=list(DEFAULT_PROFILES),
+                        help=f"Render profiles (default {' '.join(DEFAULT_PROFILES)})")
+    args = parser.parse_args(argv)
+
+    symbols = [symbol.upper() for symbol in args.symbols]
+    start = time.perf_counter()
+    results = generate_charts(symbols, args.days, args.interval, args.output_dir, args.profiles,
+                              processes=args.processes)
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for symbol, result in results.items():
+        if result['ok']:
+            chart = result['chart']
+            print(f"✅ {symbol:<6} ${chart['current_price']:.2f}  {chart['chart_path']}  "
+                  f"(rendered in {chart['render_seconds']:.2f}s)")
+        else:
+            failed += 1
+            print(f"❌ {symbol:<6} {result['error']}")
+    print(f"📊 {len(results) - failed}/{len(results)} charts in {elapsed:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,990 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks
+======================
+Timing harness for the chart and analysis pipeline.
+Runs on synthetic bars so no network or API key is needed.
+
+Usage:
+    python benchmarks.py [render] [lod] [profiles] [watchlist] [sessions] [export] [cache] [client] [context] [pipeline] [engine] [history] [backtest] [prefilter] [scheduler] [feed] [logger] [metrics] [parser] ...
+"""
+
+import sys
+import time
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+
+def make_synthetic_bars(count=None, freq='1min', start='2025-08-04 04:00', seed=7, days=None):
+    """
+    Build a random-walk OHLCV frame shaped like fetch_bitx_data output.
+
+    Args:
+        count (int): Number of consecutive bars (ignored when days is given)
+        freq (str): Bar spacing
+        start (str): First bar time (America/New_York)
+        seed (int): Random seed
+        days (int, optional): Build this many weekday sessions of 1-minute
+                              bars from 04:00 to 20:00 instead
+
+    Returns:
+        pandas.DataFrame: Bars with OHLCV, EMA5, SMA8 and Date columns
+    """
+    rng = np.random.default_rng(seed)
+    if days is None:
+        index = pd.date_range(start, periods=count, freq=freq, tz='America/New_York', name='Datetime')
+    else:
+        sessions = pd.bdate_range(pd.Timestamp(start).normalize(), periods=days)
+        minutes = pd.timedelta_range('4h', periods=16 * 60, freq='1min')
+        index = pd.DatetimeIndex((sessions.values[:, None] + minutes.values[None, :]).ravel(),
+                                 name='Datetime').tz_localize('America/New_York')
+        count = len(index)
+    close = 58.0 + np.cumsum(rng.normal(0, 0.03, count))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.02, count))
+    bars = pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) + spread,
+        'Low': np.minimum(open_, close) - spread,
+        'Close': close,
+        'Volume': rng.integers(1000, 50000, count),
+    }, index=index)
+    bars['EMA5'] = bars['Close'].ewm(span=5).mean()
+    bars['SMA8'] = bars['Close'].rolling(window=8).mean()
+    bars['Date'] = bars.index.date
+    return bars
+
+
+def _time(func, repeat=3):
+    """Best wall time of func() in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_render(counts=(500, 5000, 50000), legacy_limit=5000):
+    """
+    Compare per-candle drawing with the vectorized collection renderer.
+
+    Times building the artists plus one Agg draw of the canvas.
+    """
+    from make_chart import draw_candlestick, draw_candles
+
+    def render(bars, vectorized):
+        fig, ax = plt.subplots(figsize=(20, 12))
+        if vectorized:
+            draw_candles(ax, bars['Open'], bars['High'], bars['Low'], bars['Close'])
+        else:
+            for i, (o, h, l, c) in enumerate(bars[['Open', 'High', 'Low', 'Close']].itertuples(index=False)):
+                draw_candlestick(ax, i, o, h, l, c)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    print(f"{'candles':>8} {'per-candle (s)':>15} {'vectorized (s)':>15} {'speedup':>8}")
+    for count in counts:
+        bars = make_synthetic_bars(count)
+        fast = _time(lambda: render(bars, True))
+        if count <= legacy_limit:
+            slow = _time(lambda: render(bars, False), repeat=1)
+            print(f"{count:>8} {slow:>15.3f} {fast:>15.3f} {slow / fast:>7.1f}x")
+        else:
+            print(f"{count:>8} {'skipped':>15} {fast:>15.3f} {'':>8}")
+
+
+def bench_lod(day_counts=(2, 30, 90)):
+    """
+    Chart render cost and fidelity as the window grows.
+
+    Level-of-detail aggregation keeps the candle count (and so the draw
+    cost) flat from 2 to 90 days of 1-minute bars. Every aggregated
+    candle keeps the true high and low of its bars; iloc[::5] decimation
+    misses most of them.
+    """
+    import tempfile
+    from make_chart import CandlestickChart, downsample_bars, bucket_label
+
+    print(f"{'days':>5} {'bars':>7} {'candles':>8} {'width':>8} {'aggregate':>10} {'render':>8} "
+          f"{'[::5] candles':>14} {'[::5] highs missed':>19}")
+    with tempfile.TemporaryDirectory() as directory:
+        for days in day_counts:
+            bars = make_synthetic_bars(days=days)
+            chart = CandlestickChart('LOD')
+            chart.render(bars, directory, persist=False)
+            render = _time(lambda: chart.render(bars, directory, persist=False))
+            aggregate = _time(lambda: downsample_bars(bars, chart.max_candles()))
+            sampled = downsample_bars(bars, chart.max_candles())
+
+            # Per aggregated candle: the true high, and the highest bar [::5] would have kept
+            decimated = bars.iloc[::5]
+            buckets = np.searchsorted(sampled.index.asi8, bars.index.asi8, side='right') - 1
+            high = pd.Series(bars['High'].to_numpy())
+            true_high = high.groupby(buckets).max().to_numpy()
+            seen_high = high.where(bars.index.isin(decimated.index)).groupby(buckets).max().to_numpy()
+            missed = np.mean(~(seen_high >= true_high))
+            assert np.array_equal(sampled['High'].to_numpy(), true_high)
+            print(f"{days:>5} {len(bars):>7,} {len(sampled):>8} {bucket_label(sampled.attrs['bucket_seconds']):>8} "
+                  f"{aggregate * 1000:>8.1f}ms {render * 1000:>6.0f}ms {len(decimated):>14,} {missed:>18.0%}")
+
+
+def bench_profiles(count=1500):
+    """
+    Encode time and size per render profile, against the old 300 DPI savefig.
+    """
+    import io
+    from make_chart import CandlestickChart, RENDER_PROFILES
+
+    chart = CandlestickChart()
+    chart.update(make_synthetic_bars(count))
+
+    def legacy():
+        buffer = io.BytesIO()
+        chart.figure.savefig(buffer, format='png', dpi=300, bbox_inches='tight', facecolor='white')
+        return buffer.getvalue()
+
+    start = time.perf_counter()
+    legacy_bytes = legacy()
+    legacy_time = time.perf_counter() - start
+
+    print(f"{'profile':>10} {'format':>6} {'pixels':>11} {'bytes':>10} {'encode (s)':>11}")
+    print(f"{'savefig':>10} {'png':>6} {'300 dpi':>11} {len(legacy_bytes):>10,} {legacy_time:>11.3f}")
+    for names in (('thumbnail', 'model'), tuple(RENDER_PROFILES)):
+        start = time.perf_counter()
+        images = chart.render_images(names)
+        total = time.perf_counter() - start
+        for name, image in images.items():
+            pixels = f"{image['width']}x{image['height']}"
+            print(f"{name:>10} {image['format']:>6} {pixels:>11} {len(image['data']):>10,} {image['encode_seconds']:>11.3f}")
+        print(f"{'one pass':>10} {'':>6} {'':>11} {'':>10} {total:>11.3f}  ({', '.join(names)})")
+
+
+def bench_watchlist(max_symbols=8, count=1950, processes=None):
+    """
+    Watchlist chart rendering from 1 to max_symbols symbols.
+
+    Renders the same synthetic 5-day frames in-process (one after the
+    other, as generate_bitx_chart per symbol would) and on a ChartPool
+    whose workers were warmed beforehand, so pool start-up is reported
+    separately.
+    """
+    import os
+    import tempfile
+    from batch_charts import ChartPool
+    from make_chart import CandlestickChart
+
+    processes = processes or os.cpu_count()
+    symbols = [f"SYM{i}" for i in range(max_symbols)]
+    frames = {symbol: make_synthetic_bars(count, freq='5min', seed=i) for i, symbol in enumerate(symbols)}
+    sizes = sorted({1, max_symbols} | {n for n in (2, 4, 8, 16, 32) if n < max_symbols})
+
+    with tempfile.TemporaryDirectory() as directory, ChartPool(processes) as pool:
+        start = time.perf_counter()
+        pool.render({symbols[0]: frames[symbols[0]]}, directory)
+        print(f"{processes} worker processes, start-up and first chart {time.perf_counter() - start:.2f}s")
+        pool.render(frames, directory)    # every worker has drawn each symbol once
+
+        print(f"{'symbols':>7} {'in-process':>11} {'pool':>8} {'speedup':>8} {'per chart':>10}")
+        for n in sizes:
+            batch = {symbol: frames[symbol] for symbol in symbols[:n]}
+            charts = [CandlestickChart(symbol) for symbol in batch]
+            serial = _time(lambda: [chart.render(batch[chart.symbol], os.path.join(directory, chart.symbol))
+                                    for chart in charts], repeat=1)
+            pooled = _time(lambda: pool.render(batch, directory), repeat=1)
+            failed = [symbol for symbol, result in pool.render(batch, directory).items() if not result['ok']]
+            print(f"{n:>7} {serial:>10.2f}s {pooled:>7.2f}s {serial / pooled:>7.1f}x {pooled / n * 1000:>8.0f} ms"
+                  + (f"  failed: {failed}" if failed else ""))
+
+
+def _legacy_daily_stats(stock_data):
+    """get_daily_stats before the session table (one mask per day)."""
+    daily_stats = {}
+    for date in stock_data['Date'].unique():
+        day_data = stock_data[stock_data['Date'] == date]
+        daily_stats[str(date)] = {
+            'high': float(day_data['High'].max()),
+            'low': float(day_data['Low'].min()),
+            'open': float(day_data['Open'].iloc[0]),
+            'close': float(day_data['Close'].iloc[-1]),
+            'volume': int(day_data['Volume'].sum()),
+            'candles': len(day_data)
+        }
+    return daily_stats
+
+
+def _legacy_box_positions(stock_data, sampled_data):
+    """draw_daily_boxes position lookup before the session table."""
+    boxes = []
+    for date in stock_data['Date'].unique():
+        day_data = stock_data[stock_data['Date'] == date]
+        day_sampled = sampled_data[sampled_data['Date'] == date]
+        if len(day_sampled) > 0:
+            x_start_pos = list(sampled_data.index).index(day_sampled.index[0])
+            x_end_pos = list(sampled_data.index).index(day_sampled.index[-1])
+            boxes.append((x_start_pos, x_end_pos, day_data['High'].max(), day_data['Low'].min()))
+    return boxes
+
+
+def bench_sessions(day_counts=(2, 30, 250)):
+    """
+    Daily stats + box overlay inputs: per-day masking vs one session table.
+    """
+    from make_chart import get_session_table, get_daily_stats, day_runs
+
+    def fast(bars, sampled):
+        sessions = get_session_table(bars)
+        get_daily_stats(bars, sessions)
+        day_runs(sampled['Date'].to_numpy())
+
+    def slow(bars, sampled):
+        _legacy_daily_stats(bars)
+        _legacy_box_positions(bars, sampled)
+
+    print(f"{'days':>5} {'bars':>8} {'per-day masks (s)':>18} {'session table (s)':>18} {'speedup':>8}")
+    for days in day_counts:
+        bars = make_synthetic_bars(days=days)
+        sampled = bars.iloc[::5]
+        assert get_daily_stats(bars) == _legacy_daily_stats(bars)
+        fast_time = _time(lambda: fast(bars, sampled))
+        slow_time = _time(lambda: slow(bars, sampled), repeat=1)
+        print(f"{days:>5} {len(bars):>8} {slow_time:>18.4f} {fast_time:>18.4f} {slow_time / fast_time:>7.0f}x")
+
+
+def bench_export(counts=(600, 28800, 240000)):
+    """
+    Bytes written and wall time: iterrows + indent=2 JSON vs columnar export.
+
+    The columnar numbers are a full first export and the per-refresh delta
+    (one revised bar plus one new bar).
+    """
+    import json
+    import os
+    import tempfile
+    from columnar_store import ColumnarExport, load_columnar
+    from make_chart import bars_to_records
+
+    def legacy_json(bars, path):
+        export_data = []
+        for idx, row in bars.iterrows():
+            export_data.append({
+                'datetime': idx.isoformat(),
+                'open': float(row['Open']),
+                'high': float(row['High']),
+                'low': float(row['Low']),
+                'close': float(row['Close']),
+                'volume': int(row['Volume']),
+                'ema5': float(row['EMA5']) if pd.notna(row['EMA5']) else None,
+                'sma8': float(row['SMA8']) if pd.notna(row['SMA8']) else None,
+                'date': str(row['Date'])
+            })
+        with open(path, 'w') as f:
+            json.dump({'data': export_data}, f, indent=2)
+
+    def compact_json(bars, path):
+        with open(path, 'w') as f:
+            json.dump({'data': bars_to_records(bars)}, f, separators=(',', ':'))
+
+    print(f"{'bars':>7} {'method':>18} {'bytes':>12} {'time (s)':>9}")
+    for count in counts:
+        bars = make_synthetic_bars(count)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'data.json')
+            start = time.perf_counter()
+            legacy_json(bars, path)
+            print(f"{count:>7} {'json indent=2':>18} {os.path.getsize(path):>12,} {time.perf_counter() - start:>9.3f}")
+
+            start = time.perf_counter()
+            compact_json(bars, path)
+            print(f"{count:>7} {'json rows compact':>18} {os.path.getsize(path):>12,} {time.perf_counter() - start:>9.3f}")
+
+            export = ColumnarExport(os.path.join(tmp, 'bars'), 'SYN')
+            start = time.perf_counter()
+            full = export.append(bars.iloc[:-1])
+            print(f"{count:>7} {'columnar full':>18} {full['bytes']:>12,} {time.perf_counter() - start:>9.4f}")
+            start = time.perf_counter()
+            delta = export.append(bars.iloc[1:])
+            print(f"{count:>7} {'columnar delta':>18} {delta['bytes']:>12,} {time.perf_counter() - start:>9.4f}")
+
+            start = time.perf_counter()
+            columns = load_columnar(os.path.join(tmp, 'bars'))
+            float(columns['close'][-1])
+            print(f"{count:>7} {'columnar mmap open':>18} {'':>12} {time.perf_counter() - start:>9.4f}")
+
+
+def bench_cache(trials=10, count=600, jump=0.015):
+    """
+    Perceptual cache matching against a moved last bar.
+
+    Renders a chart, then the same bars with the last close lifted by
+    jump. The dHash distance between the two is often within the match
+    threshold, so with perceptual matching enabled the cache must still
+    miss (the last bar differs). A chart whose new bar repeats the
+    previous one's OHLC is the quiet case that may hit.
+    """
+    import tempfile
+    from analysis_cache import AnalysisCache, bars_fingerprint, hamming_distance
+    from make_chart import CandlestickChart
+
+    cache = AnalysisCache()
+    assert cache.max_image_distance is None, "perceptual matching should be off by default"
+    cache = AnalysisCache(max_image_distance=2)
+
+    distances, quiet_hits = [], 0
+    with tempfile.TemporaryDirectory() as directory:
+        chart = CandlestickChart('CACHE')
+        for trial in range(trials):
+            bars = make_synthetic_bars(count, freq='5min', seed=trial)
+            moved = bars.copy()
+            moved.iloc[-1, moved.columns.get_loc('Close')] *= 1 + jump
+            moved.iloc[-1, moved.columns.get_loc('High')] = max(moved['High'].iat[-1], moved['Close'].iat[-1])
+            quiet = pd.concat([bars, bars.iloc[[-1]]])
+            quiet.index = pd.date_range(bars.index[0], periods=len(quiet), freq='5min', name='Datetime')
+            quiet['Date'] = quiet.index.date
+
+            base = chart.render(bars, directory, persist=False)
+            cache.clear()
+            cache.put(base['data_hash'], 'prompt', {'recommendation': 'BUY'},
+                      image_hash=base['image_hash'], last_bar=base['last_bar'])
+
+            moved_info = chart.render(moved, directory, persist=False)
+            distances.append(hamming_distance(base['image_hash'], moved_info['image_hash']))
+            assert bars_fingerprint(moved) != base['data_hash']
+            assert cache.get(moved_info['data_hash'], 'prompt', moved_info['image_hash'],
+                             moved_info['last_bar']) is None, f"trial {trial}: moved last bar hit the cache"
+
+            quiet_info = chart.render(quiet, directory, persist=False)
+            if cache.get(quiet_info['data_hash'], 'prompt', quiet_info['image_hash'], quiet_info['last_bar']):
+                quiet_hits += 1
+
+    close = sum(1 for distance in distances if distance <= cache.max_image_distance)
+    print(f"last close +{jump:.1%}: dHash distance {min(distances)}-{max(distances)} bits, "
+          f"{close}/{trials} within the match threshold, 0/{trials} cache hits")
+    print(f"repeated last bar: {quiet_hits}/{trials} perceptual hits")
+
+
+def bench_client(calls=20, latency=0.0):
+    """
+    Cold vs warm analyzer calls against the local stub server.
+
+    Cold builds a new client per call (the old analyze_image behaviour),
+    warm reuses one pooled ImageAnalyzer. Over plain HTTP this measures
+    client construction and TCP setup; against the real API, TLS adds more.
+    """
+    from ai_analyzer import ImageAnalyzer
+    from stub_openai_server import start_stub_server
+
+    server, base_url = start_stub_server(latency=latency)
+    image = b'\x89PNG' + bytes(30000)
+
+    def timed_calls(make_analyzer, reuse):
+        analyzer = make_analyzer() if reuse else None
+        times = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            current = analyzer or make_analyzer()
+            current.analyze(image, 'png')
+            if not reuse:
+                current.close()
+            times.append(time.perf_counter() - start)
+        if analyzer:
+            analyzer.close()
+        return np.array(times) * 1000
+
+    make = lambda: ImageAnalyzer(api_key='stub', base_url=base_url)
+    try:
+        for label, reuse in (('cold (client per call)', False), ('warm (shared client)', True)):
+            before = server.stats['connections']
+            times = timed_calls(make, reuse)
+            connections = server.stats['connections'] - before
+            print(f"{label:>24}: first {times[0]:6.1f} ms, median {np.median(times):6.1f} ms, "
+                  f"p95 {np.percentile(times, 95):6.1f} ms, {connections} connections for {calls} calls")
+    finally:
+        server.shutdown()
+
+
+def bench_context(count=960, repeats=3):
+    """
+    Request size, latency and estimated cost per analyzer context mode.
+
+    Runs against the local stub server, so latency only reflects request
+    size; set BENCH_LIVE_API=1 to send the same requests to the real API
+    (uses $OPENAIKEY and costs money) and get reported token usage.
+    """
+    import os
+    import tempfile
+    from ai_analyzer import ImageAnalyzer, compare_context_modes
+    from analysis_parser import RESPONSE_FORMAT
+    from bar_context import build_bar_context, DEFAULT_CONTEXT_BARS
+    from make_chart import CandlestickChart, get_session_table
+    from stub_openai_server import start_stub_server
+
+    bars = make_synthetic_bars(count, freq='5min')
+    sessions = get_session_table(bars)
+    build_time = _time(lambda: build_bar_context(bars, sessions, 'BITX'), repeat=20)
+    print(f"build_bar_context: {build_time * 1000:.2f} ms for the last {DEFAULT_CONTEXT_BARS} of {count} bars")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        chart_info = CandlestickChart().render(bars, output_dir=output_dir, persist=False)
+
+    live = os.getenv('BENCH_LIVE_API') == '1'
+    server = None
+    if live:
+        analyzer = ImageAnalyzer()
+    else:
+        server, base_url = start_stub_server(reply=PARSER_SAMPLES['json'])
+        analyzer = ImageAnalyzer(api_key='stub', base_url=base_url)
+    try:
+        results = compare_context_modes(chart_info, repeats=repeats, analyzer=analyzer,
+                                        response_format=RESPONSE_FORMAT if live else None)
+    finally:
+        analyzer.close()
+        if server:
+            server.shutdown()
+
+    print(f"{'mode':>8} {'request bytes':>14} {'est tokens':>11} {'api tokens':>11} {'latency (ms)':>13} {'est cost':>10}")
+    for row in results:
+        print(f"{row['mode']:>8} {row['request_bytes']:>14,} {row['est_prompt_tokens']:>11,} "
+              f"{row['prompt_tokens']:>11,} {row['latency_ms']:>13.1f} {'$%.5f' % row['est_cost_usd']:>10}")
+
+
+def bench_pipeline(cycles=5, period=2.0, latency=1.5):
+    """
+    Serial cycle loop vs the staged pipeline, against the stub server.
+
+    Serial mirrors the old run_analysis_loop: fetch, render and analyze,
+    then wait a full period. The pipeline starts a cycle on every
+    wall-clock tick while earlier ones are still being analyzed.
+    """
+    import os
+    import tempfile
+    from bar_store import BarStore, LocalProvider
+    from stub_openai_server import start_stub_server
+
+    server, base_url = start_stub_server(reply=PARSER_SAMPLES['json'], latency=latency)
+    os.environ['OPENAI_BASE_URL'], os.environ['OPENAIKEY'] = base_url, 'stub'
+    from ai_analyzer import analyze_image_sync
+    from analysis_cache import get_analysis_cache
+    from make_chart import fetch_bitx_data, get_chart
+    from pipeline import AnalysisPipeline
+    from scheduler import next_boundary
+
+    # Bars up to now; each cycle reveals one more, like a live feed
+    now = pd.Timestamp.now(tz='America/New_York').floor('1min')
+    bars = make_synthetic_bars(600 + 2 * cycles, start=str((now - pd.Timedelta(minutes=599 + 2 * cycles)).tz_localize(None)))
+    ohlcv = bars[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+    def run(label, symbol, body):
+        with tempfile.TemporaryDirectory() as directory:
+            provider = LocalProvider(ohlcv.iloc[:600])
+            store = BarStore(os.path.join(directory, 'bars.sqlite'))
+            starts, latencies = body(symbol, store, provider, directory)
+        gaps = np.diff(starts)
+        print(f"{label:>10}: cycle start every {gaps.mean():.2f}s (target {period:.2f}s), "
+              f"tick to result {np.mean(latencies):.2f}s, {len(latencies)}/{cycles} results")
+
+    def serial(symbol, store, provider, directory):
+        starts, latencies = [], []
+        for k in range(cycles):
+            provider.bars = ohlcv.iloc[:600 + k]
+            start = time.time()
+            starts.append(start)
+            stock_data = fetch_bitx_data(symbol, store=store, provider=provider)
+            chart_info = get_chart(symbol).render(stock_data, directory, persist=False)
+            image = chart_info['images']['model']
+            analyze_image_sync(image['data'], image['format'], deadline=30)
+            latencies.append(time.time() - start)
+            time.sleep(period)
+        return starts, latencies
+
+    def pipelined(symbol, store, provider, directory):
+        get_analysis_cache().clear()
+        starts, latencies, done = [], [], []
+        pipeline = AnalysisPipeline(symbol, listener=lambda event, cycle: event == 'result' and done.append(cycle),
+                                    store=store, provider=provider, output_dir=directory, persist=False)
+        pipeline.configure('system', 'user')
+        pipeline.start()
+        for k in range(cycles):
+            due = next_boundary(period=period, offset=0)
+            time.sleep(due - time.time())
+            provider.bars = ohlcv.iloc[:600 + k]
+            starts.append(pipeline.submit('tick')['requested_at'])
+        deadline = time.time() + latency + 10
+        while len(done) < cycles and time.time() < deadline:
+            time.sleep(0.05)
+        pipeline.stop()
+        latencies = [cycle['latency'] for cycle in done]
+        return starts, latencies
+
+    try:
+        run('serial', 'SERIAL', serial)
+        run('pipelined', 'PIPE', pipelined)
+    finally:
+        server.shutdown()
+
+
+def bench_engine(repeats=3):
+    """
+    Headless start-up and one full cycle through TradingEngine.
+
+    Times a fresh interpreter importing the engine against one importing
+    the Tk app (which also loads tkinter, PIL.ImageTk and pyttsx3), then
+    runs run_once() on local bars against the stub server.
+    """
+    import os
+    import subprocess
+    import tempfile
+    from bar_store import BarStore, LocalProvider
+    from history_store import HistoryStore
+    from stub_openai_server import start_stub_server
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in ('engine', 'trading_app'):
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, '-c', f'import {module}'], cwd=here, capture_output=True, text=True)
+            if result.returncode != 0:
+                break
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if best is None:
+            print(f"import {module:<12} n/a ({result.stderr.strip().splitlines()[-1]})")
+        else:
+            print(f"import {module:<12} {best * 1000:7.0f} ms")
+
+    server, base_url = start_stub_server(reply=PARSER_SAMPLES['json'], latency=0.2)
+    os.environ['OPENAI_BASE_URL'], os.environ['OPENAIKEY'] = base_url, 'stub'
+    from analysis_cache import get_analysis_cache
+    from engine import TradingEngine, cycle_record
+
+    now = pd.Timestamp.now(tz='America/New_York').floor('1min')
+    bars = make_synthetic_bars(600, start=str((now - pd.Timedelta(minutes=599)).tz_localize(None)))
+    get_analysis_cache().clear()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = TradingEngine('HEADLESS', auto=False, output_dir=directory, persist=False,
+                                   store=BarStore(os.path.join(directory, 'bars.sqlite')),
+                                   history=HistoryStore(os.path.join(directory, 'history.sqlite')),
+                                   provider=LocalProvider(bars[['Open', 'High', 'Low', 'Close', 'Volume']]))
+            start = time.perf_counter()
+            event, cycle = engine.run_once(timeout=30)
+            elapsed = time.perf_counter() - start
+            engine.close()
+        record = cycle_record(event, cycle)
+        print(f"run_once: {event} in {elapsed:.2f}s -> {record['analysis']['recommendation']} "
+              f"({', '.join(f'{stage} {seconds:.2f}s' for stage, seconds in record['timings'].items())})")
+    finally:
+        server.shutdown()
+
+
+def bench_history(rows=100000, files=2000, symbols=('BITX', 'MSTR', 'COIN', 'IBIT')):
+    """
+    History store inserts and range queries against scanning per-call files.
+
+    Fills a store with a year of results across a few symbols, then times
+    one-day and one-symbol queries (and shows the index SQLite picks);
+    the file side writes analysis_*.json files like the old save_analysis
+    and times a glob + parse of them, and the one-off import.
+    """
+    import os
+    import glob
+    import json
+    import sqlite3
+    import tempfile
+    from datetime import datetime, timedelta
+    from history_store import HistoryStore
+
+    reply = json.loads(PARSER_SAMPLES['json'])
+    analysis = {key.lower(): value for key, value in reply.items()}
+    start = datetime(2025, 1, 2, 9, 30)
+    step = timedelta(days=365) / rows
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, 'history.sqlite'))
+        records = [{'requested_at': start + step * i, 'symbol': symbols[i % len(symbols)], 'cycle': i,
+                    'event': 'result', 'analysis': analysis, 'prompt_hash': 'p' * 16, 'latency': 3.2,
+                    'timings': {'fetch': 0.2, 'render': 0.4, 'analyze': 2.6}} for i in range(rows)]
+        begin = time.perf_counter()
+        for offset in range(0, rows, 1000):
+            store.extend(records[offset:offset + 1000])
+        elapsed = time.perf_counter() - begin
+        print(f"insert {rows:,} rows (batches of 1000): {elapsed:.2f}s, {elapsed / rows * 1e6:.1f} µs/row, "
+              f"{os.path.getsize(store.db_path) / 1e6:.1f} MB")
+        single = _time(lambda: store.append(records[0]), repeat=20)
+        print(f"append one row: {single * 1000:.2f} ms")
+
+        day = start + timedelta(days=180)
+        cases = {
+            'one day, all symbols': dict(start=day, end=day + timedelta(days=1)),
+            'one day, BITX': dict(start=day, end=day + timedelta(days=1), symbol='BITX'),
+            'last 50 BITX': dict(symbol='BITX', limit=50, newest_first=True),
+        }
+        for label, filters in cases.items():
+            found = len(store.query(**filters))
+            print(f"query {label:<22} {found:>5} rows in {_time(lambda: store.query(**filters), repeat=5) * 1000:7.2f} ms")
+        with sqlite3.connect(store.db_path) as conn:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM analyses WHERE symbol = ? AND ts >= ? AND ts < ?",
+                                ('BITX', day.timestamp(), (day + timedelta(days=1)).timestamp())).fetchall()
+        print(f"plan: {plan[0][-1]}")
+
+        file_dir = os.path.join(directory, 'files')
+        os.makedirs(file_dir)
+        for i in range(files):
+            stamp = (start + timedelta(minutes=i)).strftime("%Y%m%d_%H%M%S")
+            with open(os.path.join(file_dir, f"analysis_{stamp}.json"), 'w') as f:
+                json.dump({'image_path': 'data/chart.png', 'timestamp': stamp, 'analysis': PARSER_SAMPLES['lines']}, f)
+
+        def scan():
+            hits = []
+            for path in glob.glob(os.path.join(file_dir, 'analysis_*.json')):
+                with open(path) as f:
+                    data = json.load(f)
+                if data['timestamp'].startswith(start.strftime("%Y%m%d")):
+                    hits.append(data)
+            return hits
+
+        print(f"scan {files:,} per-call files for one day: {_time(scan, repeat=3) * 1000:.1f} ms")
+        imported = HistoryStore(os.path.join(directory, 'imported.sqlite'))
+        begin = time.perf_counter()
+        summary = imported.import_files(file_dir)
+        print(f"import {files:,} files: {time.perf_counter() - begin:.2f}s {summary}; "
+              f"again: {imported.import_files(file_dir)['imported']} new")
+
+
+def bench_backtest(days=252, processes=None):
+    """
+    Vectorized backtest speed on a year of 1-minute bars, and a sweep.
+
+    A per-bar Python loop over the same signals confirms the vectorized
+    trades are identical and shows the speed difference; then
+    DEFAULT_GRID runs in-process and on a pool.
+    """
+    import os
+    from backtest import run_backtest, sweep, session_layout, DEFAULT_PARAMS, DEFAULT_GRID
+
+    def loop_backtest(bars, take_profit, stop_loss, max_hold, **_):
+        # Reference: visit every bar, one open position at most
+        open_, high, low, close = (bars[c].to_numpy(dtype=float) for c in ('Open', 'High', 'Low', 'Close'))
+        fast = bars['Close'].ewm(span=5).mean().to_numpy()
+        slow = bars['Close'].rolling(window=8).mean().to_numpy()
+        session, last_idx, _ = session_layout(bars)
+        trades, last_exit = [], -1
+        for i in range(1, len(bars)):
+            crossed = fast[i] > slow[i] and not fast[i - 1] > slow[i - 1] and session[i] == session[i - 1]
+            if not crossed or i >= last_idx[i] or i + 1 <= last_exit:
+                continue
+            start = i + 1
+            entry = open_[start]
+            limit = min(start + max_hold - 1, last_idx[start])
+            for j in range(start, limit + 1):
+                if low[j] <= entry - stop_loss:
+                    exit_price = min(entry - stop_loss, open_[j])
+                    break
+                if high[j] >= entry + take_profit:
+                    exit_price = max(entry + take_profit, open_[j])
+                    break
+            else:
+                j, exit_price = limit, close[limit]
+            trades.append(exit_price - entry)
+            last_exit = j
+        return trades
+
+    bars = make_synthetic_bars(days=days)
+    print(f"{len(bars):,} bars ({days} sessions of 1-minute bars)")
+
+    vectorized = run_backtest(bars)
+    loop_start = time.perf_counter()
+    reference = loop_backtest(bars, **DEFAULT_PARAMS)
+    loop_seconds = time.perf_counter() - loop_start
+    trades = vectorized['trades']
+    same = (len(reference) == len(trades)
+            and np.allclose(reference, trades['pnl'].to_numpy()))
+    print(f"default params: {len(trades)} trades, per-bar loop agrees: {same} "
+          f"(loop {loop_seconds * 1000:.0f} ms vs vectorized {_time(lambda: run_backtest(bars)) * 1000:.0f} ms)")
+
+    for strategy, extra in (('crossover', {}), ('crossover', {'pivot_filter': True}), ('pivot', {})):
+        elapsed = _time(lambda: run_backtest(bars, strategy=strategy, **extra))
+        stats = run_backtest(bars, return_trades=False, strategy=strategy, **extra)['stats']
+        label = strategy + (' + pivot filter' if extra else '')
+        print(f"{label:<26} {elapsed * 1000:6.0f} ms  {stats['trades']:>6} trades, "
+              f"win {stats['win_rate']:.0%}, pnl {stats['total_pnl']:+.2f}/share")
+
+    combos = int(np.prod([len(values) for values in DEFAULT_GRID.values()]))
+    start = time.perf_counter()
+    sweep(bars, processes=1)
+    serial = time.perf_counter() - start
+    processes = processes or os.cpu_count()
+    start = time.perf_counter()
+    results = sweep(bars, processes=processes)
+    pooled = time.perf_counter() - start
+    print(f"sweep {combos} combinations: {serial:.1f}s in-process, {pooled:.1f}s on {processes} processes")
+    best = results.iloc[0]
+    print(f"best: fast {int(best['fast'])} slow {int(best['slow'])} tp {best['take_profit']:.2f} sl {best['stop_loss']:.2f} "
+          f"-> {int(best['trades'])} trades, pnl {best['total_pnl']:+.2f}/share")
+
+
+def bench_prefilter(days=10, model_seconds=3.0):
+    """
+    Signal pre-filter cost per bar and the share of cycles it gates.
+
+    Replays every bar after the first session as if it were the newest
+    one, classifies it, and estimates the model time saved at each gate
+    level from an assumed per-call latency.
+    """
+    from signal_filter import SignalFilter, LEVELS
+    from metrics import percentile
+
+    bars = make_synthetic_bars(days=days)
+    first = int(np.argmax(bars['Date'].to_numpy() != bars['Date'].iat[0]))
+    prefilter = SignalFilter()
+    signals = [prefilter.classify(bars.iloc[:end]) for end in range(first + 1, len(bars) + 1)]
+    # The first bar of each session recomputes the pivots; the rest use the cached ones
+    seconds = sorted(signal['seconds'] for signal in signals)
+    print(f"{len(signals):,} bars classified: p50 {percentile(seconds, 50) * 1e6:.0f} µs, "
+          f"p99 {percentile(seconds, 99) * 1e6:.0f} µs, max {seconds[-1] * 1e6:.0f} µs")
+
+    counts = {level: sum(1 for signal in signals if signal['level'] == level) for level in LEVELS}
+    print("levels: " + ", ".join(f"{level} {count} ({count / len(signals):.0%})" for level, count in counts.items()))
+    for min_level in LEVELS[1:]:
+        prefilter.configure(min_level=min_level)
+        gated = sum(1 for signal in signals if not prefilter.admits(signal))
+        print(f"gate at {min_level:<9}: {gated / len(signals):.0%} of cycles skip the model, "
+              f"~{gated * model_seconds / 3600:.1f} h of model time saved at {model_seconds:g}s per call")
+
+
+def bench_scheduler(seconds=3.0, period=0.5):
+    """
+    Scheduler thread wakeups per minute, against the old 1-second polling loop.
+
+    The old run_analysis_loop slept in 1s steps whether or not anything
+    was due; TickScheduler only wakes for due ticks and state changes.
+    """
+    import threading
+    from scheduler import TickScheduler
+
+    def legacy_wakeups():
+        stop, wakeups = threading.Event(), [0]
+
+        def loop():
+            while not stop.is_set():
+                time.sleep(1)           # the old countdown / idle step
+                wakeups[0] += 1
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        time.sleep(seconds)
+        stop.set()
+        thread.join()
+        return wakeups[0]
+
+    def scheduler_wakeups(running, auto, tick_period=60):
+        scheduler = TickScheduler(lambda: None, period=tick_period, offset=0, auto=auto)
+        if running:
+            scheduler.start()
+        time.sleep(0.05)
+        baseline = dict(scheduler.stats)    # steady state only, not the start() wakeup
+        time.sleep(seconds)
+        stats = {key: scheduler.stats[key] - baseline[key] for key in ('wakeups', 'ticks')}
+        stats['max_lateness'] = scheduler.stats['max_lateness']
+        scheduler.close()
+        return stats['wakeups'], stats
+
+    per_minute = 60 / seconds
+    print(f"{'legacy loop':>26}: {legacy_wakeups() * per_minute:6.1f} wakeups/min")
+    for label, running, auto in (('stopped', False, False), ('running, auto off', True, False)):
+        wakeups, _ = scheduler_wakeups(running, auto)
+        print(f"{label:>26}: {wakeups * per_minute:6.1f} wakeups/min")
+
+    wakeups, stats = scheduler_wakeups(True, True, tick_period=period)
+    print(f"{f'running, {period}s ticks':>26}: {wakeups} wakeups for {stats['ticks']} ticks, "
+          f"max lateness {stats['max_lateness'] * 1000:.1f} ms")
+
+
+def bench_feed(hours=8, cadence_seconds=60, max_entries=400):
+    """
+    Soak test of the trading feed model over a full session.
+
+    Each cycle adds what the GUI adds: the cycle banner and progress lines,
+    a chart entry, the analysis block and five countdown lines. Reports
+    append cost per hour (it should stay flat), what stays in memory and
+    on disk, and how long a history page takes to load.
+    """
+    import os
+    import tempfile
+    from trading_feed import FeedModel, FeedHistory
+
+    cycles_per_hour = 3600 // cadence_seconds
+    analysis = ("\n[12:00:00] 🤖 AI ANALYSIS COMPLETE\n               🎯 SIGNAL: WAIT\n"
+                "               ⚡ RISK: MEDIUM\n               💭 Chop under SMA8.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        feed = FeedModel(max_entries, FeedHistory(os.path.join(directory, 'feed.jsonl')))
+        print(f"{'hour':>5} {'entries':>9} {'in widget':>10} {'lines':>7} {'µs/entry':>9} {'history':>10}")
+        for hour in range(1, hours + 1):
+            start, added = time.perf_counter(), 0
+            for cycle in range(cycles_per_hour):
+                batch = ["\n[12:00:00] 🔄 STARTING BITX ANALYSIS CYCLE",
+                         "[12:00:00] 📊 Generating fresh candlestick chart...",
+                         "\n[12:00:01] 📊 NEW CHART GENERATED", "               Size: 33,112 bytes"]
+                feed.extend([line + "\n" for line in batch])
+                feed.append("\n               📈 LIVE CHART:\n[chart]\n               Chart Size: 500x300\n",
+                            kind='chart', width=500, height=300)
+                feed.extend([line + "\n" for line in ("[12:00:01] 🤖 Running AI analysis...", analysis)]
+                            + [f"⏰ Next analysis in {i} seconds...\n" for i in (50, 40, 30, 20, 10)])
+                added += len(batch) + 1 + 2 + 5
+            per_entry = (time.perf_counter() - start) / added
+            lines = sum(entry['lines'] for entry in feed.entries)
+            size = os.path.getsize(feed.history.path)
+            print(f"{hour:>5} {feed.total:>9,} {len(feed.entries):>10} {lines:>7} "
+                  f"{per_entry * 1e6:>9.1f} {size / 1e6:>8.2f}MB")
+
+        for label, position in (('oldest', 0), ('middle', feed.total // 2), ('newest', feed.total - 100)):
+            elapsed = _time(lambda: feed.page(position, 100), repeat=20)
+            print(f"history page ({label}, 100 entries): {elapsed * 1000:.2f} ms")
+        feed.close()
+
+
+def bench_logger(records=20000):
+    """
+    Cost of a debug log call on the caller's thread.
+
+    Compares the old per-line open/append/close to the buffered JSONL
+    logger, then checks how records were coalesced into writes and that
+    size-based rotation keeps the configured number of files.
+    """
+    import os
+    import tempfile
+    from debug_logger import DebugLogger
+
+    timings = {'stage': 'render', 'seconds': 0.0123}
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_path = os.path.join(directory, 'debug.txt')
+
+        def legacy(i):
+            with open(legacy_path, 'a', encoding='utf-8') as f:
+                f.write(f"[12:00:00] stage finished {i}\n")
+
+        logger = DebugLogger(os.path.join(directory, 'debug.jsonl'))
+        for name, call in (('open/append per line', legacy),
+                           ('DebugLogger.log', lambda i: logger.log("stage finished", 'debug', cycle=i, **timings))):
+            samples = []
+            for i in range(records):
+                start = time.perf_counter()
+                call(i)
+                samples.append(time.perf_counter() - start)
+            samples.sort()
+            print(f"{name:<22} p50 {samples[len(samples) // 2] * 1e6:7.2f} µs   "
+                  f"p99 {samples[int(len(samples) * 0.99)] * 1e6:7.2f} µs   "
+                  f"mean {sum(samples) / len(samples) * 1e6:7.2f} µs")
+        logger.close()
+        print(f"records/write: {logger.stats['records'] / max(1, logger.stats['writes']):.0f} "
+              f"({logger.stats['writes']} writes, {logger.stats['bytes'] / 1e6:.2f} MB)")
+
+        rotating = DebugLogger(os.path.join(directory, 'rotating.jsonl'), max_bytes=200_000, backups=3,
+                               flush_interval=0.05)
+        for i in range(records):
+            rotating.log("stage finished", 'debug', cycle=i, **timings)
+            if i % 1000 == 0:
+                rotating.flush()
+        rotating.close()
+        files = sorted(name for name in os.listdir(directory) if name.startswith('rotating'))
+        print(f"rotation (200 KB, 3 backups): {rotating.stats['rotations']} rotations, files kept: {', '.join(files)}")
+
+
+def bench_metrics(cycles=20, calls=100000):
+    """
+    Span overhead and a per-stage breakdown of real chart renders.
+
+    Reports what observe() and span() cost per call, then renders cycles
+    charts of two sessions of 1-minute bars into a temp dir and prints the
+    resulting snapshot in Prometheus text format.
+    """
+    import io
+    import contextlib
+    import tempfile
+    from metrics import Metrics, get_metrics
+    from make_chart import CandlestickChart
+
+    scratch = Metrics()
+    start = time.perf_counter()
+    for _ in range(calls):
+        scratch.observe('bench', 0.001)
+    print(f"observe(): {(time.perf_counter() - start) / calls * 1e6:.2f} µs/call")
+    start = time.perf_counter()
+    for _ in range(calls):
+        with scratch.span('bench'):
+            pass
+    print(f"span():    {(time.perf_counter() - start) / calls * 1e6:.2f} µs/call")
+    for name in range(15):
+        for _ in range(scratch.window):
+            scratch.observe(f"span{name}", 0.001)
+    print(f"snapshot() of 16 full windows: {_time(scratch.snapshot, repeat=5) * 1000:.2f} ms")
+
+    metrics = get_metrics()
+    metrics.reset()
+    bars = make_synthetic_bars(days=2)
+    chart = CandlestickChart('BENCH')
+    with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+        for cycle in range(cycles):
+            with metrics.span('stage.render'):
+                chart.render(bars.iloc[:len(bars) - cycles + cycle + 1], directory)
+            metrics.sample_memory()
+    print(metrics.to_prometheus())
+
+
+PARSER_SAMPLES = {
+    'json': '{"RECOMMENDATION": "BUY", "RISK_LEVEL": "LOW", "ENTRY_PRICE": 58.42, "STOP_LOSS": 58.30, '
+            '"TAKE_PROFIT": 58.70, "CONFIDENCE": 7, "REASONING": "EMA5 crossed above SMA8 at the pivot."}',
+    'fenced': 'Here is my analysis:\n```json\n{"recommendation": "WAIT", "risk_level": "HIGH", '
+              '"entry_price": null, "stop_loss": null, "take_profit": null, "confidence": 4, '
+              '"reasoning": "Chop under SMA8."}\n```',
+    'lines': '1. **RECOMMENDATION**: BUY\n2. RISK_LEVEL: Medium\n3. ENTRY_PRICE: $58.42\n'
+             '4. STOP_LOSS: $58.30\n5. TAKE_PROFIT: $58.70\n6. CONFIDENCE: 7/10\n'
+             '7. REASONING: Bounce off the daily pivot.',
+}
+
+
+def bench_parser(iterations=20000):
+    """Per-call parse time for each response layout."""
+    from analysis_parser import parse_analysis
+
+    for name, text in PARSER_SAMPLES.items():
+        parse_analysis(text)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse_analysis(text)
+        per_call = (time.perf_counter() - start) / iterations
+        print(f"{name:>8}: {per_call * 1e6:7.1f} µs per parse")
+
+
+BENCHMARKS = {
+    'render': bench_render,
+    'lod': bench_lod,
+    'profiles': bench_profiles,
+    'watchlist': bench_watchlist,
+    'sessions': bench_sessions,
+    'export': bench_export,
+    'cache': bench_cache,
+    'client': bench_client,
+    'context': bench_context,
+    'pipeline': bench_pipeline,
+    'engine': bench_engine,
+    'history': bench_history,
+    'backtest': bench_backtest,
+    'prefilter': bench_prefilter,
+    'scheduler': bench_scheduler,
+    'feed': bench_feed,
+    'logger': bench_logger,
+    'metrics': bench_metrics,
+    'parser': bench_parser,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(f"\n⏱️ {name}")
+        BENCHMARKS[name]()
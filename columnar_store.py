@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Columnar Bar Export
+===================
+Stores exported chart bars as one raw binary file per field plus a small
+meta.json. Each export only writes bars newer than the last exported one
+(and rewrites that last bar, which may have been revised). Readers can
+memory-map the columns instead of parsing JSON.
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Output field -> (source column, dtype)
+COLUMNS = {
+    'ts': (None, '<i8'),          # UTC epoch nanoseconds
+    'open': ('Open', '<f8'),
+    'high': ('High', '<f8'),
+    'low': ('Low', '<f8'),
+    'close': ('Close', '<f8'),
+    'volume': ('Volume', '<i8'),
+    'ema5': ('EMA5', '<f8'),      # NaN where not yet defined
+    'sma8': ('SMA8', '<f8'),
+}
+
+
+def _epoch_ns(index):
+    """Convert a DatetimeIndex to int64 UTC epoch nanoseconds."""
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    return ((index - pd.Timestamp('1970-01-01', tz='UTC')) // pd.Timedelta('1ns')).to_numpy(dtype='int64')
+
+
+class ColumnarExport:
+    """Append-only columnar bar files in one directory."""
+
+    def __init__(self, directory, symbol=None):
+        self.directory = directory
+        self.symbol = symbol
+        self.meta_path = os.path.join(directory, 'meta.json')
+
+    def _column_path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def read_meta(self):
+        """Get the export metadata, or an empty one if nothing was exported yet."""
+        try:
+            with open(self.meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'symbol': self.symbol, 'rows': 0, 'last_ts': None,
+                    'columns': {name: dtype for name, (_, dtype) in COLUMNS.items()}}
+
+    def append(self, stock_data):
+        """
+        Export the bars that are new since the last call.
+
+        Args:
+            stock_data (DataFrame): Stock data from fetch_bitx_data
+
+        Returns:
+            dict: {'rows': total rows stored, 'written': rows written this call,
+                   'bytes': bytes written this call}
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        meta = self.read_meta()
+        ts = _epoch_ns(stock_data.index)
+        rows, last_ts = meta['rows'], meta['last_ts']
+
+        if rows and last_ts is not None and ts[0] > last_ts:
+            # Only newer bars
+            start_row, first = rows, 0
+        elif rows and last_ts is not None and ts[0] <= last_ts and ts[-1] >= last_ts \
+                and ts[np.searchsorted(ts, last_ts)] == last_ts:
+            # Rewrite the last stored bar (it may have been revised) and append the rest
+            start_row, first = rows - 1, int(np.searchsorted(ts, last_ts))
+        else:
+            # Nothing stored or no overlap with what is stored: start over
+            start_row, first = 0, 0
+
+        new = stock_data.iloc[first:]
+        written = 0
+        for name, (source, dtype) in COLUMNS.items():
+            values = ts[first:] if source is None else new[source].to_numpy()
+            if dtype == '<i8' and source is not None:
+                values = np.nan_to_num(values.astype(float)).astype(dtype)
+            data = np.ascontiguousarray(values, dtype=dtype).tobytes()
+
+            path = self._column_path(name)
+            mode = 'r+b' if os.path.exists(path) and start_row else 'wb'
+            with open(path, mode) as f:
+                f.seek(start_row * np.dtype(dtype).itemsize)
+                f.write(data)
+                f.truncate()
+            written += len(data)
+
+        meta.update({'symbol': self.symbol or meta.get('symbol'),
+                     'rows': start_row + len(new),
+                     'last_ts': int(ts[-1])})
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+        return {'rows': meta['rows'], 'written': len(new), 'bytes': written}
+
+
+def load_columnar(directory, mmap=True):
+    """
+    Open exported bar columns.
+
+    Args:
+        directory (str): Directory written by ColumnarExport
+        mmap (bool): Memory-map the files (lazy) instead of reading them
+
+    Returns:
+        dict: Field name -> NumPy array
+    """
+    meta = ColumnarExport(directory).read_meta()
+    columns = {}
+    for name, dtype in meta['columns'].items():
+        path = os.path.join(directory, f"{name}.bin")
+        if meta['rows'] == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        elif mmap:
+            columns[name] = np.memmap(path, dtype=dtype, mode='r', shape=(meta['rows'],))
+        else:
+            columns[name] = np.fromfile(path, dtype=dtype, count=meta['rows'])
+    return columns
+
+
+def columnar_to_frame(columns, tz='America/New_York'):
+    """
+    Build a DataFrame like fetch_bitx_data output from loaded columns.
+
+    Args:
+        columns (dict): Result of load_columnar
+        tz (str): Timezone for the Datetime index
+
+    Returns:
+        pandas.DataFrame: Bars indexed by Datetime
+    """
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(columns['ts']), unit='ns', utc=True),
+                             name='Datetime').tz_convert(tz)
+    return pd.DataFrame({source: np.asarray(columns[name]) for name, (source, _) in COLUMNS.items()
+                         if source is not None}, index=index)
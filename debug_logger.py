@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Debug Logger
+============
+Buffered JSONL debug log. log() only appends a record to an in-memory
+queue; a background thread serializes and writes records in batches and
+rotates the file by size and age.
+
+Each record is one JSON object per line with 'ts', 'level', 'msg',
+'thread' and any extra fields (e.g. 'cycle' and 'timings').
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+
+DEFAULT_LOG_PATH = 'debug.jsonl'
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024     # rotate when the file grows past this
+DEFAULT_MAX_AGE_SECONDS = 24 * 3600     # ... or when it is older than this
+DEFAULT_BACKUPS = 5                      # debug.jsonl.1 .. debug.jsonl.5
+DEFAULT_FLUSH_INTERVAL = 0.5            # seconds between writes
+DEFAULT_BATCH_SIZE = 256                 # write early once this many records are waiting
+
+_ROTATE = object()                       # queued by rotate(), so earlier records stay in the old file
+
+
+class DebugLogger:
+    """Asynchronous, batched JSONL log writer with rotation."""
+
+    def __init__(self, path=DEFAULT_LOG_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age_seconds=DEFAULT_MAX_AGE_SECONDS, backups=DEFAULT_BACKUPS,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Args:
+            path (str): Log file
+            max_bytes (int): Size that triggers a rotation
+            max_age_seconds (float): File age that triggers a rotation
+            backups (int): Rotated files to keep
+            flush_interval (float): Longest a record waits before being written
+            batch_size (int): Waiting records that trigger an early write
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.stats = {'records': 0, 'writes': 0, 'bytes': 0, 'rotations': 0, 'errors': 0}
+
+        self._records = deque()      # append/popleft are atomic
+        self._wakeup = threading.Event()
+        self._flushed = threading.Condition()
+        self._closed = False
+        self._file = None
+        self._opened_at = None
+        self._thread = threading.Thread(target=self._run, name='debug-logger', daemon=True)
+        self._thread.start()
+
+    def log(self, msg, level='info', **fields):
+        """
+        Queue a record (cheap; safe from any thread).
+
+        Args:
+            msg (str): Message text
+            level (str): 'debug', 'info', 'warning' or 'error'
+            **fields: Extra JSON-serializable fields (cycle, stage, timings, ...)
+        """
+        record = {'ts': time.time(), 'level': level, 'msg': msg,
+                  'thread': threading.current_thread().name}
+        if fields:
+            record.update(fields)
+        self._records.append(record)
+        if len(self._records) >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self, timeout=5.0):
+        """Block until everything logged so far is on disk."""
+        target = self.stats['records'] + sum(record is not _ROTATE for record in list(self._records))
+        with self._flushed:
+            self._wakeup.set()
+            self._flushed.wait_for(lambda: self.stats['records'] >= target or self._closed, timeout)
+
+    def rotate(self):
+        """Start a new file after the records logged so far (e.g. when the user clears the log)."""
+        self._records.append(_ROTATE)
+        self._wakeup.set()
+
+    def close(self):
+        """Write what is queued and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            closing = self._closed
+            self._write_batch()
+            with self._flushed:
+                self._flushed.notify_all()
+            if closing:
+                while self._records:
+                    self._write_batch()
+                if self._file is not None:
+                    self._file.close()
+                return
+
+    def _write_batch(self):
+        lines = []
+        for _ in range(len(self._records)):     # only what is waiting now; later records go in the next batch
+            record = self._records.popleft()
+            if record is _ROTATE:
+                self._write(lines, rotate=True)
+                lines = []
+                continue
+            record['ts'] = datetime.fromtimestamp(record['ts']).isoformat(timespec='milliseconds')
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+        if lines:
+            self._write(lines)
+
+    def _write(self, lines, rotate=False):
+        data = ("\n".join(lines) + "\n").encode('utf-8') if lines else b""
+        try:
+            self._open()
+            if data and self._should_rotate(len(data)):
+                self._rotate()
+            if data:
+                self._file.write(data)
+                self._file.flush()
+                self.stats['writes'] += 1
+                self.stats['bytes'] += len(data)
+            if rotate:
+                self._rotate()
+        except OSError as e:
+            self.stats['errors'] += 1
+            print(f"❌ Failed to write to {self.path}: {str(e)}")
+        self.stats['records'] += len(lines)
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'ab')
+            self._opened_at = (os.path.getmtime(self.path) if self._file.tell() else time.time())
+
+    def _should_rotate(self, incoming):
+        size = self._file.tell()
+        if size and size + incoming > self.max_bytes:
+            return True
+        return size > 0 and time.time() - self._opened_at > self.max_age_seconds
+
+    def _rotate(self):
+        self._file.close()
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0 and os.path.getsize(self.path):
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'ab')
+        self._opened_at = time.time()
+        self.stats['rotations'] += 1
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    """Get the shared debug logger (flushed at interpreter exit)."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            _logger = DebugLogger()
+            atexit.register(_logger.close)
+        return _logger
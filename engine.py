@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Trading Engine
+==============
+Headless fetch -> chart -> analyze loop: an AnalysisPipeline driven by a
+TickScheduler. The Tk app is a thin client over this engine; the CLI
+below runs it on a server without Tk, PIL.ImageTk or pyttsx3.
+
+Usage:
+    python engine.py --symbol BITX --once
+    python engine.py --symbol BITX --interval 1m --period 60 --loop --output data/results.jsonl
+    python engine.py --symbol BITX --loop --prefilter watch --pivot-distance 0.05
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from ai_analyzer import CONTEXT_MODES, DEFAULT_CONTEXT_MODE
+from history_store import get_history_store
+from pipeline import AnalysisPipeline
+from scheduler import TickScheduler
+from signal_filter import SignalFilter, LEVELS, DEFAULT_THRESHOLDS, DEFAULT_MIN_LEVEL
+
+# Longest an AI request may take, so one slow call cannot eat the 60s refresh budget
+ANALYSIS_DEADLINE_SECONDS = 45
+
+# Cycles start at each minute close, however long the previous one took
+CYCLE_PERIOD_SECONDS = 60
+
+DEFAULT_SYSTEM_PROMPT = """You are a professional day trader with 20+ years of experience specializing in quick scalping trades. 
+
+Your expertise includes:
+- Identifying optimal entry/exit points for 0.10-0.50 cent moves
+- EMA/SMA crossover strategies (5 EMA, 8 SMA)
+- Daily pivot point analysis
+- Risk assessment for short-term trades
+- Stop loss and take profit targeting
+
+Analyze the provided 1-minute BITX candlestick chart and provide:
+1. RECOMMENDATION: "BUY" or "WAIT" 
+2. RISK_LEVEL: "LOW", "MEDIUM", or "HIGH"
+3. ENTRY_PRICE: Optimal entry point
+4. STOP_LOSS: Maximum acceptable loss price
+5. TAKE_PROFIT: Target profit-taking price
+6. CONFIDENCE: Your confidence level (1-10)
+7. REASONING: Brief explanation of your analysis
+
+Focus on EMA5/SMA8 crossovers and daily pivot levels for scalping opportunities.
+Remember: We're trading to save animal lives - precision and safety are paramount."""
+
+DEFAULT_USER_PROMPT = """Analyze this BITX 1-minute chart for day trading opportunities.
+
+Current market conditions:
+- Look for EMA5/SMA8 crossover signals
+- Identify daily pivot point levels
+- Assess volume and momentum
+- Consider risk/reward ratio for quick scalp trades
+
+Provide clear BUY or WAIT recommendation with specific entry, stop loss, and take profit prices.
+Target profit: $0.10-$0.50 per share moves.
+
+This analysis will help fund animal rescue operations - accuracy is critical for saving lives."""
+
+FINAL_EVENTS = ('result', 'error', 'dropped')
+HISTORY_EVENTS = ('result', 'error')   # drops (and gated cycles) are routine and not worth a history row
+FINISHED_KEPT = 64                # finished cycle ids remembered for wait()
+
+
+def cycle_record(event, cycle):
+    """
+    JSON-serializable summary of a finished cycle.
+
+    Args:
+        event (str): Final pipeline event ('result', 'chart', 'error' or 'dropped')
+        cycle (dict): Cycle state from AnalysisPipeline
+
+    Returns:
+        dict: symbol, cycle id, bar time, timings, chart path, pre-filter
+              signal and the parsed analysis (or the error / drop reason)
+    """
+    chart_info = cycle.get('chart_info') or {}
+    model_image = chart_info.get('images', {}).get('model', {})
+    record = {
+        'event': event,
+        'cycle': cycle['id'],
+        'reason': cycle['reason'],
+        'symbol': cycle['symbol'],
+        'requested_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(cycle['requested_at'])),
+        'bar_time': cycle['bar_time'].isoformat() if cycle['bar_time'] is not None else None,
+        'context_mode': cycle['context_mode'],
+        'prompt_hash': cycle.get('prompt_hash'),
+        'chart_path': model_image.get('path'),
+        'data_hash': chart_info.get('data_hash'),
+        'image_hash': chart_info.get('image_hash'),
+        'current_price': chart_info.get('current_price'),
+        'timings': {stage: round(seconds, 4) for stage, seconds in cycle['timings'].items()},
+    }
+    if 'latency' in cycle:
+        record['latency'] = round(cycle['latency'], 3)
+    if 'signal' in cycle:
+        signal = cycle['signal']
+        record['signal'] = {'level': signal['level'], 'reasons': signal['reasons'], 'nearest': signal['nearest'],
+                            'spread': round(signal['spread'], 4)}
+        record['gated'] = cycle.get('gated', False)
+    if 'analysis' in cycle:
+        record['analysis'] = cycle['analysis']
+        record['from_cache'] = cycle.get('from_cache', False)
+    if cycle.get('response_text') is not None:
+        record['raw_text'] = cycle['response_text']
+    if 'error' in cycle:
+        record['error'] = {'stage': cycle['error']['stage'], 'message': cycle['error']['message']}
+    if 'dropped' in cycle:
+        record['dropped'] = cycle['dropped']
+    return record
+
+
+class TradingEngine:
+    """
+    Analysis pipeline plus bar-close scheduler for one symbol, without any GUI.
+
+    Listeners are called from worker threads as listener(event, cycle)
+    with the pipeline's events ('started', 'chart', 'result', 'dropped',
+    'error'); a GUI should hand them over to its own thread.
+    """
+
+    def __init__(self, symbol="BITX", interval='5m', days=2, period=CYCLE_PERIOD_SECONDS,
+                 deadline=ANALYSIS_DEADLINE_SECONDS, auto=True, listener=None, output_dir="data",
+                 persist=True, analyze=True, logger=None, store=None, provider=None, history=None,
+                 record_history=True, prefilter=None):
+        """
+        Args:
+            symbol (str): Stock symbol
+            interval (str): Bar interval fetched from the provider
+            days (int): Days of bars per chart
+            period (float): Seconds between scheduled cycles
+            deadline (float): Seconds before an AI request is abandoned
+            auto (bool): Scheduled cycles on (False: only submit()/run_once())
+            listener (callable, optional): listener(event, cycle)
+            output_dir (str): Directory for chart images and exported data
+            persist (bool): Write chart images to output_dir
+            analyze (bool): Run the AI stage (False publishes charts only)
+            logger (DebugLogger, optional): Structured per-stage log records
+            store (BarStore, optional): Bar store, defaults to data/bars.sqlite
+            provider (optional): Bar provider, defaults to Yahoo Finance
+            history (HistoryStore, optional): Where results are recorded, defaults to data/history.sqlite
+            record_history (bool): Record results and errors in the history store
+            prefilter (SignalFilter, optional): Gate for scheduled AI calls, defaults to
+                                                one that only admits 'candidate' bars
+        """
+        self.symbol = symbol
+        self.analyze = analyze
+        self.listeners = [listener] if listener is not None else []
+        self.history = (history or get_history_store()) if record_history else None
+        self.prefilter = prefilter or SignalFilter()
+        self.pipeline = AnalysisPipeline(symbol, interval, days, listener=self._on_event, store=store,
+                                         provider=provider, output_dir=output_dir, persist=persist,
+                                         deadline=deadline, analyze=analyze, logger=logger,
+                                         prefilter=self.prefilter)
+        self.pipeline.configure(DEFAULT_SYSTEM_PROMPT, DEFAULT_USER_PROMPT)
+        self.scheduler = TickScheduler(lambda: self.submit('tick'), period=period, auto=auto)
+
+        self._finished = OrderedDict()     # cycle id -> (event, cycle), newest last
+        self._condition = threading.Condition()
+        self.pipeline.start()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def configure(self, system_prompt=None, user_prompt=None, context_mode=None):
+        """Set prompts and context mode for cycles submitted from now on."""
+        self.pipeline.configure(system_prompt, user_prompt, context_mode)
+
+    @property
+    def next_due(self):
+        """Epoch seconds of the next scheduled cycle, None when not scheduled."""
+        return self.scheduler.next_due
+
+    @property
+    def period(self):
+        return self.scheduler.period
+
+    def start(self):
+        """Start scheduled cycles (at each bar close while auto is on)."""
+        self.scheduler.start()
+
+    def stop(self):
+        """Stop scheduled cycles and abandon work in progress."""
+        self.scheduler.stop()
+        self.cancel()
+
+    def set_auto(self, auto):
+        self.scheduler.set_auto(auto)
+
+    def submit(self, reason='manual'):
+        """Start one cycle now; returns the cycle dict (see AnalysisPipeline.submit)."""
+        return self.pipeline.submit(reason)
+
+    def cancel(self):
+        """Drop queued cycles and abort the in-flight AI request."""
+        self.pipeline.cancel()
+
+    def wait(self, cycle, timeout=None):
+        """
+        Wait until a cycle finishes.
+
+        Returns:
+            tuple: (final event, cycle), or (None, cycle) on timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: cycle['id'] in self._finished, timeout)
+            return self._finished.get(cycle['id'], (None, cycle))
+
+    def run_once(self, reason='once', timeout=None):
+        """Run one cycle and wait for it; returns (final event, cycle)."""
+        return self.wait(self.submit(reason), timeout)
+
+    def close(self):
+        """Stop the scheduler thread and the pipeline workers."""
+        self.scheduler.close()
+        self.pipeline.stop()
+
+    def _on_event(self, event, cycle):
+        if self.history is not None and event in HISTORY_EVENTS and not cycle.get('gated'):
+            try:
+                self.history.append(cycle_record(event, cycle))
+            except Exception as e:
+                print(f"❌ Failed to record cycle {cycle['id']} in history: {str(e)}")
+        final = event in FINAL_EVENTS or (event == 'chart' and not self.analyze)
+        if final:
+            with self._condition:
+                self._finished[cycle['id']] = (event, cycle)
+                while len(self._finished) > FINISHED_KEPT:
+                    self._finished.popitem(last=False)
+                self._condition.notify_all()
+        for listener in self.listeners:
+            listener(event, cycle)
+
+
+def main(argv=None):
+    """Command line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description="Headless chart + AI analysis loop (no GUI)")
+    parser.add_argument('--symbol', default='BITX', help="Stock symbol (default BITX)")
+    parser.add_argument('--interval', default='5m', help="Bar interval fetched from the provider (default 5m)")
+    parser.add_argument('--days', type=int, default=2, help="Days of bars per chart (default 2)")
+    parser.add_argument('--period', type=float, default=CYCLE_PERIOD_SECONDS,
+                        help=f"Seconds between cycles in --loop mode (default {CYCLE_PERIOD_SECONDS})")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--once', action='store_true', help="Run one cycle and exit (default)")
+    mode.add_argument('--loop', action='store_true', help="Run a cycle at every period boundary until interrupted")
+    parser.add_argument('--output', default='-', help="Append one JSON line per cycle to this file ('-' for stdout)")
+    parser.add_argument('--output-dir', default='data', help="Directory for chart images and exported data")
+    parser.add_argument('--context-mode', choices=CONTEXT_MODES, default=DEFAULT_CONTEXT_MODE,
+                        help="What the model is sent: chart image, bar text or both")
+    parser.add_argument('--system-prompt', help="File with the system prompt (default: built-in)")
+    parser.add_argument('--user-prompt', help="File with the user prompt (default: built-in)")
+    parser.add_argument('--deadline', type=float, default=ANALYSIS_DEADLINE_SECONDS,
+                        help=f"Seconds before an AI request is abandoned (default {ANALYSIS_DEADLINE_SECONDS})")
+    parser.add_argument('--no-analyze', action='store_true', help="Only fetch and render charts")
+    parser.add_argument('--no-history', action='store_true', help="Do not record results in data/history.sqlite")
+    parser.add_argument('--prefilter', choices=('off',) + LEVELS, default=DEFAULT_MIN_LEVEL,
+                        help=f"Lowest signal level a scheduled cycle sends to the model (default {DEFAULT_MIN_LEVEL})")
+    parser.add_argument('--cross-bars', type=int, default=DEFAULT_THRESHOLDS['cross_bars'],
+                        help="Bars back a crossover or pivot reclaim still counts as fresh")
+    parser.add_argument('--converge', type=float, default=DEFAULT_THRESHOLDS['converge'],
+                        help="Dollars between EMA5 and SMA8 counted as about to cross")
+    parser.add_argument('--pivot-distance', type=float, default=DEFAULT_THRESHOLDS['pivot_distance'],
+                        help="Dollars from a pivot level counted as at the level")
+    args = parser.parse_args(argv)
+
+    # Results go to the real stdout; progress prints from the chart code go to stderr
+    results = sys.stdout if args.output == '-' else open(args.output, 'a', encoding='utf-8')
+    failures = []
+    lock = threading.Lock()
+
+    def write(event, cycle):
+        if event not in FINAL_EVENTS and not (event == 'chart' and args.no_analyze):
+            return
+        if event == 'error':
+            failures.append(cycle['id'])
+        with lock:
+            results.write(json.dumps(cycle_record(event, cycle), default=str) + "\n")
+            results.flush()
+
+    prefilter = SignalFilter({'cross_bars': args.cross_bars, 'converge': args.converge,
+                              'pivot_distance': args.pivot_distance},
+                             min_level=None if args.prefilter == 'off' else args.prefilter)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        engine = TradingEngine(args.symbol, args.interval, args.days, period=args.period, deadline=args.deadline,
+                               auto=args.loop, listener=write, output_dir=args.output_dir,
+                               analyze=not args.no_analyze, record_history=not args.no_history,
+                               prefilter=prefilter)
+        prompts = {}
+        for key, path in (('system_prompt', args.system_prompt), ('user_prompt', args.user_prompt)):
+            if path:
+                with open(path, 'r', encoding='utf-8') as f:
+                    prompts[key] = f.read()
+        engine.configure(context_mode=args.context_mode, **prompts)
+
+        try:
+            if args.loop:
+                print(f"🔁 {args.symbol}: a cycle every {args.period:g}s, Ctrl+C to stop")
+                engine.start()
+                while True:
+                    time.sleep(3600)
+            else:
+                event, _ = engine.run_once(timeout=args.deadline + 120)
+                if event is None:
+                    print("❌ Cycle did not finish in time")
+                    failures.append(None)
+        except KeyboardInterrupt:
+            print("⏹️ Stopped")
+        finally:
+            engine.close()
+            if results is not sys.stdout:
+                results.close()
+    return 1 if failures and not args.loop else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
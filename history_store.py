@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Analysis History Store
+======================
+Append-only SQLite history of analysis results (the history.json
+requirement in PRD.md). Each row is one cycle: recommendation, levels,
+confidence, prompt hash, chart reference and stage latencies.
+
+The database runs in WAL mode, so the writer never blocks readers, and
+is indexed on time and on (symbol, time), so range and symbol queries
+are B-tree lookups instead of a directory scan. The old per-call
+data/analysis_<timestamp>.json files can be imported once.
+"""
+
+import os
+import glob
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from analysis_parser import parse_analysis, AnalysisParseError
+
+DEFAULT_HISTORY_PATH = os.path.join('data', 'history.sqlite')
+
+ANALYSIS_FIELDS = ('recommendation', 'risk_level', 'entry_price', 'stop_loss', 'take_profit',
+                   'confidence', 'reasoning')
+
+COLUMNS = ('id', 'ts', 'symbol', 'source', 'source_ref', 'cycle', 'event', 'context_mode', 'prompt_hash',
+           'chart_path', 'data_hash', 'image_hash', 'current_price') + ANALYSIS_FIELDS + (
+           'from_cache', 'latency', 'timings', 'error', 'raw_text')
+
+
+def _epoch(value):
+    """Epoch seconds from a datetime, an ISO string or a number."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def text_record(text, **fields):
+    """
+    History record for a raw model response.
+
+    The text is parsed into 'analysis' when it can be; the original is
+    kept in 'raw_text' either way.
+    """
+    record = dict(fields, raw_text=text)
+    try:
+        record['analysis'] = parse_analysis(text)
+    except AnalysisParseError:
+        pass
+    return record
+
+
+class HistoryStore:
+    """SQLite (WAL) store of analysis results, queried by time range and symbol."""
+
+    def __init__(self, db_path=DEFAULT_HISTORY_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    symbol TEXT,
+                    source TEXT NOT NULL,
+                    source_ref TEXT UNIQUE,
+                    cycle INTEGER,
+                    event TEXT,
+                    context_mode TEXT,
+                    prompt_hash TEXT,
+                    chart_path TEXT,
+                    data_hash TEXT,
+                    image_hash TEXT,
+                    current_price REAL,
+                    recommendation TEXT,
+                    risk_level TEXT,
+                    entry_price REAL,
+                    stop_loss REAL,
+                    take_profit REAL,
+                    confidence INTEGER,
+                    reasoning TEXT,
+                    from_cache INTEGER,
+                    latency REAL,
+                    timings TEXT,
+                    error TEXT,
+                    raw_text TEXT
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_ts ON analyses (ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS analyses_symbol_ts ON analyses (symbol, ts)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA synchronous=NORMAL")    # durable at checkpoints; enough for a history log
+        return conn
+
+    def append(self, record, source='pipeline', source_ref=None):
+        """
+        Add one result.
+
+        Args:
+            record (dict): engine.cycle_record() output (or the same keys):
+                           requested_at, symbol, cycle, analysis {...}, timings {...}, ...
+            source (str): Where the row came from ('pipeline', 'import', ...)
+            source_ref (str, optional): Unique reference (e.g. an imported file);
+                                        a row with the same reference is not added twice
+
+        Returns:
+            int: Row id, or None if source_ref was already stored
+        """
+        return self.extend([record], source, [source_ref])[0]
+
+    def extend(self, records, source='pipeline', source_refs=None):
+        """Add several results in one transaction; returns their row ids (None for duplicates)."""
+        source_refs = source_refs or [None] * len(records)
+        ids = []
+        with self._lock, self._connect() as conn:
+            for record, source_ref in zip(records, source_refs):
+                row = self._row(record, source, source_ref)
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO analyses ({', '.join(row)}) VALUES ({', '.join('?' * len(row))})",
+                    list(row.values()))
+                ids.append(cursor.lastrowid if cursor.rowcount else None)
+        return ids
+
+    @staticmethod
+    def _row(record, source, source_ref):
+        analysis = record.get('analysis') or {}
+        error = record.get('error') or record.get('dropped')
+        row = {
+            'ts': _epoch(record.get('requested_at') or record.get('ts')) or datetime.now().timestamp(),
+            'symbol': record.get('symbol'),
+            'source': source,
+            'source_ref': source_ref,
+            'cycle': record.get('cycle'),
+            'event': record.get('event'),
+            'context_mode': record.get('context_mode'),
+            'prompt_hash': record.get('prompt_hash'),
+            'chart_path': record.get('chart_path'),
+            'data_hash': record.get('data_hash'),
+            # dHash is an unsigned 64-bit int, too large for SQLite integers
+            'image_hash': (f"{record['image_hash']:016x}" if isinstance(record.get('image_hash'), int)
+                           else record.get('image_hash')),
+            'current_price': record.get('current_price'),
+            'from_cache': None if record.get('from_cache') is None else int(record['from_cache']),
+            'latency': record.get('latency'),
+            'timings': json.dumps(record['timings']) if record.get('timings') else None,
+            'error': json.dumps(error) if error else None,
+            'raw_text': record.get('raw_text'),
+        }
+        for field in ANALYSIS_FIELDS:
+            row[field] = analysis.get(field)
+        return row
+
+    def query(self, start=None, end=None, symbol=None, recommendation=None, limit=None, newest_first=False):
+        """
+        Results in a time range.
+
+        Args:
+            start (datetime|str|float, optional): From this time (inclusive)
+            end (datetime|str|float, optional): Before this time (exclusive)
+            symbol (str, optional): Only this symbol (uses the (symbol, ts) index)
+            recommendation (str, optional): Only 'BUY' or 'WAIT' rows
+            limit (int, optional): At most this many rows
+            newest_first (bool): Order by time descending
+
+        Returns:
+            list: Row dicts with 'time' (ISO) and 'timings'/'error' decoded
+        """
+        clauses, params = [], []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(_epoch(end))
+        if recommendation is not None:
+            clauses.append("recommendation = ?")
+            params.append(recommendation)
+        sql = f"SELECT {', '.join(COLUMNS)} FROM analyses"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts DESC, id DESC" if newest_first else " ORDER BY ts, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        results = []
+        for values in rows:
+            row = dict(zip(COLUMNS, values))
+            row['time'] = datetime.fromtimestamp(row['ts']).isoformat(timespec='seconds')
+            for key in ('timings', 'error'):
+                if row[key]:
+                    row[key] = json.loads(row[key])
+            if row['from_cache'] is not None:
+                row['from_cache'] = bool(row['from_cache'])
+            results.append(row)
+        return results
+
+    def count(self, symbol=None):
+        with self._connect() as conn:
+            if symbol is None:
+                return conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM analyses WHERE symbol = ?", (symbol,)).fetchone()[0]
+
+    def import_files(self, directory='data', pattern='analysis_*.json', symbol='BITX'):
+        """
+        Import the per-call files the old ai_analyzer.save_analysis wrote.
+
+        Free-text analyses are parsed where possible; the original text is
+        kept in raw_text either way. Files already imported are skipped.
+
+        Args:
+            directory (str): Where the files are
+            pattern (str): Glob for the files
+            symbol (str): Symbol to record (the files do not carry one)
+
+        Returns:
+            dict: {'files', 'imported', 'skipped', 'unparsed', 'failed'}
+        """
+        paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        records, refs = [], []
+        summary = {'files': len(paths), 'imported': 0, 'skipped': 0, 'unparsed': 0, 'failed': 0}
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                stamp = datetime.strptime(data['timestamp'], "%Y%m%d_%H%M%S")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"❌ Could not import {path}: {str(e)}")
+                summary['failed'] += 1
+                continue
+
+            text = data.get('analysis')
+            fields = {'requested_at': stamp, 'symbol': symbol, 'event': 'result', 'chart_path': data.get('image_path')}
+            if isinstance(text, dict):
+                record = dict(fields, analysis=text)
+            else:
+                record = text_record(text, **fields)
+                if 'analysis' not in record:
+                    summary['unparsed'] += 1
+            records.append(record)
+            refs.append(os.path.abspath(path))
+
+        ids = self.extend(records, 'import', refs)
+        summary['imported'] = sum(1 for row_id in ids if row_id is not None)
+        summary['skipped'] = len(ids) - summary['imported']
+        return summary
+
+    def export_json(self, path=os.path.join('data', 'history.json'), **filters):
+        """
+        Write rows to a history.json in the PRD layout ({"sessions": [...]}).
+
+        Args:
+            path (str): Output file
+            **filters: Passed to query()
+
+        Returns:
+            int: Rows written
+        """
+        sessions = []
+        for row in self.query(**filters):
+            session = {'timestamp': row['time'], 'symbol': row['symbol'], 'chart_path': row['chart_path'],
+                       'ai_response': row['raw_text']}
+            session.update({field: row[field] for field in ANALYSIS_FIELDS})
+            session.update({'prompt_hash': row['prompt_hash'], 'latency': row['latency'], 'timings': row['timings']})
+            sessions.append(session)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'sessions': sessions}, f, indent=2)
+        os.replace(tmp_path, path)
+        return len(sessions)
+
+
+_default_history = None
+_default_history_lock = threading.Lock()
+
+
+def get_history_store():
+    """Get the shared history store under data/."""
+    global _default_history
+    with _default_history_lock:
+        if _default_history is None:
+            _default_history = HistoryStore()
+        return _default_history
+
+
+if __name__ == "__main__":
+    # One-off import of the old per-call files, then a summary of what is stored
+    store = get_history_store()
+    summary = store.import_files()
+    print(f"📥 Imported {summary['imported']} of {summary['files']} analysis files "
+          f"({summary['skipped']} already stored, {summary['unparsed']} not parseable, {summary['failed']} failed)")
+    print(f"🗃️ {store.count()} results in {store.db_path}")
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Streaming Indicator Engine
+==========================
+Incremental technical indicators with O(1) state per indicator.
+Each indicator updates on every appended bar and also has a batch mode
+that reproduces the pandas calculation exactly for backfills.
+"""
+
+from collections import deque
+import math
+import pandas as pd
+
+
+class EMA:
+    """Exponential moving average, same as Series.ewm(span=span).mean()."""
+
+    def __init__(self, span, field='Close'):
+        self.span = span
+        self.field = field
+        self.alpha = 2.0 / (span + 1.0)
+        self._num = 0.0
+        self._den = 0.0
+
+    @property
+    def value(self):
+        return self._num / self._den if self._den else math.nan
+
+    def update(self, bar):
+        """Add one bar and return the new EMA value."""
+        x = float(bar[self.field])
+        if not math.isnan(x):
+            decay = 1.0 - self.alpha
+            self._num = x + decay * self._num
+            self._den = 1.0 + decay * self._den
+        return self.value
+
+    def batch(self, frame):
+        """Compute the EMA for a whole frame and leave the state at its last row."""
+        values = frame[self.field].ewm(span=self.span).mean()
+        count = int(frame[self.field].notna().sum())
+        decay = 1.0 - self.alpha
+        self._den = (1.0 - decay ** count) / self.alpha
+        self._num = float(values.iloc[-1]) * self._den if count else 0.0
+        return values
+
+    def get_state(self):
+        return (self._num, self._den)
+
+    def set_state(self, state):
+        self._num, self._den = state
+
+
+class SMA:
+    """Simple moving average, same as Series.rolling(window=window).mean()."""
+
+    def __init__(self, window, field='Close'):
+        self.window = window
+        self.field = field
+        self._buffer = deque(maxlen=window)
+
+    @property
+    def value(self):
+        if len(self._buffer) < self.window:
+            return math.nan
+        return sum(self._buffer) / self.window
+
+    def update(self, bar):
+        """Add one bar and return the new SMA value."""
+        self._buffer.append(float(bar[self.field]))
+        return self.value
+
+    def batch(self, frame):
+        """Compute the SMA for a whole frame and leave the state at its last row."""
+        values = frame[self.field].rolling(window=self.window).mean()
+        self._buffer = deque(frame[self.field].iloc[-self.window:].astype(float), maxlen=self.window)
+        return values
+
+    def get_state(self):
+        return tuple(self._buffer)
+
+    def set_state(self, state):
+        self._buffer = deque(state, maxlen=self.window)
+
+
+# Indicator kinds available to IndicatorEngine. An indicator class needs
+# update(bar), batch(frame), get_state() and set_state(state).
+INDICATOR_TYPES = {
+    'ema': EMA,
+    'sma': SMA,
+}
+
+# Output column -> (kind, parameter) used by the chart pipeline
+DEFAULT_INDICATORS = {
+    'EMA5': ('ema', 5),
+    'SMA8': ('sma', 8),
+}
+
+
+def register_indicator(kind, indicator_class):
+    """
+    Make a new indicator kind available to IndicatorEngine.
+
+    Args:
+        kind (str): Name used in indicator specs, e.g. 'vwap'
+        indicator_class: Class following the EMA/SMA incremental contract
+    """
+    INDICATOR_TYPES[kind] = indicator_class
+
+
+class IndicatorEngine:
+    """
+    Keeps a set of indicators in step with a growing bar series.
+
+    The newest bar may be revised by the next refresh (it can still be
+    forming), so the state from before it is kept and restored when the
+    same timestamp arrives again. Values always match pandas over the
+    frame passed in: when the first bar of the window moves, every value
+    depends on the new start, so the frame is recomputed in batch mode.
+    """
+
+    def __init__(self, specs=None):
+        """
+        Args:
+            specs (dict, optional): Column name -> (kind, parameter)
+        """
+        self.specs = dict(specs or DEFAULT_INDICATORS)
+        self.indicators = {name: INDICATOR_TYPES[kind](param)
+                           for name, (kind, param) in self.specs.items()}
+        self.last_timestamp = None
+        self._prev_state = None
+        self._values = None
+
+    def _get_states(self):
+        return {name: ind.get_state() for name, ind in self.indicators.items()}
+
+    def _set_states(self, states):
+        for name, state in states.items():
+            self.indicators[name].set_state(state)
+
+    def latest(self):
+        """
+        Get the current indicator values.
+
+        Returns:
+            dict: Column name -> latest value
+        """
+        return {name: ind.value for name, ind in self.indicators.items()}
+
+    def update(self, timestamp, bar):
+        """
+        Apply one bar.
+
+        Args:
+            timestamp: Bar time, must not be older than the last bar applied
+            bar (dict): Bar fields (Open, High, Low, Close, Volume)
+
+        Returns:
+            dict: Column name -> value after this bar
+        """
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"Bar at {timestamp} is older than last bar {self.last_timestamp}")
+
+        if timestamp == self.last_timestamp:
+            # Revised bar: rewind to the state before it
+            self._set_states(self._prev_state)
+        else:
+            self._prev_state = self._get_states()
+
+        self.last_timestamp = timestamp
+        return {name: ind.update(bar) for name, ind in self.indicators.items()}
+
+    def backfill(self, frame):
+        """
+        Compute all indicators over a frame in batch mode.
+
+        Args:
+            frame (DataFrame): OHLCV bars indexed by time
+
+        Returns:
+            pandas.DataFrame: Indicator columns aligned with frame
+        """
+        self.indicators = {name: INDICATOR_TYPES[kind](param)
+                           for name, (kind, param) in self.specs.items()}
+
+        # State from before the last bar, in case that bar is revised
+        if len(frame) > 1:
+            for ind in self.indicators.values():
+                ind.batch(frame.iloc[:-1])
+        self._prev_state = self._get_states()
+
+        values = pd.DataFrame(index=frame.index)
+        for name, ind in self.indicators.items():
+            values[name] = ind.batch(frame)
+        self.last_timestamp = frame.index[-1]
+        self._values = values
+        return values
+
+    def apply(self, frame):
+        """
+        Bring the indicators up to date with a refreshed frame.
+
+        Rows already seen reuse their stored values and only bars at or after
+        the last applied bar are updated. A frame that does not continue the
+        known series, or starts at a different bar (a sliding window dropped
+        its head), is backfilled in batch mode.
+
+        Args:
+            frame (DataFrame): OHLCV bars indexed by time
+
+        Returns:
+            pandas.DataFrame: Indicator columns aligned with frame
+        """
+        resume = self.last_timestamp
+        if (self._values is None or resume not in frame.index
+                or frame.index[0] != self._values.index[0]):
+            return self.backfill(frame)
+
+        pending = frame[frame.index >= resume]
+        rows = [self.update(ts, bar) for ts, bar in zip(pending.index, pending.to_dict('records'))]
+        new_values = pd.DataFrame(rows, index=pending.index, columns=list(self.indicators))
+
+        known = self._values[self._values.index < resume]
+        values = pd.concat([known, new_values]).reindex(frame.index)
+        self._values = values
+        return values
+
+
+_engines = {}
+
+
+def get_engine(symbol, interval):
+    """Get the shared indicator engine for a symbol and interval."""
+    key = (symbol, interval)
+    if key not in _engines:
+        _engines[key] = IndicatorEngine()
+    return _engines[key]
+
+
+def latest_indicator_values(stock_data):
+    """
+    Get the latest indicator values for a prepared frame.
+
+    Uses the values recorded by the engine in fetch_bitx_data and only
+    recomputes them when the frame was built some other way.
+
+    Args:
+        stock_data (DataFrame): Stock data from fetch_bitx_data
+
+    Returns:
+        dict: Column name -> latest value
+    """
+    latest = stock_data.attrs.get('indicators')
+    if latest is None:
+        engine = IndicatorEngine()
+        engine.backfill(stock_data)
+        latest = engine.latest()
+    return latest
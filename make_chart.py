@@ -2,83 +2,260 @@
 """
 BITX Candlestick Chart Generator
 ===============================
-Creates 1-minute candlestick chart for BITX over 2 days.
+Creates a candlestick chart for BITX (or any symbol) over the last few
+days of bars: 5-minute bars over 2 days by default, both configurable.
 Includes after-market data.
 """
 
-import yfinance as yf
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+from datetime import datetime
 import pandas as pd
+import numpy as np
 import os
+import io
 import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection, PolyCollection
+from bar_store import get_default_store, YFinanceProvider
+from indicators import get_engine, latest_indicator_values
+from columnar_store import ColumnarExport
+from analysis_cache import bars_fingerprint, image_dhash, last_bar_key
+from bar_context import build_bar_context
+from metrics import get_metrics
 
-def fetch_bitx_data(symbol="BITX", days=2):
+def fetch_bitx_data(symbol="BITX", days=2, interval='5m', store=None, provider=None):
     """
-    Fetch 1-minute BITX data for given days including after-market.
+    Fetch BITX bars at the given interval for the given days, including after-market.
+    
+    Bars are kept in a local bar store, so only bars newer than the last
+    stored one are downloaded on each call.
     
     Args:
         symbol (str): Stock symbol to fetch
         days (int): Number of days of data to fetch
+        interval (str): Bar interval passed to the provider
+        store (BarStore, optional): Bar cache, defaults to data/bars.sqlite
+        provider (optional): Bar provider, defaults to Yahoo Finance
         
     Returns:
-        pandas.DataFrame: 1-minute stock data with OHLCV and indicators
+        pandas.DataFrame: Stock data with OHLCV and indicators
+    """
+    stock_data = fetch_bars(symbol, days, interval, store, provider)
+    stock_data = add_indicators(stock_data, symbol, interval)
+    
+    print(f"✅ Retrieved {len(stock_data)} {interval} candles with indicators")
+    return stock_data
+
+def fetch_bars(symbol="BITX", days=2, interval='5m', store=None, provider=None):
+    """
+    Sync the bar store and return the raw OHLCV window (first half of fetch_bitx_data).
+    
+    Returns:
+        pandas.DataFrame: OHLCV bars indexed by Datetime
     """
-    print(f"📊 Fetching {days}-day 1-minute data for {symbol} (including after-market)...")
+    print(f"📊 Fetching {days}-day {interval} data for {symbol} (including after-market)...")
     
-    ticker = yf.Ticker(symbol)
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=days)
+    store = store or get_default_store()
+    provider = provider or YFinanceProvider()
     
-    stock_data = ticker.history(
-        start=start_date.strftime('%Y-%m-%d'),
-        end=end_date.strftime('%Y-%m-%d'),
-        interval='5m',
-        prepost=True  # Include after-market data
-    )
+    stock_data, received = store.sync(symbol, interval, days, provider, prepost=True)
+    print(f"📥 Received {received} new/updated bars from provider")
     
     if stock_data.empty:
         raise ValueError(f"No data available for {symbol}")
+    return stock_data
+
+def add_indicators(stock_data, symbol="BITX", interval='5m'):
+    """
+    Add EMA5/SMA8 and the Date column to fetch_bars output (second half of fetch_bitx_data).
     
-    # Add technical indicators
-    stock_data['EMA5'] = stock_data['Close'].ewm(span=5).mean()
-    stock_data['SMA8'] = stock_data['Close'].rolling(window=8).mean()
+    Returns:
+        pandas.DataFrame: Bars with indicators, Date and attrs['indicators']
+    """
+    # Add technical indicators (incremental: only new/revised bars are computed)
+    engine = get_engine(symbol, interval)
+    indicator_values = engine.apply(stock_data)
+    for column in indicator_values.columns:
+        stock_data[column] = indicator_values[column]
     
     # Add date column for daily calculations
     stock_data = stock_data.reset_index()
     stock_data['Date'] = stock_data['Datetime'].dt.date
     stock_data = stock_data.set_index('Datetime')
-    
-    print(f"✅ Retrieved {len(stock_data)} 1-minute candles with indicators")
+    stock_data.attrs['indicators'] = engine.latest()
     return stock_data
 
-def get_daily_stats(stock_data):
+def day_runs(dates):
+    """
+    Find the contiguous run of rows for each date in time-sorted data.
+    
+    Args:
+        dates (array-like): Date per row, sorted by time
+        
+    Returns:
+        tuple: (date per run, first row per run, last row per run)
+    """
+    dates = np.asarray(dates)
+    if len(dates) == 0:
+        return dates, np.array([], dtype=int), np.array([], dtype=int)
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    ends = np.r_[starts[1:] - 1, len(dates) - 1]
+    return dates[starts], starts, ends
+
+def get_session_table(stock_data):
+    """
+    Aggregate every trading session in one pass.
+    
+    Uses reduceat over the contiguous rows of each date instead of a
+    boolean mask over the whole frame per day.
+    
+    Args:
+        stock_data (DataFrame): Stock data with Date column
+        
+    Returns:
+        DataFrame: One row per date with open, high, low, close, volume,
+                   candles and the first/last row position of the session
+    """
+    dates, starts, ends = day_runs(stock_data['Date'].to_numpy())
+    if len(starts) == 0:
+        return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume', 'candles', 'first_row', 'last_row'])
+    
+    return pd.DataFrame({
+        'open': stock_data['Open'].to_numpy(dtype=float)[starts],
+        'high': np.maximum.reduceat(stock_data['High'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(stock_data['Low'].to_numpy(dtype=float), starts),
+        'close': stock_data['Close'].to_numpy(dtype=float)[ends],
+        'volume': np.add.reduceat(stock_data['Volume'].to_numpy(dtype='int64'), starts),
+        'candles': ends - starts + 1,
+        'first_row': starts,
+        'last_row': ends,
+    }, index=pd.Index(dates, name='Date'))
+
+# Level of detail: candle widths bars may be aggregated into (seconds), and
+# the figure width each candle gets at the model profile's DPI (axis, legend
+# and labels included: a 20 inch figure at 80 DPI shows up to 320 candles)
+LOD_BUCKETS = (60, 120, 180, 300, 600, 900, 1800, 3600, 7200, 14400, 86400)
+LOD_PIXELS_PER_CANDLE = 5
+LOD_TICK_LABELS = 8
+LOD_DAILY_BOXES = 10    # only the most recent sessions get a labelled box
+
+def _wall_clock_seconds(index):
+    """Local wall-clock time of each bar as integer seconds (any index resolution)."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return ((index - pd.Timestamp(0)) // pd.Timedelta('1s')).to_numpy(dtype='int64')
+
+def lod_bucket_seconds(index, max_candles):
+    """
+    Pick the candle width for a bar series.
+    
+    Args:
+        index (DatetimeIndex): Bar times
+        max_candles (int): Most candles the chart should draw
+        
+    Returns:
+        int: Smallest LOD_BUCKETS width (or the bar spacing itself, when
+             every bar fits) giving about max_candles candles or fewer
+    """
+    if len(index) < 2:
+        return LOD_BUCKETS[0]
+    bar_seconds = max(1, int(np.median(np.diff(_wall_clock_seconds(index)))))
+    if len(index) <= max_candles:
+        return bar_seconds
+    for width in LOD_BUCKETS:
+        if width >= bar_seconds and len(index) * bar_seconds / width <= max_candles:
+            return width
+    return LOD_BUCKETS[-1]
+
+def downsample_bars(stock_data, max_candles):
+    """
+    Aggregate bars into about max_candles candles without losing extremes.
+    
+    Buckets are aligned to the wall clock (10:00, 10:05, ...) and never
+    span two sessions. Each candle takes the first open, highest high,
+    lowest low, last close and summed volume of its bars; indicator
+    columns take their value at the bucket's last bar, so the lines pass
+    through the candle closes.
+    
+    Args:
+        stock_data (DataFrame): Stock data with Date column
+        max_candles (int): Most candles wanted
+        
+    Returns:
+        DataFrame: Same columns, indexed by each bucket's first bar time;
+                   attrs['bucket_seconds'] holds the candle width
+    """
+    width = lod_bucket_seconds(stock_data.index, max_candles)
+    if len(stock_data) <= max_candles:
+        sampled = stock_data.copy(deep=False)
+        sampled.attrs = dict(stock_data.attrs, bucket_seconds=width)
+        return sampled
+    
+    index = stock_data.index
+    bucket = _wall_clock_seconds(index) // width
+    dates = stock_data['Date'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, (bucket[1:] != bucket[:-1]) | (dates[1:] != dates[:-1])])
+    ends = np.r_[starts[1:] - 1, len(stock_data) - 1]
+    
+    columns = {
+        'Open': stock_data['Open'].to_numpy(dtype=float)[starts],
+        'High': np.maximum.reduceat(stock_data['High'].to_numpy(dtype=float), starts),
+        'Low': np.minimum.reduceat(stock_data['Low'].to_numpy(dtype=float), starts),
+        'Close': stock_data['Close'].to_numpy(dtype=float)[ends],
+        'Volume': np.add.reduceat(stock_data['Volume'].to_numpy(dtype='int64'), starts),
+    }
+    for column in stock_data.columns:
+        if column not in columns:
+            columns[column] = stock_data[column].to_numpy()[starts if column == 'Date' else ends]
+    sampled = pd.DataFrame(columns, index=index[starts])[list(stock_data.columns)]
+    sampled.attrs = dict(stock_data.attrs, bucket_seconds=width)
+    return sampled
+
+def bucket_label(seconds):
+    """Describe a candle width, e.g. '5-min' or '1-hour'."""
+    if seconds >= 86400:
+        return 'daily'
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{seconds // 3600}-hour"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}-min"
+    return f"{seconds}-sec"
+
+def get_daily_stats(stock_data, sessions=None):
     """
     Calculate daily high/low statistics.
     
     Args:
         stock_data (DataFrame): Stock data with Date column
+        sessions (DataFrame, optional): Precomputed get_session_table() result
         
     Returns:
         dict: Daily statistics
     """
-    daily_stats = {}
+    if sessions is None:
+        sessions = get_session_table(stock_data)
     
-    for date in stock_data['Date'].unique():
-        day_data = stock_data[stock_data['Date'] == date]
+    daily_stats = {}
+    for date, high, low, open_, close, volume, candles in zip(
+            sessions.index, sessions['high'], sessions['low'], sessions['open'],
+            sessions['close'], sessions['volume'], sessions['candles']):
         daily_stats[str(date)] = {
-            'high': float(day_data['High'].max()),
-            'low': float(day_data['Low'].min()),
-            'open': float(day_data['Open'].iloc[0]),
-            'close': float(day_data['Close'].iloc[-1]),
-            'volume': int(day_data['Volume'].sum()),
-            'candles': len(day_data)
+            'high': float(high),
+            'low': float(low),
+            'open': float(open_),
+            'close': float(close),
+            'volume': int(volume),
+            'candles': int(candles)
         }
     
     return daily_stats
 
-def draw_daily_boxes(ax, stock_data, sampled_data):
+def draw_daily_boxes(ax, stock_data, sampled_data, sessions=None, max_boxes=None):
     """
     Draw boxes around daily high/low ranges.
     
@@ -86,34 +263,43 @@ def draw_daily_boxes(ax, stock_data, sampled_data):
         ax: Matplotlib axis
         stock_data: Full stock data
         sampled_data: Sampled data for x-axis alignment
+        sessions (DataFrame, optional): Precomputed get_session_table() result
+        max_boxes (int, optional): Only box the most recent sessions
+        
+    Returns:
+        list: Artists added to the axis
     """
-    # Get daily ranges
-    for date in stock_data['Date'].unique():
-        day_data = stock_data[stock_data['Date'] == date]
-        day_high = day_data['High'].max()
-        day_low = day_data['Low'].min()
-        
-        # Find corresponding x positions in sampled data
-        day_sampled = sampled_data[sampled_data['Date'] == date]
-        if len(day_sampled) > 0:
-            x_start = day_sampled.index[0]
-            x_end = day_sampled.index[-1]
-            x_start_pos = list(sampled_data.index).index(x_start)
-            x_end_pos = list(sampled_data.index).index(x_end)
-            
-            # Draw box
-            width = x_end_pos - x_start_pos + 1
-            height = day_high - day_low
-            
-            rect = Rectangle((x_start_pos - 0.5, day_low), width, height,
-                           facecolor='none', edgecolor='blue', linewidth=2, alpha=0.7)
-            ax.add_patch(rect)
-            
-            # Add daily labels
-            ax.text(x_start_pos, day_high + (day_high - day_low) * 0.05, 
-                   f'{date}\nH: ${day_high:.2f}\nL: ${day_low:.2f}',
-                   fontsize=8, ha='left', va='bottom',
-                   bbox=dict(boxstyle="round,pad=0.2", facecolor="lightblue", alpha=0.8))
+    if sessions is None:
+        sessions = get_session_table(stock_data)
+    if max_boxes is not None:
+        sessions = sessions.iloc[-max_boxes:]
+    
+    artists = []
+    
+    # X positions of each day in the sampled data
+    sampled_dates, sampled_starts, sampled_ends = day_runs(sampled_data['Date'].to_numpy())
+    positions = dict(zip(sampled_dates, zip(sampled_starts, sampled_ends)))
+    
+    for date, day_high, day_low in zip(sessions.index, sessions['high'], sessions['low']):
+        if date not in positions:
+            continue
+        x_start_pos, x_end_pos = positions[date]
+        
+        # Draw box
+        width = x_end_pos - x_start_pos + 1
+        height = day_high - day_low
+        
+        rect = Rectangle((x_start_pos - 0.5, day_low), width, height,
+                       facecolor='none', edgecolor='blue', linewidth=2, alpha=0.7)
+        artists.append(ax.add_patch(rect))
+        
+        # Add daily labels
+        artists.append(ax.text(x_start_pos, day_high + (day_high - day_low) * 0.05, 
+               f'{date}\nH: ${day_high:.2f}\nL: ${day_low:.2f}',
+               fontsize=8, ha='left', va='bottom',
+               bbox=dict(boxstyle="round,pad=0.2", facecolor="lightblue", alpha=0.8)))
+    
+    return artists
 
 def draw_candlestick(ax, x, open_price, high_price, low_price, close_price, width=0.8):
     """
@@ -141,119 +327,418 @@ def draw_candlestick(ax, x, open_price, high_price, low_price, close_price, widt
     rect = Rectangle((x - width/2, body_bottom), width, body_height, 
                     facecolor=color, edgecolor='black', linewidth=0.5, alpha=0.8)
     ax.add_patch(rect)
+
+def draw_candles(ax, opens, highs, lows, closes, width=0.8, x=None):
     """
-    Draw a single candlestick.
+    Draw a whole series of candlesticks with two artists.
+    
+    All wicks go into one LineCollection and all bodies into one
+    PolyCollection, built from NumPy arrays instead of one line and one
+    patch per candle.
     
     Args:
         ax: Matplotlib axis
-        x: X position
-        open_price: Opening price
-        high_price: High price
-        low_price: Low price
-        close_price: Closing price
+        opens, highs, lows, closes: Array-likes of prices
         width: Candlestick width
+        x: X positions, defaults to 0..n-1
+        
+    Returns:
+        tuple: (wick LineCollection, body PolyCollection)
     """
-    # Determine color
-    color = 'green' if close_price >= open_price else 'red'
-    
-    # Draw high-low line
-    ax.plot([x, x], [low_price, high_price], color='black', linewidth=1)
+    opens = np.asarray(opens, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    closes = np.asarray(closes, dtype=float)
+    x = np.arange(len(opens), dtype=float) if x is None else np.asarray(x, dtype=float)
+    
+    wicks = LineCollection(candle_wick_segments(x, highs, lows),
+                           colors='black', linewidths=1, zorder=2)
+    bodies = PolyCollection(candle_body_verts(x, opens, closes, width),
+                            facecolors=candle_colors(opens, closes),
+                            edgecolors='black', linewidths=0.5, alpha=0.8, zorder=1)
+    ax.add_collection(bodies)
+    ax.add_collection(wicks)
+    ax.autoscale_view()
+    return wicks, bodies
+
+def candle_wick_segments(x, highs, lows):
+    """Build (n, 2, 2) high-low line segments."""
+    return np.stack([np.column_stack([x, lows]), np.column_stack([x, highs])], axis=1)
+
+def candle_body_verts(x, opens, closes, width=0.8):
+    """Build (n, 4, 2) body rectangles spanning open to close."""
+    bottom = np.minimum(opens, closes)
+    top = np.maximum(opens, closes)
+    left = x - width / 2
+    right = x + width / 2
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+def candle_colors(opens, closes):
+    """Green for up candles, red for down candles."""
+    return np.where(closes >= opens, 'green', 'red')
+
+# Output profiles produced from one render of the chart figure. The 20x12
+# inch figure at 300 DPI was ~6000x3600 pixels and ~580 KB, far more than
+# the GUI thumbnail or the vision model use.
+RENDER_PROFILES = {
+    'thumbnail': {'dpi': 25, 'max_size': (500, 300), 'format': 'png', 'filename': 'chart_thumbnail.png'},
+    'model': {'dpi': 80, 'max_size': (2048, 768), 'format': 'webp', 'quality': 90, 'filename': 'chart.webp'},
+    'archive': {'dpi': 300, 'format': 'png', 'optimize': True, 'filename': 'chart.png'},
+}
+
+# Profiles rendered every refresh; 'archive' is produced on demand
+DEFAULT_PROFILES = ('thumbnail', 'model')
+
+def _tight_crop_box(figure, renderer, dpi, size, pad_inches=0.1):
+    """Pixel box matching savefig(bbox_inches='tight') within the drawn canvas."""
+    bbox = figure.get_tightbbox(renderer)
+    width, height = size
+    left = max(0, int((bbox.x0 - pad_inches) * dpi))
+    right = min(width, int(np.ceil((bbox.x1 + pad_inches) * dpi)))
+    top = max(0, int(height - (bbox.y1 + pad_inches) * dpi))
+    bottom = min(height, int(np.ceil(height - (bbox.y0 - pad_inches) * dpi)))
+    return (left, top, right, bottom)
+
+class CandlestickChart:
+    """
+    Long-lived candlestick chart for the refresh loop.
     
-    # Draw body
-    body_height = abs(close_price - open_price)
-    body_bottom = min(open_price, close_price)
+    Keeps one figure, axis and set of artists and only swaps in new data on
+    each update, instead of building a new figure every cycle. Uses the Agg
+    canvas directly (no pyplot), and all rendering for a chart runs on its
+    own worker thread via submit().
+    """
     
-    rect = Rectangle((x - width/2, body_bottom), width, body_height, 
-                    facecolor=color, edgecolor='black', linewidth=0.5, alpha=0.8)
-    ax.add_patch(rect)
+    def __init__(self, symbol="BITX", figsize=(20, 12)):
+        self.symbol = symbol
+        self.figure = Figure(figsize=figsize, facecolor='white')
+        FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot()
+        self._executor = None
+        self._lock = threading.Lock()
+        
+        ax = self.ax
+        self.wicks = LineCollection([], colors='black', linewidths=1, zorder=2)
+        self.bodies = PolyCollection([], edgecolors='black', linewidths=0.5, alpha=0.8, zorder=1)
+        ax.add_collection(self.bodies)
+        ax.add_collection(self.wicks)
+        self.ema_line, = ax.plot([], [], color='red', linewidth=2, label='EMA5', alpha=0.8)
+        self.sma_line, = ax.plot([], [], color='black', linewidth=2, label='SMA8', alpha=0.8)
+        self.box_artists = []
+        
+        ax.set_title(f"{symbol} - 2 Day Candlestick (1-min, EMA5, SMA8, Daily Boxes)", 
+                    fontsize=16, fontweight='bold', pad=20)
+        ax.set_ylabel('Price ($)', fontsize=12)
+        ax.grid(True, alpha=0.3)
+        ax.set_facecolor('white')
+        ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
+        self.info_text = ax.text(1.02, 0.98, '', 
+                                transform=ax.transAxes, fontsize=12, fontweight='bold',
+                                bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.8),
+                                verticalalignment='top')
+        
+        # Cached artist data, reused for bars that did not change
+        self._index = None
+        self._ohlc = None
+        self._segments = None
+        self._verts = None
+        self._colors = None
+    
+    def _first_changed(self, index, ohlc):
+        """Position of the first sampled bar that differs from the last update."""
+        if self._index is None or len(index) == 0 or index[0] != self._index[0]:
+            return 0
+        overlap = min(len(index), len(self._index))
+        same = (index[:overlap] == self._index[:overlap]) & (ohlc[:overlap] == self._ohlc[:overlap]).all(axis=1)
+        changed = np.flatnonzero(~same)
+        return int(changed[0]) if len(changed) else overlap
+    
+    def update(self, stock_data, sessions=None):
+        """
+        Update the chart artists with refreshed data.
+        
+        Args:
+            stock_data (DataFrame): Stock data
+            sessions (DataFrame, optional): Precomputed get_session_table() result
+            
+        Returns:
+            DataFrame: The sampled bars that were drawn
+        """
+        # Aggregate to as many candles as the figure width can show
+        sampled_data = downsample_bars(stock_data, self.max_candles())
+        index = sampled_data.index
+        ohlc = sampled_data[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)
+        x = np.arange(len(sampled_data), dtype=float)
+        
+        # Rebuild geometry only from the first new or changed bar onwards
+        start = self._first_changed(index, ohlc)
+        o, h, l, c = (ohlc[start:, i] for i in range(4))
+        tail_x = x[start:]
+        if start == 0:
+            self._segments = candle_wick_segments(tail_x, h, l)
+            self._verts = candle_body_verts(tail_x, o, c)
+            self._colors = candle_colors(o, c)
+        else:
+            self._segments = np.concatenate([self._segments[:start], candle_wick_segments(tail_x, h, l)])
+            self._verts = np.concatenate([self._verts[:start], candle_body_verts(tail_x, o, c)])
+            self._colors = np.concatenate([self._colors[:start], candle_colors(o, c)])
+        self._index = index
+        self._ohlc = ohlc
+        
+        ax = self.ax
+        self.wicks.set_segments(self._segments)
+        self.bodies.set_verts(self._verts)
+        self.bodies.set_facecolor(self._colors)
+        self.ema_line.set_data(x, sampled_data['EMA5'].to_numpy())
+        self.sma_line.set_data(x, sampled_data['SMA8'].to_numpy())
+        
+        # Draw daily high/low boxes
+        for artist in self.box_artists:
+            artist.remove()
+        self.box_artists = draw_daily_boxes(ax, stock_data, sampled_data, sessions, LOD_DAILY_BOXES)
+        
+        # Format x-axis with a fixed number of time labels
+        step = max(1, -(-len(sampled_data) // LOD_TICK_LABELS))
+        time_labels = [idx.strftime('%m/%d %H:%M') for idx in sampled_data.index[::step]]
+        x_positions = list(range(0, len(sampled_data), step))
+        ax.set_xticks(x_positions)
+        ax.set_xticklabels(time_labels, rotation=45, ha='right')
+        
+        # Add current price and indicators annotation
+        current_price = stock_data['Close'].iloc[-1]
+        latest = latest_indicator_values(stock_data)
+        self.info_text.set_text(f'Price: ${current_price:.2f}\nEMA5: ${latest["EMA5"]:.2f}\nSMA8: ${latest["SMA8"]:.2f}')
+        
+        # relim() skips collections, so add the wick extents explicitly
+        ax.relim()
+        if len(self._segments):
+            ax.update_datalim(self._segments.reshape(-1, 2))
+        ax.autoscale_view()
+        
+        days = len(sessions) if sessions is not None else len(day_runs(stock_data['Date'].to_numpy())[0])
+        ax.set_title(f"{self.symbol} - {days} Day Candlestick ({bucket_label(sampled_data.attrs['bucket_seconds'])}, "
+                     f"EMA5, SMA8, Daily Boxes)", fontsize=16, fontweight='bold', pad=20)
+        return sampled_data
+    
+    def max_candles(self):
+        """Candles the figure width allows at LOD_PIXELS_PER_CANDLE pixels each in the model profile."""
+        return max(1, int(self.figure.get_figwidth() * RENDER_PROFILES['model']['dpi'] / LOD_PIXELS_PER_CANDLE))
+    
+    def render_images(self, profiles=DEFAULT_PROFILES):
+        """
+        Encode the current state for several render profiles in one pass.
+        
+        The figure is drawn once at the highest DPI any profile needs,
+        cropped like savefig(bbox_inches='tight'), then resized and encoded
+        per profile.
+        
+        Args:
+            profiles (iterable): Names from RENDER_PROFILES
+            
+        Returns:
+            dict: Profile name -> {'image', 'data', 'format', 'width', 'height', 'dpi', 'encode_seconds'}
+        """
+        specs = {name: RENDER_PROFILES[name] for name in profiles}
+        master_dpi = max(spec['dpi'] for spec in specs.values())
+        
+        with get_metrics().span('render.draw'):
+            self.figure.set_dpi(master_dpi)
+            self.figure.tight_layout()
+            canvas = self.figure.canvas
+            canvas.draw()
+            master = Image.frombuffer('RGBA', canvas.get_width_height(), canvas.buffer_rgba(), 'raw', 'RGBA', 0, 1)
+            master = master.crop(_tight_crop_box(self.figure, canvas.get_renderer(), master_dpi, master.size))
+            master = master.convert('RGB')
+        
+        images = {}
+        for name, spec in specs.items():
+            start = time.perf_counter()
+            scale = spec['dpi'] / master_dpi
+            width = max(1, round(master.width * scale))
+            height = max(1, round(master.height * scale))
+            if spec.get('max_size'):
+                fit = min(1.0, spec['max_size'][0] / width, spec['max_size'][1] / height)
+                width, height = max(1, round(width * fit)), max(1, round(height * fit))
+            image = master if (width, height) == master.size else master.resize((width, height), Image.Resampling.LANCZOS)
+            
+            buffer = io.BytesIO()
+            save_args = {'dpi': (spec['dpi'], spec['dpi'])}
+            if spec['format'] in ('jpeg', 'webp'):
+                save_args['quality'] = spec.get('quality', 90)
+            if spec['format'] == 'png':
+                save_args['optimize'] = spec.get('optimize', False)
+            image.save(buffer, format=spec['format'].upper(), **save_args)
+            
+            images[name] = {
+                'image': image,
+                'data': buffer.getvalue(),
+                'format': spec['format'],
+                'width': width,
+                'height': height,
+                'dpi': spec['dpi'],
+                'encode_seconds': time.perf_counter() - start,
+            }
+            get_metrics().observe(f"render.encode.{name}", images[name]['encode_seconds'])
+        return images
+    
+    def render(self, stock_data, output_dir="data", profiles=DEFAULT_PROFILES, persist=True):
+        """
+        Update the chart, encode its images and export its data.
+        
+        The encoded images stay in memory in the returned metadata, so the
+        GUI and analyzer can use them without reading files back.
+        
+        Args:
+            stock_data (DataFrame): Stock data
+            output_dir (str): Directory to save chart and data
+            profiles (iterable): Render profiles to produce, see RENDER_PROFILES
+            persist (bool): Also write each image to output_dir
+            
+        Returns:
+            dict: Chart metadata including prices, 'images' per profile
+                  ({'image': PIL image, 'data': encoded bytes, 'path', ...})
+                  and the bar_context summary in 'context'
+        """
+        print(f"📈 Creating candlestick chart for {self.symbol}...")
+        
+        # Create output directory
+        os.makedirs(output_dir, exist_ok=True)
+        
+        # Per-session aggregates shared by the box overlay and the JSON stats
+        sessions = get_session_table(stock_data)
+        
+        metrics = get_metrics()
+        with self._lock:
+            with metrics.span('render.update'):
+                sampled_data = self.update(stock_data, sessions)
+            images = self.render_images(profiles)
+        
+        with metrics.span('render.write'):
+            for name, image in images.items():
+                image['path'] = None
+                if persist:
+                    image['path'] = os.path.join(output_dir, RENDER_PROFILES[name]['filename'])
+                    write_file_atomic(image['path'], image['data'])
+                    print(f"✅ Chart saved: {image['path']} ({image['width']}x{image['height']}, {len(image['data']):,} bytes)")
+        
+        primary = 'model' if 'model' in images else next(iter(images))
+        chart_path = images[primary]['path']
+        with metrics.span('render.export'):
+            chart_info = export_chart_data(stock_data, self.symbol, output_dir, chart_path,
+                                           len(sampled_data), sessions)
+        chart_info['images'] = images
+        
+        # Exact numbers behind the chart, for the analyzer's text and hybrid modes
+        chart_info['context'] = build_bar_context(stock_data, sessions, self.symbol)
+        
+        # Content keys for the analysis cache
+        chart_info['data_hash'] = bars_fingerprint(stock_data)
+        chart_info['image_hash'] = image_dhash(images[primary]['image'])
+        chart_info['last_bar'] = last_bar_key(stock_data)
+        return chart_info
+    
+    def submit(self, stock_data, output_dir="data", profiles=DEFAULT_PROFILES, persist=True):
+        """
+        Render on this chart's worker thread.
+        
+        Returns:
+            concurrent.futures.Future: Resolves to the render() metadata
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"chart-{self.symbol}")
+        return self._executor.submit(self.render, stock_data, output_dir, profiles, persist)
+
+def write_file_atomic(path, data):
+    """Write bytes via a temp file and rename, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+_charts = {}
 
-def create_candlestick_chart(stock_data, symbol="BITX", output_dir="data"):
+def get_chart(symbol="BITX"):
+    """Get the long-lived chart for a symbol."""
+    if symbol not in _charts:
+        _charts[symbol] = CandlestickChart(symbol)
+    return _charts[symbol]
+
+def create_candlestick_chart(stock_data, symbol="BITX", output_dir="data", profiles=DEFAULT_PROFILES, persist=True):
     """
     Create candlestick chart for BITX with indicators and daily boxes.
     
+    One-shot wrapper around CandlestickChart for callers that do not keep
+    a chart between refreshes.
+    
     Args:
-        stock_data (DataFrame): 1-minute stock data
+        stock_data (DataFrame): Stock data
         symbol (str): Stock symbol for labeling
         output_dir (str): Directory to save chart
+        profiles (iterable): Render profiles to produce, see RENDER_PROFILES
+        persist (bool): Also write the chart images to output_dir
         
     Returns:
         dict: Chart metadata including path and prices
     """
-    print(f"📈 Creating candlestick chart for {symbol}...")
-    
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Setup plot
-    fig, ax = plt.subplots(figsize=(20, 12))
-    
-    # Sample data to avoid too many candles (every 5 minutes)
-    sampled_data = stock_data.iloc[::5].copy()  # Every 5th candle
-    
-    # Draw candlesticks
-    for i, (idx, row) in enumerate(sampled_data.iterrows()):
-        draw_candlestick(ax, i, row['Open'], row['High'], row['Low'], row['Close'])
-    
-    # Plot moving averages
-    ax.plot(range(len(sampled_data)), sampled_data['EMA5'], 
-           color='red', linewidth=2, label='EMA5', alpha=0.8)
-    ax.plot(range(len(sampled_data)), sampled_data['SMA8'], 
-           color='black', linewidth=2, label='SMA8', alpha=0.8)
-    
-    # Draw daily high/low boxes
-    draw_daily_boxes(ax, stock_data, sampled_data)
+    return CandlestickChart(symbol).render(stock_data, output_dir, profiles, persist)
+
+def bars_to_records(stock_data):
+    """
+    Convert bars to JSON-ready row dicts with column-wise conversion.
     
-    # Format x-axis with time labels
-    time_labels = [idx.strftime('%m/%d %H:%M') for idx in sampled_data.index[::60]]  # Every hour
-    x_positions = list(range(0, len(sampled_data), 60))
+    Args:
+        stock_data (DataFrame): Stock data
+        
+    Returns:
+        list: One dict per bar (NaN indicators become None)
+    """
+    columns = {
+        'datetime': stock_data.index.map(lambda ts: ts.isoformat()),
+        'open': stock_data['Open'].astype(float),
+        'high': stock_data['High'].astype(float),
+        'low': stock_data['Low'].astype(float),
+        'close': stock_data['Close'].astype(float),
+        'volume': stock_data['Volume'].astype('int64'),
+        'ema5': stock_data['EMA5'].astype(object).where(stock_data['EMA5'].notna(), None),
+        'sma8': stock_data['SMA8'].astype(object).where(stock_data['SMA8'].notna(), None),
+        'date': stock_data['Date'].astype(str),
+    }
+    frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+    return frame.to_dict('records')
+
+def export_chart_data(stock_data, symbol, output_dir, chart_path, candles_displayed, sessions=None,
+                      json_rows=False):
+    """
+    Save the chart data and build the chart metadata.
     
-    ax.set_xticks(x_positions)
-    ax.set_xticklabels(time_labels, rotation=45, ha='right')
+    Bars are appended to a columnar store under output_dir/bars/<symbol>
+    (only bars new since the last export are written). data.json keeps the
+    summary in compact form and only includes per-bar rows when asked.
     
-    # Styling
+    Args:
+        stock_data (DataFrame): Stock data
+        symbol (str): Stock symbol
+        output_dir (str): Directory to save data.json
+        chart_path (str): Path of the saved chart
+        candles_displayed (int): Number of candles drawn
+        sessions (DataFrame, optional): Precomputed get_session_table() result
+        json_rows (bool): Also write every bar as a row in data.json
+        
+    Returns:
+        dict: Chart metadata including path and prices
+    """
     current_price = stock_data['Close'].iloc[-1]
-    current_ema5 = stock_data['EMA5'].iloc[-1]
-    current_sma8 = stock_data['SMA8'].iloc[-1]
-    
-    ax.set_title(f"{symbol} - 2 Day Candlestick (1-min, EMA5, SMA8, Daily Boxes)", 
-                fontsize=16, fontweight='bold', pad=20)
-    ax.set_ylabel('Price ($)', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    ax.set_facecolor('white')
-    ax.legend(loc='center left', bbox_to_anchor=(1, 0.5))
-    
-    # Add current price and indicators annotation
-    info_text = f'Price: ${current_price:.2f}\nEMA5: ${current_ema5:.2f}\nSMA8: ${current_sma8:.2f}'
-    ax.text(1.02, 0.98, info_text, 
-           transform=ax.transAxes, fontsize=12, fontweight='bold',
-           bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.8),
-           verticalalignment='top')
-    
-    # Save chart
-    chart_path = f"{output_dir}/chart.png"
-    plt.tight_layout()
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-    plt.close(fig)
-    
-    print(f"✅ Chart saved: {chart_path}")
+    latest = latest_indicator_values(stock_data)
+    current_ema5 = latest['EMA5']
+    current_sma8 = latest['SMA8']
     
     # Prepare data for JSON export
-    daily_stats = get_daily_stats(stock_data)
-    
-    # Convert stock data to JSON-serializable format
-    export_data = []
-    for idx, row in stock_data.iterrows():
-        export_data.append({
-            'datetime': idx.isoformat(),
-            'open': float(row['Open']),
-            'high': float(row['High']),
-            'low': float(row['Low']),
-            'close': float(row['Close']),
-            'volume': int(row['Volume']),
-            'ema5': float(row['EMA5']) if pd.notna(row['EMA5']) else None,
-            'sma8': float(row['SMA8']) if pd.notna(row['SMA8']) else None,
-            'date': str(row['Date'])
-        })
+    daily_stats = get_daily_stats(stock_data, sessions)
+    
+    # Append new bars to the columnar store
+    columnar_path = os.path.join(output_dir, 'bars', symbol)
+    columnar = ColumnarExport(columnar_path, symbol).append(stock_data)
     
     # Save data to JSON
     data_json_path = f"{output_dir}/data.json"
@@ -268,20 +753,23 @@ def create_candlestick_chart(stock_data, symbol="BITX", output_dir="data"):
         'low_2day': float(stock_data['Low'].min()),
         'daily_stats': daily_stats,
         'candles_total': len(stock_data),
-        'candles_displayed': len(sampled_data),
-        'data': export_data
+        'candles_displayed': candles_displayed,
+        'columnar_path': columnar_path
     }
+    if json_rows:
+        json_data['data'] = bars_to_records(stock_data)
     
     with open(data_json_path, 'w') as f:
-        json.dump(json_data, f, indent=2)
+        json.dump(json_data, f, separators=(',', ':'))
     
-    print(f"✅ Data saved: {data_json_path}")
+    print(f"✅ Data saved: {data_json_path} (+{columnar['written']} bars to {columnar_path})")
     
     # Return metadata
     return {
         'symbol': symbol,
         'chart_path': chart_path,
         'data_path': data_json_path,
+        'columnar_path': columnar_path,
         'current_price': float(current_price),
         'current_ema5': float(current_ema5),
         'current_sma8': float(current_sma8),
@@ -289,24 +777,34 @@ def create_candlestick_chart(stock_data, symbol="BITX", output_dir="data"):
         'low_2day': float(stock_data['Low'].min()),
         'daily_stats': daily_stats,
         'candles_analyzed': len(stock_data),
-        'candles_displayed': len(sampled_data)
+        'candles_displayed': candles_displayed
     }
 
-def generate_bitx_chart(symbol="BITX"):
+def generate_bitx_chart(symbol="BITX", persist=True):
     """
     Main function to generate BITX candlestick chart.
     
     Args:
         symbol (str): Stock symbol to analyze
+        persist (bool): Also write the chart images to data/
         
     Returns:
         dict: Complete chart metadata
     """
     stock_data = fetch_bitx_data(symbol)
-    chart_info = create_candlestick_chart(stock_data, symbol)
+    chart_info = get_chart(symbol).submit(stock_data, persist=persist).result()
     return chart_info
 
+def summarize_chart_info(chart_info):
+    """Chart metadata without the in-memory image and context payloads, for printing/logging."""
+    summary = {key: value for key, value in chart_info.items() if key not in ('images', 'context')}
+    if 'context' in chart_info:
+        summary['context_chars'] = len(chart_info['context'])
+    summary['images'] = {name: {key: value for key, value in image.items() if key not in ('image', 'data')}
+                         for name, image in chart_info.get('images', {}).items()}
+    return summary
+
 if __name__ == "__main__":
     # Generate BITX chart
     result = generate_bitx_chart("BITX")
-    print(f"📊 BITX chart complete: {result}")
+    print(f"📊 BITX chart complete: {summarize_chart_info(result)}")
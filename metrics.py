@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Performance Metrics
+===================
+Span timings and memory samples for the analysis cycle. Each named span
+keeps a rolling window of durations for p50/p95/p99; the process RSS is
+sampled into its own window. Snapshots can be exported as JSON or in the
+Prometheus text format.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_WINDOW = 500              # samples kept per span
+PERCENTILES = (50, 95, 99)
+METRIC_PREFIX = 'daytrader'
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes (standard library only).
+
+    Returns:
+        int: Bytes, or None when the platform gives no reading
+    """
+    try:
+        if sys.platform.startswith('linux'):
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                            ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                            ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        # Elsewhere only the peak is available (kilobytes on BSD, bytes on macOS)
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except (OSError, ValueError, AttributeError, ImportError):
+        return None
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list (None if empty)."""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * pct // 100))    # ceil without floats
+    return ordered[int(rank) - 1]
+
+
+class Metrics:
+    """
+    Thread-safe registry of rolling span histograms and RSS samples.
+
+    Span names are dotted ('stage.render', 'render.draw'); a snapshot lists
+    count, total, last, max and percentiles per span over the window.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """
+        Args:
+            window (int): Samples kept per span (older ones roll off)
+        """
+        self.window = window
+        self.started = time.time()
+        self._spans = {}
+        self._counts = {}
+        self._totals = {}
+        self._rss = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        """Record one duration for a span."""
+        with self._lock:
+            samples = self._spans.get(name)
+            if samples is None:
+                samples = self._spans[name] = deque(maxlen=self.window)
+                self._counts[name] = 0
+                self._totals[name] = 0.0
+            samples.append(seconds)
+            self._counts[name] += 1
+            self._totals[name] += seconds
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block as one sample of span name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def sample_memory(self):
+        """Take an RSS reading; returns it in bytes (None if unavailable)."""
+        rss = current_rss()
+        if rss is not None:
+            with self._lock:
+                self._rss.append(rss)
+        return rss
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counts.clear()
+            self._totals.clear()
+            self._rss.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """
+        Current statistics.
+
+        Returns:
+            dict: {'uptime', 'spans': {name: {'count', 'total', 'last', 'max', 'p50', 'p95', 'p99'}},
+                   'memory': {'rss', 'rss_max', 'samples'}}
+        """
+        with self._lock:
+            spans = {name: (list(samples), self._counts[name], self._totals[name])
+                     for name, samples in self._spans.items()}
+            rss = list(self._rss)
+
+        result = {'uptime': time.time() - self.started, 'spans': {}, 'memory': {
+            'rss': rss[-1] if rss else None, 'rss_max': max(rss) if rss else None, 'samples': len(rss)}}
+        for name in sorted(spans):
+            samples, count, total = spans[name]
+            ordered = sorted(samples)
+            stats = {'count': count, 'total': total, 'last': samples[-1], 'max': ordered[-1]}
+            for pct in PERCENTILES:
+                stats[f"p{pct}"] = percentile(ordered, pct)
+            result['spans'][name] = stats
+        return result
+
+    def to_json(self, indent=2):
+        """Snapshot as a JSON string."""
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def to_prometheus(self, prefix=METRIC_PREFIX):
+        """
+        Snapshot in the Prometheus text exposition format.
+
+        Spans become one summary ('<prefix>_span_seconds' with a span label
+        and quantiles over the rolling window); RSS is a gauge.
+        """
+        snapshot = self.snapshot()
+        name = f"{prefix}_span_seconds"
+        lines = [f"# HELP {name} Duration of analysis cycle spans (rolling window quantiles).",
+                 f"# TYPE {name} summary"]
+        for span, stats in snapshot['spans'].items():
+            for pct in PERCENTILES:
+                lines.append(f'{name}{{span="{span}",quantile="{pct / 100:g}"}} {stats[f"p{pct}"]:.6f}')
+            lines.append(f'{name}_sum{{span="{span}"}} {stats["total"]:.6f}')
+            lines.append(f'{name}_count{{span="{span}"}} {stats["count"]}')
+
+        memory = snapshot['memory']
+        if memory['rss'] is not None:
+            lines += [f"# HELP {prefix}_resident_memory_bytes Resident set size of the app process.",
+                      f"# TYPE {prefix}_resident_memory_bytes gauge",
+                      f"{prefix}_resident_memory_bytes {memory['rss']}",
+                      f"# HELP {prefix}_resident_memory_max_bytes Largest sampled resident set size.",
+                      f"# TYPE {prefix}_resident_memory_max_bytes gauge",
+                      f"{prefix}_resident_memory_max_bytes {memory['rss_max']}"]
+        lines += [f"# HELP {prefix}_uptime_seconds Seconds since metrics were started or reset.",
+                  f"# TYPE {prefix}_uptime_seconds gauge",
+                  f"{prefix}_uptime_seconds {snapshot['uptime']:.1f}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path, fmt='json'):
+        """
+        Write a snapshot to a file.
+
+        Args:
+            path (str): Output file
+            fmt (str): 'json' or 'prometheus'
+        """
+        text = self.to_json() if fmt == 'json' else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8', newline='\n') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """Get the process-wide metrics registry."""
+    return _metrics
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Analysis Pipeline
+=================
+Runs the analysis cycle as stages (fetch -> indicators -> render ->
+analyze -> publish), each on its own worker thread with a small bounded
+queue in front of it. A slow model call no longer delays the next fetch,
+so cycles can be submitted on a wall-clock schedule (see scheduler.py)
+instead of "60s after the last one finished".
+
+Work that is overtaken by a newer bar is dropped: queued items are
+replaced by newer ones, stages skip cycles older than the newest fetched
+bar, and an in-flight model request for an older bar is cancelled.
+
+With a signal pre-filter (signal_filter.py), scheduled cycles whose bar
+is below the gate level are published without calling the model.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+from datetime import datetime
+
+from make_chart import fetch_bars, add_indicators, get_chart, DEFAULT_PROFILES
+from ai_analyzer import analyze_image_async, submit_analysis, DEFAULT_CONTEXT_MODE
+from analysis_cache import get_analysis_cache, prompt_fingerprint
+from analysis_parser import parse_analysis, RESPONSE_FORMAT
+from metrics import get_metrics
+
+STAGES = ('fetch', 'indicators', 'render', 'analyze', 'publish')
+
+DEFAULT_ANALYSIS_DEADLINE = 45    # longest an AI request may take
+DEFAULT_QUEUE_SIZE = 1            # items waiting per stage; older ones are dropped
+DEFAULT_STOP_TIMEOUT = 5.0        # seconds stop() waits for each worker to finish its current item
+GATED_REASONS = ('tick',)         # cycles the pre-filter may keep from the model; manual ones always run
+
+
+class LatestQueue:
+    """
+    Bounded queue that never blocks the producer.
+
+    When full, put() drops the oldest item: a stage only ever needs the
+    newest work.
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """
+        Add an item.
+
+        Returns:
+            The item that was dropped to make room, or None
+        """
+        with self._condition:
+            dropped = self._items.popleft() if len(self._items) >= self.maxsize else None
+            self._items.append(item)
+            self._condition.notify()
+            return dropped
+
+    def get(self):
+        """Wait for the next item; None once the queue is closed."""
+        with self._condition:
+            while not self._items and not self._closed:
+                self._condition.wait()
+            return self._items.popleft() if self._items else None
+
+    def drain(self):
+        """Remove and return all waiting items."""
+        with self._condition:
+            items = list(self._items)
+            self._items.clear()
+            return items
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+
+class AnalysisPipeline:
+    """
+    Staged analysis cycle for one symbol.
+
+    Each cycle is a dict that picks up 'stock_data', 'chart_info' and
+    'analysis' as it moves through the stages, plus per-stage 'timings'.
+    With a pre-filter, cycles also carry 'signal', and a gated cycle is
+    published with 'gated' set and no 'analysis'.
+    The listener is called from worker threads as listener(event, cycle)
+    with event one of 'started', 'chart', 'result', 'dropped' or 'error'.
+    """
+
+    def __init__(self, symbol="BITX", interval='5m', days=2, listener=None, store=None, provider=None,
+                 output_dir="data", profiles=DEFAULT_PROFILES, persist=True, deadline=DEFAULT_ANALYSIS_DEADLINE,
+                 queue_size=DEFAULT_QUEUE_SIZE, analyze=True, logger=None, prefilter=None):
+        """
+        Args:
+            symbol (str): Stock symbol
+            interval (str): Bar interval
+            days (int): Days of bars per chart
+            listener (callable, optional): listener(event, cycle), called from worker threads
+            store (BarStore, optional): Bar store, defaults to data/bars.sqlite
+            provider (optional): Bar provider, defaults to Yahoo Finance
+            output_dir (str): Directory for chart images and exported data
+            profiles (iterable): Render profiles, see make_chart.RENDER_PROFILES
+            persist (bool): Write chart images to data/
+            deadline (float): Seconds before an AI request is abandoned
+            queue_size (int): Waiting items per stage before the oldest is dropped
+            analyze (bool): Run the AI stage (False publishes charts only)
+            logger (DebugLogger, optional): Receives one record per stage run and per drop
+            prefilter (SignalFilter, optional): Classifies each bar; scheduled cycles it
+                                                does not admit skip the AI call
+        """
+        self.symbol = symbol
+        self.interval = interval
+        self.days = days
+        self.listener = listener
+        self.store = store
+        self.provider = provider
+        self.output_dir = output_dir
+        self.profiles = profiles
+        self.persist = persist
+        self.deadline = deadline
+        self.analyze = analyze
+        self.logger = logger
+        self.prefilter = prefilter
+
+        self.system_prompt = ''
+        self.user_prompt = ''
+        self.context_mode = DEFAULT_CONTEXT_MODE
+
+        self.queue_size = queue_size
+        self.queues = {stage: LatestQueue(queue_size) for stage in STAGES}
+        self.stats = {'submitted': 0, 'published': 0, 'errors': 0,
+                      'dropped': {stage: 0 for stage in STAGES}}
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._latest_bar = None
+        self._in_flight = None     # (cycle, future) of the running AI request
+        self._threads = []
+
+    def configure(self, system_prompt=None, user_prompt=None, context_mode=None):
+        """Set the prompts and context mode used by cycles submitted from now on."""
+        with self._lock:
+            if system_prompt is not None:
+                self.system_prompt = system_prompt
+            if user_prompt is not None:
+                self.user_prompt = user_prompt
+            if context_mode is not None:
+                self.context_mode = context_mode
+
+    def start(self):
+        """Start one worker thread per stage (on fresh queues after stop())."""
+        if self._threads:
+            return
+        if any(queue.closed for queue in self.queues.values()):
+            self.queues = {stage: LatestQueue(self.queue_size) for stage in STAGES}
+        handlers = {'fetch': self._fetch, 'indicators': self._indicators, 'render': self._render,
+                    'analyze': self._analyze, 'publish': self._publish}
+        for index, stage in enumerate(STAGES):
+            following = STAGES[index + 1] if index + 1 < len(STAGES) else None
+            thread = threading.Thread(target=self._worker, args=(stage, handlers[stage], following, self.queues),
+                                      name=f"pipeline-{self.symbol}-{stage}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=DEFAULT_STOP_TIMEOUT):
+        """
+        Drop queued work, cancel the AI request and wait for the workers to exit.
+
+        Args:
+            timeout (float): Seconds to wait for each worker; one still busy after
+                             that finishes its item into the old, closed queues
+        """
+        self.cancel()
+        for queue in self.queues.values():
+            queue.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+
+    def submit(self, reason='manual'):
+        """
+        Start a new cycle at the fetch stage.
+
+        Args:
+            reason (str): Why the cycle was started ('tick', 'manual', ...)
+
+        Returns:
+            dict: The new cycle
+        """
+        with self._lock:
+            cycle = {
+                'id': self._next_id,
+                'symbol': self.symbol,
+                'reason': reason,
+                'requested_at': time.time(),
+                'timestamp': datetime.now().strftime("%H:%M:%S"),
+                'system_prompt': self.system_prompt,
+                'user_prompt': self.user_prompt,
+                'context_mode': self.context_mode,
+                'bar_time': None,
+                'timings': {},
+            }
+            self._next_id += 1
+            self.stats['submitted'] += 1
+        self._enqueue('fetch', cycle)
+        return cycle
+
+    def cancel(self):
+        """Drop all queued cycles and cancel the in-flight AI request (e.g. on STOP)."""
+        for stage, queue in self.queues.items():
+            for cycle in queue.drain():
+                self._drop(stage, cycle, 'cancelled')
+        with self._lock:
+            in_flight, self._in_flight = self._in_flight, None
+        if in_flight is not None:
+            in_flight[1].cancel()
+
+    def _enqueue(self, stage, cycle, queues=None):
+        dropped = (queues or self.queues)[stage].put(cycle)
+        if dropped is not None:
+            self._drop(stage, dropped, 'replaced by a newer cycle')
+
+    def _drop(self, stage, cycle, reason):
+        with self._lock:
+            self.stats['dropped'][stage] += 1
+        cycle['dropped'] = {'stage': stage, 'reason': reason}
+        if self.logger is not None:
+            self.logger.log("cycle dropped", 'debug', cycle=cycle['id'], stage=stage, reason=reason)
+        self._notify('dropped', cycle)
+
+    def _notify(self, event, cycle):
+        if self.listener is not None:
+            self.listener(event, cycle)
+
+    def _is_stale(self, cycle):
+        with self._lock:
+            return (cycle['bar_time'] is not None and self._latest_bar is not None
+                    and cycle['bar_time'] < self._latest_bar)
+
+    def _worker(self, stage, handler, following, queues):
+        queue = queues[stage]
+        while True:
+            cycle = queue.get()
+            if cycle is None:
+                return
+            if self._is_stale(cycle):
+                self._drop(stage, cycle, 'newer bar arrived')
+                continue
+
+            start = time.perf_counter()
+            error = None
+            try:
+                result = handler(cycle)
+            except Exception as e:
+                error = e
+            cycle['timings'][stage] = time.perf_counter() - start
+            get_metrics().observe(f"stage.{stage}", cycle['timings'][stage])
+            if self.logger is not None:
+                self.logger.log("stage finished", 'debug', cycle=cycle['id'], stage=stage,
+                                seconds=round(cycle['timings'][stage], 4), failed=error is not None)
+
+            if error is not None:
+                cycle['error'] = {'stage': stage, 'message': str(error), 'exception': error}
+                with self._lock:
+                    self.stats['errors'] += 1
+                self._notify('error', cycle)
+                continue
+            if result is None:
+                continue
+            if following is not None:
+                self._enqueue(following, cycle, queues)
+
+    # Stages: each returns the cycle to pass it on, or None to stop it
+
+    def _fetch(self, cycle):
+        self._notify('started', cycle)
+        cycle['stock_data'] = fetch_bars(self.symbol, self.days, self.interval, self.store, self.provider)
+        cycle['bar_time'] = cycle['stock_data'].index[-1]
+
+        # A newer bar supersedes the AI request still running for an older one
+        with self._lock:
+            if self._latest_bar is None or cycle['bar_time'] > self._latest_bar:
+                self._latest_bar = cycle['bar_time']
+            in_flight = self._in_flight
+        if in_flight is not None and in_flight[0]['bar_time'] < cycle['bar_time']:
+            in_flight[0]['cancel_reason'] = 'newer bar arrived'
+            in_flight[1].cancel()
+        return cycle
+
+    def _indicators(self, cycle):
+        cycle['stock_data'] = add_indicators(cycle['stock_data'], self.symbol, self.interval)
+        if self.prefilter is not None:
+            cycle['signal'] = self.prefilter.classify(cycle['stock_data'])
+        return cycle
+
+    def _render(self, cycle):
+        cycle['chart_info'] = get_chart(self.symbol).render(cycle['stock_data'], self.output_dir,
+                                                            self.profiles, self.persist)
+        self._notify('chart', cycle)
+        return cycle if self.analyze else None
+
+    def _analyze(self, cycle):
+        if self.prefilter is not None and 'signal' in cycle and cycle['reason'] in GATED_REASONS:
+            gated = not self.prefilter.admits(cycle['signal'])
+            self.prefilter.record(gated)
+            if gated:
+                cycle['gated'] = True
+                if self.logger is not None:
+                    self.logger.log("cycle gated", 'debug', cycle=cycle['id'], level=cycle['signal']['level'],
+                                    reasons=cycle['signal']['reasons'])
+                return cycle
+
+        chart_info = cycle['chart_info']
+        cache = get_analysis_cache()
+        prompt_hash = prompt_fingerprint(cycle['system_prompt'], cycle['user_prompt'], cycle['context_mode'])
+        cycle['prompt_hash'] = prompt_hash
+
+        cached = cache.get(chart_info['data_hash'], prompt_hash, chart_info['image_hash'], chart_info['last_bar'])
+        if cached is not None:
+            cycle['analysis'], cycle['from_cache'] = cached, True
+            return cycle
+
+        model_image = chart_info['images']['model']
+        started = time.monotonic()
+        future = submit_analysis(analyze_image_async(
+            model_image['data'], model_image['format'], cycle['system_prompt'], cycle['user_prompt'],
+            deadline=self.deadline, response_format=RESPONSE_FORMAT,
+            context_text=chart_info.get('context'), mode=cycle['context_mode']))
+        with self._lock:
+            self._in_flight = (cycle, future)
+        try:
+            text = future.result()
+        except CancelledError:
+            self._drop('analyze', cycle, cycle.get('cancel_reason', 'cancelled'))
+            return None
+        except TimeoutError:
+            raise TimeoutError(f"AI analysis timed out after {self.deadline}s")
+        finally:
+            with self._lock:
+                if self._in_flight is not None and self._in_flight[1] is future:
+                    self._in_flight = None
+
+        latency = time.monotonic() - started
+        get_metrics().observe('ai.request', latency)
+        if self.prefilter is not None:
+            self.prefilter.observe_model(latency)
+        cycle['response_text'] = text
+        cycle['analysis'], cycle['from_cache'] = parse_analysis(text), False
+        cache.put(chart_info['data_hash'], prompt_hash, cycle['analysis'],
+                  latency=latency, image_hash=chart_info['image_hash'], last_bar=chart_info['last_bar'])
+        return cycle
+
+    def _publish(self, cycle):
+        cycle['latency'] = time.time() - cycle['requested_at']
+        get_metrics().observe('cycle.total', cycle['latency'])
+        with self._lock:
+            self.stats['published'] += 1
+        self._notify('result', cycle)
+        return None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tick Scheduler
+==============
+Fires a callback at wall-clock bar boundaries (e.g. every minute close).
+The scheduler thread sleeps on a condition variable: it wakes only when
+a tick is due or when it is started, stopped or re-configured, so an
+idle app costs no CPU wakeups.
+"""
+
+import math
+import threading
+import time
+
+DEFAULT_PERIOD_SECONDS = 60
+DEFAULT_TICK_OFFSET = 2.0         # seconds after the bar boundary, so the provider has the closed bar
+
+
+def next_boundary(now=None, period=DEFAULT_PERIOD_SECONDS, offset=DEFAULT_TICK_OFFSET):
+    """
+    Next wall-clock tick: a multiple of period (from the epoch) plus offset.
+
+    Args:
+        now (float, optional): Epoch seconds, defaults to time.time()
+        period (float): Tick spacing in seconds (60 -> every minute close)
+        offset (float): Seconds after each boundary
+
+    Returns:
+        float: Epoch seconds of the next tick, strictly after now
+    """
+    now = time.time() if now is None else now
+    return (math.floor((now - offset) / period) + 1) * period + offset
+
+
+class TickScheduler:
+    """
+    Calls callback() on its own thread at each bar boundary while enabled.
+
+    Ticks are enabled when both running and auto are set. The next tick
+    time is published as next_due (epoch seconds, None when disabled) for
+    countdown displays.
+    """
+
+    def __init__(self, callback, period=DEFAULT_PERIOD_SECONDS, offset=DEFAULT_TICK_OFFSET, auto=True):
+        """
+        Args:
+            callback (callable): Called with no arguments on each tick
+            period (float): Tick spacing in seconds
+            offset (float): Seconds after each bar boundary
+            auto (bool): Initial auto-refresh setting
+        """
+        self.callback = callback
+        self.period = period
+        self.offset = offset
+        self.next_due = None
+        self.stats = {'wakeups': 0, 'ticks': 0, 'max_lateness': 0.0}
+
+        self._running = False
+        self._auto = auto
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='tick-scheduler', daemon=True)
+        self._thread.start()
+
+    @property
+    def enabled(self):
+        return self._running and self._auto and not self._closed
+
+    def start(self):
+        """Start ticking (if auto is on)."""
+        self._update(running=True)
+
+    def stop(self):
+        """Stop ticking; the thread sleeps until started again."""
+        self._update(running=False)
+
+    def set_auto(self, auto):
+        """Turn automatic ticks on or off."""
+        self._update(auto=bool(auto))
+
+    def set_period(self, period, offset=None):
+        """Change the tick spacing; takes effect for the next tick."""
+        self._update(period=period, offset=self.offset if offset is None else offset)
+
+    def close(self):
+        """Stop the scheduler thread for good."""
+        self._update(closed=True)
+        self._thread.join(timeout=1)
+
+    def _update(self, running=None, auto=None, period=None, offset=None, closed=None):
+        with self._condition:
+            if running is not None:
+                self._running = running
+            if auto is not None:
+                self._auto = auto
+            if period is not None:
+                self.period, self.offset = period, offset
+            if closed is not None:
+                self._closed = closed
+            self.next_due = next_boundary(period=self.period, offset=self.offset) if self.enabled else None
+            self._condition.notify()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if self.next_due is None:
+                    self._condition.wait()
+                else:
+                    remaining = self.next_due - time.time()
+                    if remaining > 0:
+                        self._condition.wait(timeout=remaining)
+                self.stats['wakeups'] += 1
+
+                due = self.next_due
+                if due is None or time.time() < due:
+                    continue    # re-configured or woken early; wait again
+
+                self.stats['ticks'] += 1
+                self.stats['max_lateness'] = max(self.stats['max_lateness'], time.time() - due)
+                self.next_due = next_boundary(period=self.period, offset=self.offset)
+                self._condition.release()
+                try:
+                    self.callback()
+                except Exception as e:
+                    print(f"❌ Scheduled tick failed: {str(e)}")
+                finally:
+                    self._condition.acquire()
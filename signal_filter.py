@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Signal Pre-filter
+=================
+Deterministic rules that decide whether a bar is worth a model call.
+Each bar of the frame fetch_bitx_data builds is classified from its
+EMA5/SMA8 columns and the previous session's floor pivots as
+
+    no_setup   nothing the strategy trades on
+    watch      something forming (lines converging, price at a level)
+    candidate  a fresh EMA5/SMA8 cross up, a pivot reclaim, or price
+               at a level with EMA5 above SMA8
+
+Only the last few rows are read, and the pivot levels are computed once
+per session, so a classification takes microseconds. Scheduled cycles
+below the gate level skip the AI call (see AnalysisPipeline).
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from make_chart import get_session_table
+from metrics import get_metrics
+
+LEVELS = ('no_setup', 'watch', 'candidate')
+
+DEFAULT_THRESHOLDS = {
+    'cross_bars': 3,           # a cross or pivot reclaim this many bars back still counts
+    'converge': 0.03,          # dollars between EMA5 and SMA8 that count as about to cross
+    'pivot_distance': 0.10,    # dollars from P/R1/S1 that count as at the level
+}
+DEFAULT_MIN_LEVEL = 'candidate'    # lowest level sent to the model, None sends every cycle
+
+_COUNTERS = ('classified', 'passed', 'gated', 'model_calls') + LEVELS
+
+
+def session_pivots(stock_data):
+    """
+    Floor pivots from the session before the last one in the frame.
+
+    Returns:
+        dict: 'P', 'R1', 'S1', or None when the frame holds a single session
+    """
+    sessions = get_session_table(stock_data)
+    if len(sessions) < 2:
+        return None
+    previous = sessions.iloc[-2]
+    pivot = (previous['high'] + previous['low'] + previous['close']) / 3.0
+    return {'P': pivot, 'R1': 2 * pivot - previous['low'], 'S1': 2 * pivot - previous['high']}
+
+
+def classify(stock_data, pivots=None, thresholds=None):
+    """
+    Classify the last bar of a prepared frame.
+
+    Args:
+        stock_data (DataFrame): Bars with EMA5, SMA8 and Date (fetch_bitx_data output)
+        pivots (dict, optional): session_pivots() result for the last session
+        thresholds (dict, optional): Overrides for DEFAULT_THRESHOLDS
+
+    Returns:
+        dict: 'level' (one of LEVELS), 'reasons', 'close', 'spread' (EMA5 - SMA8)
+              and 'nearest' ({'level', 'distance'} or None)
+    """
+    limits = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    rows = int(limits['cross_bars']) + 1
+    close = stock_data['Close'].to_numpy(dtype=float)[-rows:]
+    fast = stock_data['EMA5'].to_numpy(dtype=float)[-rows:]
+    slow = stock_data['SMA8'].to_numpy(dtype=float)[-rows:]
+    # Only the last session counts: a cross over the overnight gap is not a signal
+    dates = stock_data['Date'].to_numpy()[-rows:]
+    same_session = (dates[1:] == dates[-1]) & (dates[:-1] == dates[-1])
+
+    signal = {'level': 'no_setup', 'reasons': [], 'close': float(close[-1]),
+              'spread': float(fast[-1] - slow[-1]), 'nearest': None}
+    if np.isnan(fast[-1]) or np.isnan(slow[-1]):
+        signal['reasons'].append("indicators not ready")
+        return signal
+
+    above = fast > slow
+    crossed = bool(np.any(above[1:] & ~above[:-1] & same_session))
+    if crossed:
+        signal['reasons'].append("EMA5 crossed above SMA8")
+    trend_up = bool(above[-1])
+    converging = not trend_up and abs(signal['spread']) <= limits['converge']
+    if converging:
+        signal['reasons'].append("EMA5 converging on SMA8")
+
+    at_level = reclaimed = False
+    if pivots is not None:
+        name, level = min(pivots.items(), key=lambda item: abs(close[-1] - item[1]))
+        distance = float(close[-1] - level)
+        signal['nearest'] = {'level': name, 'distance': round(distance, 4)}
+        at_level = abs(distance) <= limits['pivot_distance']
+        reclaimed = bool(np.any((close[1:] > pivots['P']) & (close[:-1] <= pivots['P']) & same_session))
+        if reclaimed:
+            signal['reasons'].append("close reclaimed the pivot")
+        elif at_level:
+            signal['reasons'].append(f"price at {name}")
+
+    if crossed or reclaimed or (at_level and trend_up):
+        signal['level'] = 'candidate'
+    elif converging or at_level or trend_up:
+        signal['level'] = 'watch'
+        if trend_up and not signal['reasons']:
+            signal['reasons'].append("EMA5 above SMA8, no trigger")
+    return signal
+
+
+class SignalFilter:
+    """
+    Thread-safe pre-filter: classifies cycles and counts what it gated.
+
+    The pivots are cached per session date; thresholds and the gate level
+    can be changed at any time with configure().
+    """
+
+    def __init__(self, thresholds=None, min_level=DEFAULT_MIN_LEVEL):
+        """
+        Args:
+            thresholds (dict, optional): Overrides for DEFAULT_THRESHOLDS
+            min_level (str, optional): Lowest level sent to the model, None gates nothing
+        """
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.min_level = None
+        self._lock = threading.Lock()
+        self._pivots = (None, None)     # (session date, pivots)
+        self.configure(min_level, **(thresholds or {}))
+        self.reset()
+
+    def configure(self, min_level=False, **thresholds):
+        """
+        Change the gate level and/or thresholds (False leaves the level unchanged).
+
+        Raises:
+            ValueError: Unknown level or threshold name
+        """
+        unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+        if unknown:
+            raise ValueError(f"Unknown pre-filter thresholds: {', '.join(sorted(unknown))}")
+        if min_level not in (False, None) and min_level not in LEVELS:
+            raise ValueError(f"Unknown pre-filter level {min_level!r}, expected one of {LEVELS}")
+        with self._lock:
+            self.thresholds.update(thresholds)
+            if min_level is not False:
+                self.min_level = min_level
+
+    def reset(self):
+        with self._lock:
+            self.counters = dict.fromkeys(_COUNTERS, 0)
+            self.counters['model_seconds'] = 0.0
+
+    def classify(self, stock_data):
+        """
+        Classify the last bar of a prepared frame (see classify()).
+
+        Returns:
+            dict: Signal, plus 'seconds' the classification took
+        """
+        start = time.perf_counter()
+        session = stock_data['Date'].iat[-1]
+        with self._lock:
+            cached_session, pivots = self._pivots
+            thresholds = dict(self.thresholds)
+        if cached_session != session:
+            pivots = session_pivots(stock_data)
+            with self._lock:
+                self._pivots = (session, pivots)
+
+        signal = classify(stock_data, pivots, thresholds)
+        signal['seconds'] = time.perf_counter() - start
+        get_metrics().observe('signal.classify', signal['seconds'])
+        with self._lock:
+            self.counters['classified'] += 1
+            self.counters[signal['level']] += 1
+        return signal
+
+    def admits(self, signal):
+        """True if a signal at this level should go to the model."""
+        with self._lock:
+            min_level = self.min_level
+        return min_level is None or LEVELS.index(signal['level']) >= LEVELS.index(min_level)
+
+    def record(self, gated):
+        """Count one scheduled cycle as sent to the model or gated."""
+        with self._lock:
+            self.counters['gated' if gated else 'passed'] += 1
+
+    def observe_model(self, seconds):
+        """Record the latency of a model call (the cost a gated cycle saves)."""
+        with self._lock:
+            self.counters['model_calls'] += 1
+            self.counters['model_seconds'] += seconds
+
+    def stats(self):
+        """
+        Get the gate counters.
+
+        Returns:
+            dict: Counters plus 'gated_fraction', 'avg_model_seconds' and
+                  'saved_seconds' (gated cycles times the average model latency)
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats['min_level'] = self.min_level
+        decided = stats['gated'] + stats['passed']
+        stats['gated_fraction'] = stats['gated'] / decided if decided else 0.0
+        stats['avg_model_seconds'] = (stats['model_seconds'] / stats['model_calls']
+                                      if stats['model_calls'] else None)
+        stats['saved_seconds'] = stats['gated'] * (stats['avg_model_seconds'] or 0.0)
+        return stats
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Stub OpenAI Server
+==================
+Local HTTP server that imitates the chat completions endpoint, so the
+analyzer can be exercised and timed without an API key or network.
+
+Usage:
+    python stub_openai_server.py            # serves on http://127.0.0.1:8765/v1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python ai_analyzer.py
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = "RECOMMENDATION: WAIT\nRISK_LEVEL: LOW\nREASONING: Stub response."
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    """Answers POST /v1/chat/completions with a canned completion."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out as separate writes; avoid Nagle/delayed-ACK stalls
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.stats_lock:
+            self.server.stats['connections'] += 1
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+
+        with self.server.stats_lock:
+            self.server.stats['requests'] += 1
+            self.server.stats['last_request'] = body
+            attempt = self.server.stats['requests']
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if not self.path.endswith('/chat/completions'):
+            self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+        if attempt <= self.server.fail_first:
+            self._send(503, {'error': {'message': 'Stub overloaded', 'type': 'server_error'}})
+            return
+
+        reply = self.server.reply(body) if callable(self.server.reply) else self.server.reply
+        self._send(200, {
+            'id': f'chatcmpl-stub-{attempt}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': reply},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled or timed out
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(host='127.0.0.1', port=0, latency=0.0, reply=DEFAULT_REPLY, fail_first=0):
+    """
+    Start the stub server on a background thread.
+
+    Args:
+        host (str): Bind address
+        port (int): Port, 0 picks a free one
+        latency (float): Seconds to wait before answering each request
+        reply (str or callable): Completion text, or a function of the request body
+        fail_first (int): Answer the first N requests with HTTP 503 (to exercise retries)
+
+    Returns:
+        tuple: (server, base_url); call server.shutdown() to stop it.
+               server.stats counts connections and requests.
+    """
+    server = ThreadingHTTPServer((host, port), StubChatHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.reply = reply
+    server.fail_first = fail_first
+    server.stats = {'connections': 0, 'requests': 0, 'last_request': None}
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    server, base_url = start_stub_server(port=8765)
+    print(f"🧪 Stub chat completions server at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Analyzer tests against the local stub server (run with pytest).
+"""
+
+import asyncio
+import inspect
+
+import pytest
+
+from stub_openai_server import start_stub_server
+
+RESPONSE_FORMAT = {'type': 'json_schema', 'json_schema': {'name': 'test', 'schema': {'type': 'object'}}}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, base_url = start_stub_server(reply='BUY')
+    monkeypatch.setenv('OPENAI_BASE_URL', base_url)
+    monkeypatch.setenv('OPENAIKEY', 'stub')
+    yield server
+    server.shutdown()
+
+
+def sent_text(request):
+    parts = []
+    for message in request['messages']:
+        content = message['content']
+        parts.extend([content] if isinstance(content, str) else
+                     [part.get('text', '') for part in content if part['type'] == 'text'])
+    return "\n".join(parts)
+
+
+def test_async_analyzer_is_not_a_sync_analyzer():
+    from ai_analyzer import ImageAnalyzer, AsyncImageAnalyzer
+
+    assert not issubclass(AsyncImageAnalyzer, ImageAnalyzer)
+    for name in ('request', 'complete', 'analyze', 'close'):
+        assert not inspect.iscoroutinefunction(getattr(ImageAnalyzer, name))
+        assert inspect.iscoroutinefunction(getattr(AsyncImageAnalyzer, name))
+
+
+def test_sync_and_async_analyzers_share_client_settings(stub):
+    from ai_analyzer import ImageAnalyzer, AsyncImageAnalyzer
+
+    sync = ImageAnalyzer(timeout=7, connect_timeout=2, max_retries=1)
+    assert sync.complete([{'role': 'user', 'content': 'hi'}]) == 'BUY'
+    sync.close()
+
+    async def run():
+        analyzer = AsyncImageAnalyzer(timeout=7, connect_timeout=2, max_retries=1)
+        assert (analyzer.timeout, analyzer.client.max_retries) == (sync.timeout, sync.client.max_retries)
+        try:
+            return await analyzer.complete([{'role': 'user', 'content': 'hi'}])
+        finally:
+            await analyzer.close()
+    assert asyncio.run(run()) == 'BUY'
+
+
+def test_sync_wrapper_forwards_mode_context_and_format(stub):
+    from ai_analyzer import analyze_image_sync
+
+    assert analyze_image_sync(None, None, deadline=10, response_format=RESPONSE_FORMAT,
+                              context_text='CONTEXT-MARKER', mode='text') == 'BUY'
+    request = stub.stats['last_request']
+    assert request['response_format'] == RESPONSE_FORMAT
+    assert 'CONTEXT-MARKER' in sent_text(request)
+
+
+def test_variants_forward_mode_context_and_format(stub):
+    from ai_analyzer import AsyncImageAnalyzer, analyze_variants_async
+
+    async def run():
+        analyzer = AsyncImageAnalyzer()
+        try:
+            return await analyze_variants_async(
+                [{'name': 'text', 'context_text': 'VARIANT-MARKER'}], analyzer=analyzer,
+                response_format=RESPONSE_FORMAT, mode='text')
+        finally:
+            await analyzer.close()
+    assert asyncio.run(run()) == [{'name': 'text', 'analysis': 'BUY'}]
+    request = stub.stats['last_request']
+    assert request['response_format'] == RESPONSE_FORMAT
+    assert 'VARIANT-MARKER' in sent_text(request)
+
+
+def test_analyze_image_without_an_image_returns_none(capsys):
+    from ai_analyzer import analyze_image
+
+    assert analyze_image() is None
+    assert analyze_image(image_data=b'\x89PNG') is None
+    assert capsys.readouterr().out.count("❌") == 2
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Analysis cache tests (run with pytest).
+"""
+
+from analysis_cache import AnalysisCache
+
+
+def test_callers_cannot_change_the_cached_result():
+    cache = AnalysisCache()
+    result = {'recommendation': 'BUY', 'entry_price': 58.42, 'levels': [58.30, 58.70]}
+    cache.put('data', 'prompt', result)
+    result['from_cache'] = False
+    result['levels'].append(0.0)
+
+    first = cache.get('data', 'prompt')
+    assert first == {'recommendation': 'BUY', 'entry_price': 58.42, 'levels': [58.30, 58.70]}
+    first['from_cache'] = True
+    first['levels'].clear()
+
+    assert cache.get('data', 'prompt') == {'recommendation': 'BUY', 'entry_price': 58.42,
+                                           'levels': [58.30, 58.70]}
+
+
+def test_perceptual_match_needs_the_same_last_bar():
+    cache = AnalysisCache(max_image_distance=2)
+    cache.put('data', 'prompt', {'recommendation': 'WAIT'}, image_hash=0b1011, last_bar=(1.0, 2.0, 0.5, 1.5))
+    assert cache.get('other', 'prompt', 0b1010, (1.0, 2.0, 0.5, 1.5)) == {'recommendation': 'WAIT'}
+    assert cache.get('other', 'prompt', 0b1010, (1.0, 2.0, 0.5, 1.6)) is None
+
+    # Off by default
+    cache = AnalysisCache()
+    cache.put('data', 'prompt', {'recommendation': 'WAIT'}, image_hash=0b1011, last_bar=(1.0, 2.0, 0.5, 1.5))
+    assert cache.get('other', 'prompt', 0b1011, (1.0, 2.0, 0.5, 1.5)) is None
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Analysis parser tests (run with pytest).
+
+The fuzz test feeds mutated and truncated model outputs to parse_analysis:
+every input must either parse into a valid result or raise
+AnalysisParseError; any other exception is a parser bug.
+"""
+
+import random
+
+import pytest
+
+from analysis_parser import parse_analysis, AnalysisParseError, RECOMMENDATIONS, RISK_LEVELS
+
+SAMPLES = {
+    'json': '{"RECOMMENDATION": "BUY", "RISK_LEVEL": "LOW", "ENTRY_PRICE": 58.42, "STOP_LOSS": 58.30, '
+            '"TAKE_PROFIT": 58.70, "CONFIDENCE": 7, "REASONING": "EMA5 crossed above SMA8 at the pivot."}',
+    'fenced': 'Here is my analysis:\n```json\n{"recommendation": "WAIT", "risk_level": "HIGH", '
+              '"entry_price": null, "stop_loss": null, "take_profit": null, "confidence": 4, '
+              '"reasoning": "Chop under SMA8."}\n```',
+    'lines': '1. **RECOMMENDATION**: BUY\n2. RISK_LEVEL: Medium\n3. ENTRY_PRICE: $58.42\n'
+             '4. STOP_LOSS: $58.30\n5. TAKE_PROFIT: $58.70\n6. CONFIDENCE: 7/10\n'
+             '7. REASONING: Bounce off the daily pivot.',
+}
+
+JUNK = ['', ' ', '{', '}', '[', ']', '"', ':', ',', 'null', 'NaN', 'Infinity', '-1', '0', '1e309',
+        '$', 'BUY', 'SELL', 'true', '\n', '```', '**', 'CONFIDENCE: 11', 'ENTRY_PRICE: abc',
+        'RISK_LEVEL: EXTREME', '{"RECOMMENDATION": []}', '\x00', '🐾', '58.90', '58.10']
+
+
+def mutate(text, rng):
+    for _ in range(rng.randint(1, 4)):
+        action = rng.random()
+        position = rng.randint(0, len(text))
+        if action < 0.3:
+            text = text[:position]
+        elif action < 0.6:
+            text = text[:position] + rng.choice(JUNK) + text[position:]
+        elif action < 0.8:
+            end = min(len(text), position + rng.randint(1, 10))
+            text = text[:position] + text[end:]
+        else:
+            text = text.replace(rng.choice(['BUY', 'WAIT', 'LOW', '58', '7', '"', ':']), rng.choice(JUNK), 1)
+    return text
+
+
+def assert_valid(result):
+    assert result['recommendation'] in RECOMMENDATIONS
+    assert result['risk_level'] in RISK_LEVELS
+    assert 1 <= result['confidence'] <= 10
+    for field in ('entry_price', 'stop_loss', 'take_profit'):
+        assert result[field] is None or result[field] > 0
+    if result['recommendation'] == 'BUY':
+        entry = result['entry_price']
+        assert entry is not None
+        assert result['stop_loss'] is None or result['stop_loss'] < entry
+        assert result['take_profit'] is None or result['take_profit'] > entry
+
+
+@pytest.mark.parametrize('name', sorted(SAMPLES))
+def test_samples_parse(name):
+    assert_valid(parse_analysis(SAMPLES[name]))
+
+
+def test_fuzzed_input_parses_or_raises_analysis_parse_error():
+    rng = random.Random(11)
+    samples = list(SAMPLES.values())
+    outcomes = {'parsed': 0, 'rejected': 0}
+    for _ in range(20000):
+        text = mutate(rng.choice(samples), rng)
+        try:
+            result = parse_analysis(text)
+        except AnalysisParseError:
+            outcomes['rejected'] += 1
+            continue
+        except Exception as e:
+            raise AssertionError(f"parse_analysis raised {type(e).__name__} for {text!r}") from e
+        assert_valid(result)
+        outcomes['parsed'] += 1
+    # Both paths must actually be exercised
+    assert outcomes['parsed'] > 1000 and outcomes['rejected'] > 1000
+
+
+@pytest.mark.parametrize('text', [None, 42, '', 'I cannot help with that.', '{"RECOMMENDATION": "SELL"}'])
+def test_unusable_responses_are_rejected(text):
+    with pytest.raises(AnalysisParseError):
+        parse_analysis(text)
+
+
+@pytest.mark.parametrize('stop, target', [(58.50, 58.70), (58.42, 58.70), (58.30, 58.40), (58.30, 58.42)])
+def test_buy_levels_must_be_ordered(stop, target):
+    text = (f'{{"RECOMMENDATION": "BUY", "RISK_LEVEL": "LOW", "ENTRY_PRICE": 58.42, "STOP_LOSS": {stop}, '
+            f'"TAKE_PROFIT": {target}, "CONFIDENCE": 7, "REASONING": "x"}}')
+    with pytest.raises(AnalysisParseError):
+        parse_analysis(text)
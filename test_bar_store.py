@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Bar store tests (run with pytest).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, LocalProvider
+
+
+def make_bars(days=7, interval='5min'):
+    end = pd.Timestamp.now(tz='UTC').floor(interval)
+    index = pd.date_range(end=end, periods=int(pd.Timedelta(days=days) / pd.Timedelta(interval)),
+                          freq=interval, tz='UTC').tz_convert('America/New_York')
+    close = 10 + np.cumsum(np.full(len(index), 0.01))
+    return pd.DataFrame({'Open': close, 'High': close + 0.05, 'Low': close - 0.05, 'Close': close,
+                         'Volume': 100}, index=pd.DatetimeIndex(index, name='Datetime'))
+
+
+def test_second_sync_only_requests_bars_after_the_last_stored_one(tmp_path):
+    store = BarStore(os.path.join(tmp_path, 'bars.sqlite'))
+    provider = LocalProvider(make_bars())
+
+    first, received = store.sync('TEST', '5m', 2, provider)
+    assert received == len(first) > 0
+    last = store.last_timestamp('TEST', '5m')
+
+    provider.calls.clear()
+    window, _ = store.sync('TEST', '5m', 2, provider)
+    assert len(provider.calls) == 1
+    assert pd.Timestamp(provider.calls[0]['start']) == last
+    assert window.index[-1] == first.index[-1]
+
+
+def test_longer_window_backfills_the_missing_head(tmp_path):
+    store = BarStore(os.path.join(tmp_path, 'bars.sqlite'))
+    bars = make_bars()
+    provider = LocalProvider(bars)
+
+    short, _ = store.sync('TEST', '5m', 2, provider)
+    last = store.last_timestamp('TEST', '5m')
+    provider.calls.clear()
+    window, _ = store.sync('TEST', '5m', 5, provider)
+
+    assert len(provider.calls) == 2
+    backfill, delta = provider.calls
+    assert pd.Timestamp(backfill['start']) < pd.Timestamp(backfill['end']) <= short.index[0]
+    assert pd.Timestamp(delta['start']) == last
+    assert window.index[0] - bars.index[0] > pd.Timedelta(days=1.9)
+    assert window.index[-1] - window.index[0] > pd.Timedelta(days=4.9)
+
+    # The head is only fetched once
+    provider.calls.clear()
+    store.sync('TEST', '5m', 5, provider)
+    assert len(provider.calls) == 1
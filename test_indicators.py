@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Indicator engine parity tests against pandas (run with pytest).
+
+fetch_bitx_data computed EMA5 as ewm(span=5).mean() and SMA8 as
+rolling(window=8).mean() before the engine existed; the engine must
+reproduce both over whatever window it is given.
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import IndicatorEngine
+
+
+def make_bars(count=300, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 10 + np.cumsum(rng.normal(0, 0.05, count))
+    index = pd.date_range('2024-03-04 09:30', periods=count, freq='5min', tz='America/New_York')
+    return pd.DataFrame({'Open': close, 'High': close + 0.05, 'Low': close - 0.05, 'Close': close,
+                         'Volume': 100}, index=pd.DatetimeIndex(index, name='Datetime'))
+
+
+def assert_matches_pandas(values, frame):
+    expected_ema = frame['Close'].ewm(span=5).mean()
+    expected_sma = frame['Close'].rolling(window=8).mean()
+    assert values.index.equals(frame.index)
+    pd.testing.assert_series_equal(values['EMA5'], expected_ema, check_names=False, rtol=1e-10)
+    pd.testing.assert_series_equal(values['SMA8'], expected_sma, check_names=False, rtol=1e-10)
+
+
+def test_growing_window_matches_pandas():
+    bars = make_bars()
+    engine = IndicatorEngine()
+    for end in range(100, len(bars) + 1, 7):
+        assert_matches_pandas(engine.apply(bars.iloc[:end]), bars.iloc[:end])
+
+
+def test_revised_last_bar_matches_pandas():
+    bars = make_bars()
+    engine = IndicatorEngine()
+    engine.apply(bars.iloc[:200])
+    for close in (9.0, 11.5, float(bars['Close'].iat[199])):
+        revised = bars.iloc[:200].copy()
+        revised.iloc[-1, revised.columns.get_loc('Close')] = close
+        assert_matches_pandas(engine.apply(revised), revised)
+    grown = bars.iloc[:205]
+    assert_matches_pandas(engine.apply(grown), grown)
+
+
+def test_sliding_window_matches_pandas():
+    bars = make_bars()
+    engine = IndicatorEngine()
+    for start in range(0, 150, 3):
+        window = bars.iloc[start:start + 150]
+        assert_matches_pandas(engine.apply(window), window)
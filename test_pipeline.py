@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Analysis pipeline lifecycle tests (run with pytest).
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, LocalProvider
+from pipeline import AnalysisPipeline, STAGES
+
+
+def make_bars(count=300):
+    end = pd.Timestamp.now(tz='UTC').floor('5min')
+    index = pd.date_range(end=end, periods=count, freq='5min', tz='UTC').tz_convert('America/New_York')
+    close = 10 + np.cumsum(np.random.default_rng(3).normal(0, 0.02, count))
+    return pd.DataFrame({'Open': close, 'High': close + 0.05, 'Low': close - 0.05, 'Close': close,
+                         'Volume': 100}, index=pd.DatetimeIndex(index, name='Datetime'))
+
+
+class Charts:
+    """Listener that lets a test wait for the chart event of a cycle."""
+
+    def __init__(self):
+        self.events = {}
+        self.condition = threading.Condition()
+
+    def __call__(self, event, cycle):
+        with self.condition:
+            self.events.setdefault(cycle['id'], []).append(event)
+            self.condition.notify_all()
+
+    def wait(self, cycle, timeout=30):
+        with self.condition:
+            self.condition.wait_for(lambda: 'chart' in self.events.get(cycle['id'], ())
+                                    or 'error' in self.events.get(cycle['id'], ()), timeout)
+            return self.events.get(cycle['id'], [])
+
+
+def test_pipeline_runs_again_after_stop_and_start(tmp_path):
+    charts = Charts()
+    store = BarStore(os.path.join(tmp_path, 'bars.sqlite'))
+    pipeline = AnalysisPipeline('TEST', '5m', 2, listener=charts, store=store,
+                                provider=LocalProvider(make_bars()), output_dir=str(tmp_path), persist=False,
+                                analyze=False)
+    pipeline.start()
+    assert 'chart' in charts.wait(pipeline.submit())
+    workers = list(pipeline._threads)
+
+    pipeline.stop()
+    assert not any(thread.is_alive() for thread in workers)
+
+    pipeline.start()
+    assert all(not pipeline.queues[stage].closed for stage in STAGES)
+    assert 'chart' in charts.wait(pipeline.submit())
+    pipeline.stop()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tick scheduler tests (run with pytest).
+"""
+
+import math
+import threading
+import time
+
+from scheduler import TickScheduler, next_boundary
+
+
+def test_next_boundary_is_the_next_period_multiple_plus_offset():
+    for now in (0.0, 59.9, 60.0, 61.99, 62.0, 62.01, 1_700_000_000.5):
+        tick = next_boundary(now, period=60, offset=2.0)
+        assert now < tick <= now + 60
+        assert math.isclose((tick - 2.0) % 60, 0.0, abs_tol=1e-6)
+
+
+def test_idle_scheduler_does_not_wake_up():
+    for running in (False, True):
+        scheduler = TickScheduler(lambda: None, period=60, offset=0, auto=False)
+        if running:
+            scheduler.start()
+        time.sleep(0.05)
+        baseline = dict(scheduler.stats)
+        time.sleep(1.0)
+        assert scheduler.stats['wakeups'] == baseline['wakeups']
+        assert scheduler.stats['ticks'] == 0
+        scheduler.close()
+
+
+def test_ticks_fall_on_boundaries_with_one_wakeup_each():
+    period, offset, seconds = 0.25, 0.05, 2.0
+    fired = []
+    lock = threading.Lock()
+
+    def record():
+        with lock:
+            fired.append(time.time())
+
+    scheduler = TickScheduler(record, period=period, offset=offset, auto=True)
+    scheduler.start()
+    time.sleep(seconds)
+    scheduler.close()
+
+    ticks = scheduler.stats['ticks']
+    assert abs(ticks - seconds / period) <= 1
+    # One wakeup per tick, plus the start() and close() notifications and an early wakeup or two
+    assert scheduler.stats['wakeups'] <= ticks + 4
+    for when in fired:
+        boundary = next_boundary(when, period, offset) - period
+        assert 0 <= when - boundary < 0.1, f"tick {when - boundary:.3f}s after its boundary"
+    assert len(set(round((when - offset) / period) for when in fired)) == len(fired)
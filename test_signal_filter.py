@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Signal pre-filter tests (run with pytest).
+"""
+
+import datetime
+
+import pandas as pd
+
+from signal_filter import classify
+
+YESTERDAY = datetime.date(2024, 3, 4)
+TODAY = datetime.date(2024, 3, 5)
+
+
+def make_bars(dates, close, ema5, sma8):
+    return pd.DataFrame({'Date': dates, 'Close': close, 'EMA5': ema5, 'SMA8': sma8})
+
+
+def test_cross_over_the_overnight_gap_is_not_a_candidate():
+    # EMA5 below SMA8 on yesterday's last bar, above it from today's first bar on
+    bars = make_bars([YESTERDAY, TODAY, TODAY, TODAY],
+                     [10.0, 10.5, 10.6, 10.7], [9.9, 10.4, 10.5, 10.6], [10.0, 10.2, 10.3, 10.4])
+    signal = classify(bars)
+    assert signal['level'] == 'watch'
+    assert "EMA5 crossed above SMA8" not in signal['reasons']
+
+
+def test_cross_inside_the_session_is_a_candidate():
+    bars = make_bars([YESTERDAY, TODAY, TODAY, TODAY],
+                     [10.0, 10.1, 10.5, 10.6], [9.9, 9.9, 10.4, 10.5], [10.0, 10.0, 10.2, 10.3])
+    signal = classify(bars)
+    assert signal['level'] == 'candidate'
+    assert "EMA5 crossed above SMA8" in signal['reasons']
+
+
+def test_pivot_reclaim_over_the_overnight_gap_is_not_a_candidate():
+    pivots = {'P': 10.0, 'R1': 12.0, 'S1': 8.0}
+    bars = make_bars([YESTERDAY, TODAY, TODAY, TODAY],
+                     [9.9, 10.5, 10.5, 10.5], [10.0, 10.0, 10.0, 10.0], [10.5, 10.5, 10.5, 10.5])
+    signal = classify(bars, pivots)
+    assert signal['level'] == 'no_setup'
+    assert "close reclaimed the pivot" not in signal['reasons']
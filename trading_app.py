@@ -12,19 +12,39 @@ import os
 from datetime import datetime
 import threading
 import time
-from PIL import Image, ImageTk
+import math
+from PIL import ImageTk
 import pyttsx3
 
 # Import existing modules
-from make_chart import generate_bitx_chart
-from ai_analyzer import analyze_image
+from ai_analyzer import CONTEXT_MODES, DEFAULT_CONTEXT_MODE
+from analysis_cache import get_analysis_cache
+from engine import (TradingEngine, ANALYSIS_DEADLINE_SECONDS, CYCLE_PERIOD_SECONDS,
+                    DEFAULT_SYSTEM_PROMPT, DEFAULT_USER_PROMPT)
+from ui_bus import UpdateBus, DEFAULT_FRAME_MS
+from trading_feed import FeedModel, DEFAULT_PAGE_SIZE
+from debug_logger import get_logger
+from metrics import get_metrics
+from signal_filter import LEVELS as SIGNAL_LEVELS, DEFAULT_MIN_LEVEL
+
+# Feed entries kept in the widget (older ones spill to data/feed_history/) and chart images kept alive
+FEED_MAX_ENTRIES = 400
+FEED_MAX_IMAGES = 5
+
+# How often the Debug tab's performance panel refreshes (and samples RSS), and where exports go
+METRICS_REFRESH_MS = 2000
+METRICS_EXPORT_PATHS = {'json': os.path.join('data', 'metrics.json'),
+                        'prometheus': os.path.join('data', 'metrics.prom')}
 
 class AnimalRescueTrader:
     def __init__(self, root):
         self.root = root
         self.setup_window()
         self.setup_variables()
+        self.setup_pipeline()
         self.setup_ui()
+        self.process_updates()  # start draining worker updates
+        self.refresh_performance()
         self.setup_tts()
         self.load_prompts()
         self.initialize_trading()  # Automatically start with first chart
@@ -35,12 +55,8 @@ class AnimalRescueTrader:
         self.add_to_feed("🚀 INITIALIZING TRADING SYSTEM...")
         self.add_to_feed("🐾 Loading first BITX analysis to start saving animals...")
         
-        # Start first analysis in background thread
-        def startup_analysis():
-            time.sleep(1)  # Brief delay to let UI settle
-            self.perform_single_analysis()
-            
-        threading.Thread(target=startup_analysis, daemon=True).start()
+        # Start first analysis once the UI has settled (the pipeline runs it in the background)
+        self.root.after(1000, self.perform_single_analysis)
         
     def setup_window(self):
         """Configure the main window"""
@@ -60,10 +76,43 @@ class AnimalRescueTrader:
         self.take_profit_var = tk.StringVar(value="--")
         self.confidence_var = tk.StringVar(value="--")
         self.status_var = tk.StringVar(value="Ready to analyze BITX")
+        self.cache_stats_var = tk.StringVar(value="Analysis cache: no lookups yet")
+        self.context_mode_var = tk.StringVar(value=DEFAULT_CONTEXT_MODE)
+        self.perf_var = tk.StringVar(value="No spans measured yet")
+        self.prefilter_stats_var = tk.StringVar(value="Pre-filter: no cycles yet")
+        self.prefilter_level_var = tk.StringVar(value=DEFAULT_MIN_LEVEL)
+        self.metrics = get_metrics()
+        
+        # Feed entries shown in the widget, older ones on disk
+        self.feed = FeedModel(FEED_MAX_ENTRIES)
         
         # Initialize chart image storage
         self.chart_images = []
         
+        # Pending root.after id of the countdown (one chain at most)
+        self.countdown_job = None
+        
+        # Worker threads post GUI updates here; the Tk thread applies them per frame
+        self.bus = UpdateBus()
+        self.tk_thread = threading.current_thread()
+        self.feed_pending = []
+        self.debug_pending = []
+        
+        # Structured debug records are written to debug.jsonl by a background thread
+        self.logger = get_logger()
+        
+    def setup_pipeline(self):
+        """Create the headless engine (staged pipeline + minute-close scheduler) this GUI drives"""
+        # Pipeline events are handled on the Tk thread
+        self.engine = TradingEngine(
+            "BITX",
+            period=CYCLE_PERIOD_SECONDS,
+            deadline=ANALYSIS_DEADLINE_SECONDS,
+            auto=self.auto_refresh.get(),
+            listener=lambda event, cycle: self.bus.post('pipeline', (event, cycle)),
+            logger=self.logger
+        )
+        
     def setup_ui(self):
         """Create the main user interface"""
         # Create notebook for tabs
@@ -103,10 +152,23 @@ class AnimalRescueTrader:
             control_frame,
             text="Auto-Refresh (1 min)",
             variable=self.auto_refresh,
+            command=self.on_auto_refresh_changed,
             font=('Arial', 10)
         )
         auto_check.pack(side='left', padx=10)
         
+        # What the model is shown: chart image, bar numbers, or both
+        tk.Label(control_frame, text="AI input:", font=('Arial', 10)).pack(side='left')
+        context_combo = ttk.Combobox(
+            control_frame,
+            textvariable=self.context_mode_var,
+            values=CONTEXT_MODES,
+            state='readonly',
+            width=8
+        )
+        context_combo.pack(side='left', padx=5)
+        context_combo.bind('<<ComboboxSelected>>', self.on_context_mode_changed)
+        
         # Countdown timer
         countdown_label = tk.Label(
             control_frame,
@@ -157,7 +219,16 @@ class AnimalRescueTrader:
             fg='#00ff00',  # Green text (terminal style)
             insertbackground='#00ff00'  # Green cursor
         )
-        self.trading_feed.pack(fill='both', expand=True, padx=10, pady=10)
+        self.trading_feed.pack(fill='both', expand=True, padx=10, pady=(10, 0))
+        
+        # Older entries leave the widget; they can be paged back in here
+        history_btn = tk.Button(
+            feed_frame,
+            text="📜 Feed History",
+            command=self.open_feed_history,
+            font=('Arial', 9)
+        )
+        history_btn.pack(anchor='e', padx=10, pady=5)
         
         # Add welcome message
         welcome_msg = """
@@ -170,8 +241,7 @@ Every BUY signal could mean another animal saved! 💙
 Waiting for first analysis...
 
 """
-        self.trading_feed.insert('1.0', welcome_msg)
-        self.trading_feed.see(tk.END)
+        self.add_to_feed(welcome_msg)
         
     def create_system_prompt_tab(self):
         """Create system prompt editing tab"""
@@ -252,6 +322,55 @@ Waiting for first analysis...
         )
         instructions.pack(pady=5)
         
+        # Analysis cache counters
+        cache_frame = ttk.LabelFrame(debug_frame, text="🗃️ Analysis Cache")
+        cache_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(
+            cache_frame,
+            textvariable=self.cache_stats_var,
+            font=('Consolas', 9),
+            anchor='w'
+        ).pack(fill='x', padx=5, pady=2)
+        
+        # Signal pre-filter: how many scheduled cycles never reached the model
+        prefilter_frame = ttk.LabelFrame(debug_frame, text="🚦 Signal Pre-filter")
+        prefilter_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(
+            prefilter_frame,
+            textvariable=self.prefilter_stats_var,
+            font=('Consolas', 9),
+            anchor='w'
+        ).pack(side='left', fill='x', expand=True, padx=5, pady=2)
+        level_combo = ttk.Combobox(
+            prefilter_frame,
+            textvariable=self.prefilter_level_var,
+            values=('off',) + SIGNAL_LEVELS,
+            state='readonly',
+            width=10
+        )
+        level_combo.pack(side='right', padx=5)
+        level_combo.bind('<<ComboboxSelected>>', self.on_prefilter_level_changed)
+        tk.Label(prefilter_frame, text="Send to AI from:", font=('Arial', 9)).pack(side='right')
+        
+        # Span percentiles and memory, refreshed every METRICS_REFRESH_MS
+        perf_frame = ttk.LabelFrame(debug_frame, text="📈 Performance (ms, rolling window)")
+        perf_frame.pack(fill='x', padx=10, pady=5)
+        tk.Label(
+            perf_frame,
+            textvariable=self.perf_var,
+            font=('Consolas', 9),
+            anchor='w',
+            justify='left'
+        ).pack(side='left', fill='x', expand=True, padx=5, pady=2)
+        export_frame = tk.Frame(perf_frame)
+        export_frame.pack(side='right', padx=5)
+        tk.Button(export_frame, text="💾 Export JSON", font=('Arial', 9),
+                  command=lambda: self.export_metrics('json')).pack(fill='x', pady=1)
+        tk.Button(export_frame, text="💾 Export Prometheus", font=('Arial', 9),
+                  command=lambda: self.export_metrics('prometheus')).pack(fill='x', pady=1)
+        tk.Button(export_frame, text="🔄 Reset", font=('Arial', 9),
+                  command=self.reset_metrics).pack(fill='x', pady=1)
+        
         # Debug output area
         self.debug_text = scrolledtext.ScrolledText(
             debug_frame,
@@ -284,79 +403,140 @@ Waiting for first analysis...
             
     def load_prompts(self):
         """Load default prompts into text areas"""
-        # Default system prompt
-        system_prompt = """You are a professional day trader with 20+ years of experience specializing in quick scalping trades. 
-
-Your expertise includes:
-- Identifying optimal entry/exit points for 0.10-0.50 cent moves
-- EMA/SMA crossover strategies (5 EMA, 8 SMA)
-- Daily pivot point analysis
-- Risk assessment for short-term trades
-- Stop loss and take profit targeting
-
-Analyze the provided 1-minute BITX candlestick chart and provide:
-1. RECOMMENDATION: "BUY" or "WAIT" 
-2. RISK_LEVEL: "LOW", "MEDIUM", or "HIGH"
-3. ENTRY_PRICE: Optimal entry point
-4. STOP_LOSS: Maximum acceptable loss price
-5. TAKE_PROFIT: Target profit-taking price
-6. CONFIDENCE: Your confidence level (1-10)
-7. REASONING: Brief explanation of your analysis
-
-Focus on EMA5/SMA8 crossovers and daily pivot levels for scalping opportunities.
-Remember: We're trading to save animal lives - precision and safety are paramount."""
-        
-        self.system_text.insert('1.0', system_prompt)
-        
-        # Default user prompt
-        user_prompt = """Analyze this BITX 1-minute chart for day trading opportunities.
-
-Current market conditions:
-- Look for EMA5/SMA8 crossover signals
-- Identify daily pivot point levels
-- Assess volume and momentum
-- Consider risk/reward ratio for quick scalp trades
-
-Provide clear BUY or WAIT recommendation with specific entry, stop loss, and take profit prices.
-Target profit: $0.10-$0.50 per share moves.
-
-This analysis will help fund animal rescue operations - accuracy is critical for saving lives."""
-        
-        self.user_text.insert('1.0', user_prompt)
-        
-    def log_debug(self, message):
-        """Add message to debug log with timestamp"""
+        # Same defaults the headless engine starts with
+        self.system_text.insert('1.0', DEFAULT_SYSTEM_PROMPT)
+        self.user_text.insert('1.0', DEFAULT_USER_PROMPT)
+        
+        # Prompts used by the pipeline's analysis stage (Tk widgets are main-thread only)
+        self.engine.configure(system_prompt=DEFAULT_SYSTEM_PROMPT, user_prompt=DEFAULT_USER_PROMPT)
+        
+    def log_debug(self, message, level='info', **fields):
+        """
+        Add message to debug log with timestamp (any thread; shown on the next frame).
+        
+        Args:
+            message (str): Text for the Debug tab
+            level (str): Record level in debug.jsonl
+            **fields: Extra record fields (e.g. cycle id and stage timings)
+        """
+        self.logger.log(message, level, **fields)
         timestamp = datetime.now().strftime("%H:%M:%S")
         log_message = f"[{timestamp}] {message}\n"
         
-        # Display in UI
-        self.debug_text.insert(tk.END, log_message)
+        if threading.current_thread() is self.tk_thread:
+            self.debug_pending.append(log_message)
+        else:
+            self.bus.post('debug', log_message)
+        
+    def process_updates(self):
+        """Apply queued worker updates in one batch, then re-arm for the next frame (Tk thread)"""
+        start = time.perf_counter()
+        busy = len(self.bus) or self.feed_pending or self.debug_pending
+        self.bus.drain(self.handle_update)
+        self.flush_feed()
+        self.flush_debug()
+        if busy:
+            self.metrics.observe('gui.frame', time.perf_counter() - start)
+        self.root.after(DEFAULT_FRAME_MS, self.process_updates)
+        
+    def handle_update(self, topic, payload):
+        """Apply one update from the bus"""
+        if topic == 'feed':
+            self.feed_pending.append(payload)
+        elif topic == 'debug':
+            self.debug_pending.append(payload)
+        elif topic == 'pipeline':
+            self.on_pipeline_event(*payload)
+            
+    def flush_debug(self):
+        """Write pending debug lines to the Debug tab in one edit (the logger handles the file)"""
+        if not self.debug_pending:
+            return
+        lines = "".join(self.debug_pending)
+        self.debug_pending = []
+        
+        self.debug_text.insert(tk.END, lines)
         self.debug_text.see(tk.END)
         
-        # Also write to debug.txt file
+    def on_context_mode_changed(self, event=None):
+        """Use the selected context mode from the next analysis on"""
+        mode = self.context_mode_var.get()
+        self.engine.configure(context_mode=mode)
+        self.log_debug(f"🧮 AI input mode set to {mode}")
+        
+    def refresh_cache_stats(self):
+        """Show analysis cache hit/miss counters in the Debug tab"""
+        stats = get_analysis_cache().stats()
+        self.cache_stats_var.set(
+            f"Analysis cache: {stats['hits']} hits ({stats['image_hits']} by image) / "
+            f"{stats['misses']} misses | hit rate {stats['hit_rate']:.0%} | "
+            f"{stats['entries']} entries, {stats['evictions']} evicted, {stats['expired']} expired | "
+            f"saved ~{stats['saved_seconds']:.1f}s of model time"
+        )
+        
+    def on_prefilter_level_changed(self, event=None):
+        """Gate scheduled AI calls at the selected signal level from the next cycle on"""
+        level = self.prefilter_level_var.get()
+        self.engine.prefilter.configure(min_level=None if level == 'off' else level)
+        self.log_debug(f"🚦 Pre-filter gate set to {level}")
+        
+    def refresh_prefilter_stats(self):
+        """Show the pre-filter's gated fraction and the model time it saved"""
+        stats = self.engine.prefilter.stats()
+        average = f"{stats['avg_model_seconds']:.1f}s" if stats['avg_model_seconds'] is not None else "--"
+        self.prefilter_stats_var.set(
+            f"Pre-filter: {stats['gated']} of {stats['gated'] + stats['passed']} scheduled cycles gated "
+            f"({stats['gated_fraction']:.0%}) | bars: {stats['candidate']} candidate / {stats['watch']} watch / "
+            f"{stats['no_setup']} no setup | saved ~{stats['saved_seconds']:.1f}s of model time "
+            f"(avg call {average})"
+        )
+        
+    def refresh_performance(self):
+        """Sample RSS and redraw the performance panel, then re-arm (Tk thread)"""
+        self.metrics.sample_memory()
+        self.refresh_prefilter_stats()
+        snapshot = self.metrics.snapshot()
+        
+        def ms(value):
+            return f"{value * 1000:8.1f}" if value is not None else "      --"
+        
+        lines = [f"{'span':<22}{'count':>7}{'last':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, stats in snapshot['spans'].items():
+            lines.append(f"{name:<22}{stats['count']:>7} {ms(stats['last'])} {ms(stats['p50'])} "
+                         f"{ms(stats['p95'])} {ms(stats['p99'])} {ms(stats['max'])}")
+        memory = snapshot['memory']
+        if memory['rss'] is not None:
+            lines.append(f"RSS {memory['rss'] / 1e6:.1f} MB (max {memory['rss_max'] / 1e6:.1f} MB over "
+                         f"{memory['samples']} samples)")
+        self.perf_var.set("\n".join(lines) if snapshot['spans'] else "No spans measured yet\n" + "\n".join(lines[1:]))
+        self.root.after(METRICS_REFRESH_MS, self.refresh_performance)
+        
+    def export_metrics(self, fmt):
+        """Write the current metrics snapshot as JSON or Prometheus text"""
         try:
-            with open('debug.txt', 'a', encoding='utf-8') as f:
-                f.write(log_message)
+            path = self.metrics.export(METRICS_EXPORT_PATHS[fmt], fmt)
+            self.log_debug(f"📤 Metrics exported to {path}")
         except Exception as e:
-            # If we can't write to file, at least show in UI
-            error_msg = f"[{timestamp}] ❌ Failed to write to debug.txt: {str(e)}\n"
-            self.debug_text.insert(tk.END, error_msg)
+            self.log_debug(f"❌ Failed to export metrics: {str(e)}", 'error')
+        
+    def reset_metrics(self):
+        """Start the rolling windows over (e.g. after changing the context mode)"""
+        self.metrics.reset()
+        self.log_debug("🔄 Performance metrics reset")
         
     def clear_debug(self):
         """Clear the debug log"""
+        self.debug_pending = []
         self.debug_text.delete('1.0', tk.END)
         
-        # Clear the debug file too
-        try:
-            with open('debug.txt', 'w', encoding='utf-8') as f:
-                f.write("")  # Clear the file
-            self.log_debug("Debug log and file cleared")
-        except Exception as e:
-            self.log_debug(f"❌ Failed to clear debug.txt: {str(e)}")
+        # Start a fresh log file; the old one is kept as debug.jsonl.1
+        self.logger.rotate()
+        self.log_debug("Debug log cleared (previous file rotated)")
         
     def save_system_prompt(self):
         """Save system prompt to file"""
         try:
+            self.engine.configure(system_prompt=self.system_text.get('1.0', 'end-1c'))
             with open('data/system_prompt.txt', 'w') as f:
                 f.write(self.system_text.get('1.0', tk.END))
             self.log_debug("✅ System prompt saved successfully")
@@ -368,6 +548,7 @@ This analysis will help fund animal rescue operations - accuracy is critical for
     def save_user_prompt(self):
         """Save user prompt to file"""
         try:
+            self.engine.configure(user_prompt=self.user_text.get('1.0', 'end-1c'))
             with open('data/user_prompt.txt', 'w') as f:
                 f.write(self.user_text.get('1.0', tk.END))
             self.log_debug("✅ User prompt saved successfully")
@@ -385,9 +566,9 @@ This analysis will help fund animal rescue operations - accuracy is critical for
             self.log_debug("🚀 Trading analysis started - Ready to help save animals!")
             self.status_var.set("Analysis running...")
             
-            # Start the analysis thread
-            self.analysis_thread = threading.Thread(target=self.run_analysis_loop, daemon=True)
-            self.analysis_thread.start()
+            # Start the minute-close ticks
+            self.engine.start()
+            self.start_countdown()
             
         else:
             # Stop trading
@@ -395,125 +576,148 @@ This analysis will help fund animal rescue operations - accuracy is critical for
             self.start_button.config(text="🟢 START TRADING", bg='green')
             self.log_debug("⏹️ Trading analysis stopped")
             self.status_var.set("Ready to analyze BITX")
+            self.engine.stop()  # also drops queued cycles and aborts the in-flight AI request
             
-    def run_analysis_loop(self):
-        """Main analysis loop - runs in separate thread"""
-        while self.is_running.get():
-            try:
-                if self.auto_refresh.get():
-                    # Run full analysis
-                    self.perform_analysis()
-                    
-                    # Countdown timer with feed updates
-                    for i in range(60, 0, -1):
-                        if not self.is_running.get():
-                            break
-                        self.countdown_var.set(str(i))
-                        
-                        # Update feed every 10 seconds with countdown
-                        if i % 10 == 0 and i > 0:
-                            self.root.after(0, lambda: self.add_to_feed(f"⏰ Next analysis in {i} seconds..."))
-                        
-                        time.sleep(1)
-                else:
-                    # Just update countdown without analysis
-                    time.sleep(1)
-                    
-            except Exception as e:
-                self.log_debug(f"❌ Error in analysis loop: {str(e)}")
-                self.root.after(0, lambda: self.add_to_feed(f"❌ Analysis loop error: {str(e)}"))
-                time.sleep(5)  # Wait before retrying
-                
-    def perform_single_analysis(self):
-        """Perform a single analysis cycle (for startup or manual trigger)"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # Use thread-safe GUI updates
-        self.root.after(0, lambda: self.add_to_feed(f"\n[{timestamp}] 🔄 STARTING BITX ANALYSIS CYCLE"))
-        
-        try:
-            # Step 1: Generate BITX chart
-            self.root.after(0, lambda: self.add_to_feed(f"[{timestamp}] 📊 Generating fresh candlestick chart..."))
-            chart_data = generate_bitx_chart("BITX")
+    def on_auto_refresh_changed(self):
+        """Turn the scheduled ticks on or off"""
+        self.engine.set_auto(self.auto_refresh.get())
+        self.start_countdown()
             
-            # Use simple chart.png filename
-            chart_path = "data/chart.png"
+    def start_countdown(self):
+        """Start the countdown display if it is not already running (Tk thread only)"""
+        if self.countdown_job is None:
+            self.update_countdown()
             
-            # Step 2: Display chart in feed  
-            self.root.after(0, lambda: self.display_chart_in_feed(chart_path))
+    def update_countdown(self):
+        """
+        Show the seconds until the next scheduled cycle.
+        
+        Re-arms itself once per displayed second while a tick is scheduled
+        and stops when trading or auto-refresh is turned off.
+        """
+        self.countdown_job = None
+        due = self.engine.next_due
+        if due is None:
+            self.countdown_var.set(str(CYCLE_PERIOD_SECONDS))
+            return
+        
+        remaining = max(0.0, due - time.time())
+        seconds = int(math.ceil(remaining))
+        self.countdown_var.set(str(seconds))
+        
+        # Update feed every 10 seconds with countdown
+        if seconds and seconds % 10 == 0:
+            self.add_to_feed(f"⏰ Next analysis in {seconds} seconds...")
+        
+        # Wake up just after the displayed value changes
+        delay = remaining - (seconds - 1) if seconds else 1.0
+        self.countdown_job = self.root.after(int(delay * 1000) + 10, self.update_countdown)
+        
+    def perform_single_analysis(self, reason='manual'):
+        """Start a single analysis cycle (for startup or manual trigger); results arrive as pipeline events"""
+        self.engine.submit(reason)
+        
+    def on_pipeline_event(self, event, cycle):
+        """
+        Show pipeline progress in the feed (Tk thread only).
+        
+        Args:
+            event (str): 'started', 'chart', 'result', 'dropped' or 'error'
+            cycle (dict): Cycle state from AnalysisPipeline
+        """
+        timestamp = cycle['timestamp']
+        
+        if event == 'started':
+            self.add_to_feed(f"\n[{timestamp}] 🔄 STARTING BITX ANALYSIS CYCLE")
+            self.add_to_feed(f"[{timestamp}] 📊 Generating fresh candlestick chart...")
             
-            # Step 3: Run AI analysis
-            self.root.after(0, lambda: self.add_to_feed(f"[{timestamp}] 🤖 Running AI analysis..."))
+        elif event == 'chart':
+            # Use the in-memory GUI-sized render profile
+            self.display_chart_in_feed(cycle['chart_info']['images']['thumbnail'])
+            self.add_to_feed(f"[{timestamp}] 🤖 Running AI analysis...")
             
-            def run_analysis():
-                analysis_result = self.simulate_ai_analysis()
-                # Update status after analysis
-                self.root.after(0, lambda: self.status_var.set("Analysis complete"))
-                
-            # Run analysis in main thread using after
-            self.root.after(100, run_analysis)
+        elif event == 'result' and cycle.get('gated'):
+            signal = cycle['signal']
+            reasons = ", ".join(signal['reasons']) or "no trigger"
+            level = signal['level'].replace('_', ' ')
+            self.add_to_feed(f"[{timestamp}] 🚦 Pre-filter: {level} ({reasons}) - AI call skipped")
+            self.status_var.set(f"Pre-filter: {level}, AI call skipped")
+            self.log_debug(f"🚦 Cycle {cycle['id']} gated at {signal['level']}: {reasons} "
+                           f"(classified in {signal['seconds'] * 1e6:.0f}µs)",
+                           cycle=cycle['id'], level=signal['level'], latency=round(cycle['latency'], 3))
             
-            self.log_debug("✅ Analysis cycle completed successfully")
+        elif event == 'result':
+            self.apply_analysis(cycle['analysis'], timestamp, from_cache=cycle['from_cache'])
+            timings = " ".join(f"{stage} {seconds:.2f}s" for stage, seconds in cycle['timings'].items())
+            self.log_debug(f"✅ Analysis cycle {cycle['id']} completed in {cycle['latency']:.1f}s ({timings})",
+                           cycle=cycle['id'], latency=round(cycle['latency'], 3), from_cache=cycle['from_cache'],
+                           timings={stage: round(seconds, 4) for stage, seconds in cycle['timings'].items()})
             
-        except Exception as e:
-            error_msg = f"❌ Analysis error: {str(e)}"
-            self.root.after(0, lambda: self.add_to_feed(f"[{timestamp}] {error_msg}"))
-            self.log_debug(error_msg)
+        elif event == 'dropped':
+            self.log_debug(f"⏭️ Cycle {cycle['id']} dropped at {cycle['dropped']['stage']}: {cycle['dropped']['reason']}",
+                           cycle=cycle['id'], stage=cycle['dropped']['stage'])
             
-    def perform_analysis(self):
-        """Perform complete chart generation and AI analysis"""
-        # Delegate to single analysis method
-        self.perform_single_analysis()
+        elif event == 'error':
+            error = cycle['error']
+            if isinstance(error['exception'], TimeoutError):
+                error_msg = f"❌ AI analysis timed out after {ANALYSIS_DEADLINE_SECONDS}s"
+            elif error['stage'] == 'analyze':
+                error_msg = f"❌ AI analysis failed: {error['message']}"
+            else:
+                error_msg = f"❌ Analysis error ({error['stage']}): {error['message']}"
+            self.add_to_feed(f"[{timestamp}] {error_msg}")
+            self.status_var.set("Analysis failed")
+            self.log_debug(error_msg, 'error', cycle=cycle['id'], stage=error['stage'],
+                           timings={stage: round(seconds, 4) for stage, seconds in cycle['timings'].items()})
             
-    def display_chart_in_feed(self, chart_path):
-        """Add the generated chart to the trading feed with embedded image"""
+    def display_chart_in_feed(self, chart_image):
+        """
+        Add the generated chart to the trading feed with embedded image.
+        
+        Args:
+            chart_image (dict): Thumbnail render profile from the chart metadata,
+                                with the PIL image already sized for the feed
+        """
         timestamp = datetime.now().strftime("%H:%M:%S")
         
         try:
-            # Convert to absolute path
-            abs_chart_path = os.path.abspath(chart_path)
-            
-            # Check if chart file exists
-            if not os.path.exists(abs_chart_path):
-                self.add_to_feed(f"[{timestamp}] ❌ Chart generation failed - file not found")
-                return
-            
-            # Get file size for verification
-            file_size = os.path.getsize(abs_chart_path)
-            
             # Add chart info to feed
             self.add_to_feed(f"\n[{timestamp}] 📊 NEW CHART GENERATED")
-            self.add_to_feed(f"               Size: {file_size:,} bytes")
-            self.add_to_feed(f"               Path: {chart_path}")
+            self.add_to_feed(f"               Size: {len(chart_image['data']):,} bytes")
+            if chart_image.get('path'):
+                self.add_to_feed(f"               Path: {chart_image['path']}")
             
-            # Load and resize image for embedding
+            # Embed the already-sized image (no file read, decode or resize)
             try:
-                image = Image.open(abs_chart_path)
+                # Lines queued so far go above the image
+                self.flush_feed()
                 
-                # Resize to fit nicely in the text feed (smaller than before)
-                max_width, max_height = 500, 300  # Smaller for text embedding
-                ratio = min(max_width/image.width, max_height/image.height)
-                new_width = int(image.width * ratio)
-                new_height = int(image.height * ratio)
-                
-                image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                embed_start = time.perf_counter()
+                image = chart_image['image']
+                new_width, new_height = image.size
                 photo = ImageTk.PhotoImage(image)
                 
+                # The image is one character in the widget; history keeps a placeholder
+                before = "\n               📈 LIVE CHART:\n"
+                after = f"\n               Chart Size: {new_width}x{new_height}\n"
+                entry, evicted = self.feed.append(before + "[chart]" + after, kind='chart',
+                                                  width=new_width, height=new_height,
+                                                  path=chart_image.get('path'))
+                
                 # Enable editing to insert image
                 self.trading_feed.config(state='normal')
+                self.remove_feed_entries(evicted)
                 
                 # Insert the image directly into the text widget
-                self.trading_feed.insert(tk.END, "\n               📈 LIVE CHART:\n")
+                self.trading_feed.insert(tk.END, before)
                 self.trading_feed.image_create(tk.END, image=photo)
-                self.trading_feed.insert(tk.END, f"\n               Chart Size: {new_width}x{new_height}\n")
+                self.trading_feed.insert(tk.END, after)
                 
                 # Store reference to prevent garbage collection
-                if not hasattr(self, 'chart_images'):
-                    self.chart_images = []
                 self.chart_images.append(photo)
                 
-                # Keep only last 5 images to prevent memory issues
-                if len(self.chart_images) > 5:
+                # Keep only the last few images to prevent memory issues
+                if len(self.chart_images) > FEED_MAX_IMAGES:
                     self.chart_images.pop(0)
                 
                 # Auto-scroll to show the new image
@@ -521,9 +725,7 @@ This analysis will help fund animal rescue operations - accuracy is critical for
                 
                 # Disable editing
                 self.trading_feed.config(state='disabled')
-                
-                # Force update
-                self.root.update_idletasks()
+                self.metrics.observe('gui.chart_embed', time.perf_counter() - embed_start)
                 
                 self.add_to_feed(f"               🎯 Analyzing for trading opportunities...")
                 
@@ -535,44 +737,112 @@ This analysis will help fund animal rescue operations - accuracy is critical for
             self.add_to_feed(f"[{timestamp}] ❌ Chart display error: {str(e)}")
             
     def add_to_feed(self, message):
-        """Add a message to the trading feed with auto-scroll"""
+        """Add a message to the trading feed (any thread; shown on the next frame)"""
+        if threading.current_thread() is self.tk_thread:
+            self.feed_pending.append(message + "\n")
+        else:
+            self.bus.post('feed', message + "\n")
+            
+    def flush_feed(self):
+        """Insert pending feed lines with one edit and auto-scroll"""
+        if not self.feed_pending:
+            return
+        entries, evicted = self.feed.extend(self.feed_pending)
+        self.feed_pending = []
+        
         # Enable editing
         self.trading_feed.config(state='normal')
         
-        # Add the message
-        self.trading_feed.insert(tk.END, message + "\n")
+        # Drop entries that left the feed window, then add the messages
+        self.remove_feed_entries(evicted)
+        self.trading_feed.insert(tk.END, "".join(entry['text'] for entry in entries))
         
         # Auto-scroll to bottom
         self.trading_feed.see(tk.END)
         
         # Disable editing to prevent user changes
         self.trading_feed.config(state='disabled')
-        
-        # Force update
-        self.root.update_idletasks()
             
-    def simulate_ai_analysis(self):
-        """Simulate AI analysis for testing (Phase 1)"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        # This is temporary - will be replaced with real AI in Phase 2
-        import random
-        
-        recommendations = ["BUY", "WAIT", "STRONG BUY"]
-        risk_levels = ["LOW", "MEDIUM", "HIGH"]
-        entries = [24.45, 24.50, 24.55, 24.60, 24.65]
-        
-        rec = random.choice(recommendations)
-        risk = random.choice(risk_levels)
-        entry = random.choice(entries)
+    def remove_feed_entries(self, evicted):
+        """Delete entries that moved to feed history from the top of the widget (editing enabled)"""
+        lines = sum(entry['lines'] for entry in evicted)
+        if lines:
+            self.trading_feed.delete('1.0', f'{lines + 1}.0')
+            
+    def open_feed_history(self):
+        """Show the whole session's feed (history file plus current window) a page at a time"""
+        window = tk.Toplevel(self.root)
+        window.title("📜 Trading Feed History")
+        window.geometry("900x600")
+        
+        history_text = scrolledtext.ScrolledText(
+            window,
+            wrap=tk.WORD,
+            font=('Consolas', 10),
+            bg='#001122',
+            fg='#00ff00'
+        )
+        history_text.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        nav_frame = tk.Frame(window)
+        nav_frame.pack(fill='x', padx=10, pady=5)
+        page_var = tk.StringVar()
+        
+        # Start at the newest page
+        position = {'start': max(0, self.feed.total - DEFAULT_PAGE_SIZE)}
+        
+        def show_page():
+            start = position['start']
+            entries = self.feed.page(start, DEFAULT_PAGE_SIZE)
+            history_text.config(state='normal')
+            history_text.delete('1.0', tk.END)
+            history_text.insert(tk.END, "".join(f"{entry['time']} {entry['text']}" for entry in entries))
+            history_text.config(state='disabled')
+            page_var.set(f"Entries {start + 1}-{start + len(entries)} of {self.feed.total}")
+            
+        def move(step):
+            newest = max(0, self.feed.total - DEFAULT_PAGE_SIZE)
+            position['start'] = min(newest, max(0, position['start'] + step * DEFAULT_PAGE_SIZE))
+            show_page()
+            
+        tk.Button(nav_frame, text="◀ Older", command=lambda: move(-1)).pack(side='left')
+        tk.Button(nav_frame, text="Newer ▶", command=lambda: move(1)).pack(side='left', padx=5)
+        tk.Label(nav_frame, textvariable=page_var, font=('Arial', 9)).pack(side='right')
+        show_page()
+        
+    def on_close(self):
+        """Stop background work and keep the whole feed on disk before exiting"""
+        self.engine.close()
+        self.flush_feed()
+        self.feed.close()
+        self.logger.close()
+        self.root.destroy()
+        
+    def apply_analysis(self, result, timestamp, from_cache=False):
+        """
+        Show a parsed analysis in the GUI (Tk thread only).
+        
+        Args:
+            result (dict): Output of analysis_parser.parse_analysis
+            timestamp (str): Cycle start time for feed lines
+            from_cache (bool): Result came from the analysis cache
+        """
+        def price(value):
+            return f"${value:.2f}" if value is not None else "--"
+        
+        rec = result['recommendation']
+        risk = result['risk_level']
         
         # Update variables
         self.recommendation_var.set(rec)
         self.risk_level_var.set(risk)
-        self.entry_price_var.set(f"${entry}")
+        self.entry_price_var.set(price(result['entry_price']))
+        self.stop_loss_var.set(price(result['stop_loss']))
+        self.take_profit_var.set(price(result['take_profit']))
+        self.confidence_var.set(f"{result['confidence']}/10")
         
         # Update colors for mini display
-        if rec == "BUY" or rec == "STRONG BUY":
+        if rec == "BUY":
             self.rec_mini.config(bg='green', fg='white')
             # Play alert sound for BUY signals
             if self.tts_engine:
@@ -585,56 +855,45 @@ This analysis will help fund animal rescue operations - accuracy is critical for
         self.risk_mini.config(bg=risk_colors.get(risk, "gray"), fg='black' if risk == 'MEDIUM' else 'white')
         
         # Add analysis results to feed
-        self.add_to_feed(f"\n[{timestamp}] 🤖 AI ANALYSIS COMPLETE")
+        source = " (cached)" if from_cache else ""
+        self.add_to_feed(f"\n[{timestamp}] 🤖 AI ANALYSIS COMPLETE{source}")
         self.add_to_feed(f"               🎯 SIGNAL: {rec}")
         self.add_to_feed(f"               ⚡ RISK: {risk}")
-        self.add_to_feed(f"               💰 ENTRY: ${entry}")
+        self.add_to_feed(f"               💰 ENTRY: {price(result['entry_price'])}  "
+                         f"🛑 STOP: {price(result['stop_loss'])}  🎯 TARGET: {price(result['take_profit'])}")
+        self.add_to_feed(f"               📈 CONFIDENCE: {result['confidence']}/10")
+        if result['reasoning']:
+            self.add_to_feed(f"               💭 {result['reasoning']}")
         
-        if rec == "BUY" or rec == "STRONG BUY":
+        if rec == "BUY":
             self.add_to_feed(f"               🚀 OPPORTUNITY DETECTED! Another chance to help animals! 🐾")
         else:
             self.add_to_feed(f"               ⏳ Waiting for better setup...")
             
         # Log for debug
-        self.log_debug(f"🎯 Analysis: {rec} | Risk: {risk} | Entry: ${entry}")
-        
-        return {
-            'recommendation': rec,
-            'risk_level': risk, 
-            'entry_price': f'${entry}',
-            'confidence': random.randint(65, 95)
-        }
-        
-        # Simulate prices
-        base_price = 24.50
-        self.entry_price_var.set(f"${base_price:.2f}")
-        self.stop_loss_var.set(f"${base_price - 0.10:.2f}")
-        self.take_profit_var.set(f"${base_price + 0.25:.2f}")
-        self.confidence_var.set(f"{random.randint(6, 9)}/10")
-        
-        self.log_debug(f"🎯 Analysis: {rec} | Risk: {risk} | Entry: ${base_price:.2f}")
+        self.log_debug(f"🎯 Analysis{source}: {rec} | Risk: {risk} | Entry: {price(result['entry_price'])} "
+                       f"| Confidence: {result['confidence']}/10")
+        
+        self.status_var.set("Analysis complete")
+        self.refresh_cache_stats()
 
 def main():
     """Main application entry point"""
     # Ensure data directory exists
     os.makedirs('data', exist_ok=True)
     
-    # Initialize debug file
-    try:
-        with open('debug.txt', 'a', encoding='utf-8') as f:
-            startup_msg = f"\n{'='*50}\n🐾 Animal Rescue Trading App Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n{'='*50}\n"
-            f.write(startup_msg)
-    except Exception as e:
-        print(f"Warning: Could not initialize debug.txt: {e}")
+    # Mark the session start in the debug log
+    get_logger().log("🐾 Animal Rescue Trading App Started")
     
     # Create and run the application
     root = tk.Tk()
     app = AnimalRescueTrader(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_close)
     
     print("🐾 Animal Rescue Day Trading App v1.0")
     print("🚀 Starting application...")
     print("💙 Every trade helps save more animals!")
-    print("📝 Debug output will be saved to debug.txt")
+    print("📝 Debug output will be saved to debug.jsonl")
     
     root.mainloop()
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Trading Feed Model
+==================
+Bounded model of the live trading feed. The newest entries live in a
+ring buffer that mirrors what the feed widget shows; entries pushed out
+of the ring are appended to an on-disk JSONL history that can be paged
+back in, so the widget (and its embedded chart images) stops growing
+over a trading day.
+"""
+
+import os
+import json
+import threading
+from collections import deque
+from datetime import datetime
+
+DEFAULT_MAX_ENTRIES = 400         # entries kept in memory and in the widget
+DEFAULT_PAGE_SIZE = 100           # entries per history page
+DEFAULT_HISTORY_DIR = os.path.join('data', 'feed_history')
+
+
+class FeedHistory:
+    """
+    Append-only JSONL file of evicted feed entries.
+
+    Byte offsets of every line are kept in memory, so any page is one
+    seek and one read regardless of how long the session has run.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): JSONL file; an existing file is indexed and appended to
+        """
+        self.path = path
+        self._offsets = []
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Index what is already there (e.g. after a restart)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                position = 0
+                for line in f:
+                    self._offsets.append(position)
+                    position += len(line)
+        self._file = open(path, 'ab')
+
+    def append(self, entries):
+        """Write a batch of entries with one write call."""
+        if not entries:
+            return
+        lines = [(json.dumps(entry, ensure_ascii=False) + "\n").encode('utf-8') for entry in entries]
+        with self._lock:
+            position = self._file.tell()
+            for line in lines:
+                self._offsets.append(position)
+                position += len(line)
+            self._file.write(b"".join(lines))
+            self._file.flush()
+
+    def page(self, start, count=DEFAULT_PAGE_SIZE):
+        """
+        Read entries start .. start+count-1 (0 is the oldest).
+
+        Returns:
+            list: Entry dicts, oldest first
+        """
+        with self._lock:
+            start = max(0, start)
+            end = min(len(self._offsets), start + count)
+            if start >= end:
+                return []
+            offset = self._offsets[start]
+            size = (self._offsets[end] if end < len(self._offsets) else self._file.tell()) - offset
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(size)
+        return [json.loads(line) for line in data.splitlines()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._offsets)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class FeedModel:
+    """
+    Ring buffer of feed entries backed by a FeedHistory.
+
+    An entry is a dict with 'seq', 'time', 'kind' ('text' or 'chart'),
+    'text' (exactly what is inserted into the widget, image excluded) and
+    'lines' (newlines in that text, used to delete it from the widget).
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, history=None):
+        """
+        Args:
+            max_entries (int): Entries kept before the oldest spill to history
+            history (FeedHistory, optional): Defaults to a new file per session
+                                             under data/feed_history/
+        """
+        self.max_entries = max_entries
+        if history is None:
+            session = datetime.now().strftime("%Y%m%d_%H%M%S")
+            history = FeedHistory(os.path.join(DEFAULT_HISTORY_DIR, f"feed_{session}.jsonl"))
+        self.history = history
+        self.entries = deque()
+        self._next_seq = 0
+
+    def append(self, text, kind='text', **extra):
+        """
+        Add an entry.
+
+        Args:
+            text (str): Text as inserted into the widget (newline-terminated)
+            kind (str): 'text' or 'chart'
+            **extra: Stored with the entry (e.g. chart size and path)
+
+        Returns:
+            tuple: (new entry, list of entries evicted to history)
+        """
+        entry = self._add(text, kind, extra)
+        return entry, self._evict()
+
+    def extend(self, texts):
+        """
+        Add several text entries with a single history write.
+
+        Returns:
+            tuple: (new entries, evicted entries)
+        """
+        added = [self._add(text, 'text', {}) for text in texts]
+        return added, self._evict()
+
+    def _add(self, text, kind, extra):
+        entry = {'seq': self._next_seq, 'time': datetime.now().strftime("%H:%M:%S"),
+                 'kind': kind, 'text': text, 'lines': text.count("\n")}
+        entry.update(extra)
+        self._next_seq += 1
+        self.entries.append(entry)
+        return entry
+
+    def _evict(self):
+        evicted = []
+        while len(self.entries) > self.max_entries:
+            evicted.append(self.entries.popleft())
+        self.history.append(evicted)
+        return evicted
+
+    def close(self):
+        """Write the entries still in memory to history, so the file holds the whole session."""
+        self.history.append(list(self.entries))
+        self.entries.clear()
+        self.history.close()
+
+    @property
+    def total(self):
+        """Entries ever added (history plus ring)."""
+        return self._next_seq
+
+    def page(self, start, count=DEFAULT_PAGE_SIZE):
+        """
+        Read entries by position, from history and then the ring.
+
+        Args:
+            start (int): Position, 0 is the oldest entry of the session
+            count (int): Entries to return
+
+        Returns:
+            list: Entries, oldest first
+        """
+        spilled = len(self.history)
+        result = self.history.page(start, count) if start < spilled else []
+        if len(result) < count:
+            ring_start = max(0, start - spilled)
+            result.extend(list(self.entries)[ring_start:ring_start + count - len(result)])
+        return result
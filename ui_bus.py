@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+GUI Update Bus
+==============
+Queue that worker threads post GUI updates to instead of touching Tk
+widgets. The Tk main loop drains it on a fixed frame interval, so every
+widget edit happens on the Tk thread and a burst of updates is applied
+as one batch per frame.
+"""
+
+import time
+from collections import deque
+
+DEFAULT_FRAME_MS = 50             # drain interval on the Tk side
+DEFAULT_FRAME_BUDGET = 0.015      # seconds of handler work per frame; the rest waits for the next frame
+
+
+class UpdateBus:
+    """
+    Thread-safe FIFO of (topic, payload) updates.
+
+    post() may be called from any thread; drain() only from the Tk thread.
+    """
+
+    def __init__(self):
+        self._items = deque()     # append/popleft are atomic, no lock needed
+        self.stats = {'frames': 0, 'handled': 0, 'max_batch': 0, 'max_backlog': 0}
+
+    def post(self, topic, payload=None):
+        """
+        Queue an update for the Tk thread.
+
+        Args:
+            topic (str): What kind of update (e.g. 'feed', 'debug', 'pipeline')
+            payload: Data for the handler
+        """
+        self._items.append((topic, payload))
+
+    def drain(self, handler, budget=DEFAULT_FRAME_BUDGET):
+        """
+        Hand waiting updates to handler(topic, payload) in posting order.
+
+        Stops once budget seconds have been spent; anything left is handled
+        on the next frame.
+
+        Returns:
+            int: Number of updates handled
+        """
+        backlog = len(self._items)
+        deadline = time.perf_counter() + budget
+        handled = 0
+        while self._items:
+            topic, payload = self._items.popleft()
+            handler(topic, payload)
+            handled += 1
+            if time.perf_counter() >= deadline:
+                break
+
+        self.stats['frames'] += 1
+        self.stats['handled'] += handled
+        self.stats['max_batch'] = max(self.stats['max_batch'], handled)
+        self.stats['max_backlog'] = max(self.stats['max_backlog'], backlog)
+        return handled
+
+    def __len__(self):
+        return len(self._items)